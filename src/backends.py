@@ -0,0 +1,154 @@
+import numpy as np
+
+from entity_utils import advance_entity, advance_population
+from interactions import pair_damage
+
+
+class Backend:
+    """
+    The per-epoch kernels of a simulation: `advance`, the ageing, feeding,
+    healing and status rules, and `pair_damage`, the summed interaction
+    damage. Every backend follows the same rules in the same float order, so
+    a seeded run gives the same trajectory on any of them.
+
+    Kernels work on anything with the `Population` column interface, except
+    where a backend says otherwise.
+    """
+
+    name = "backend"
+    # Whether `advance` works on bare columns, e.g. one shard's rows
+    batched = True
+
+    def advance(self, population, environment_factors: dict):
+        raise NotImplementedError
+
+    def pair_damage(self, aggression, first, second, num_alive: int) -> np.ndarray:
+        return pair_damage(aggression, first, second, num_alive)
+
+
+class PythonBackend(Backend):
+    """
+    The reference rules, one entity at a time through entity views. Slow, but
+    the plainest statement of what the other backends compute. Needs a full
+    `Population`, for its views.
+    """
+
+    name = "python"
+    batched = False
+
+    def advance(self, population, environment_factors):
+        availability = environment_factors.get("resource_availability", 1.0)
+        rows = population.alive_rows()
+        for row, entity in zip(rows.tolist(), population.views(rows), strict=True):
+            environment = environment_factors
+            if np.ndim(availability):
+                # Per-row availability, e.g. from the cells of a spatial world
+                environment = {
+                    **environment_factors,
+                    "resource_availability": float(availability[row]),
+                }
+            advance_entity(entity, environment)
+
+    def pair_damage(self, aggression, first, second, num_alive):
+        aggression = aggression.tolist()
+        taken_second = [0.0] * num_alive
+        taken_first = [0.0] * num_alive
+        for a, b in zip(first.tolist(), second.tolist(), strict=True):
+            taken_second[b] += aggression[a]
+        for a, b in zip(first.tolist(), second.tolist(), strict=True):
+            taken_first[a] += aggression[b]
+        return np.array(taken_second) + np.array(taken_first)
+
+
+class NumpyBackend(Backend):
+    """
+    The rules over whole columns at once, with masks for the branches. The
+    default.
+    """
+
+    name = "numpy"
+
+    def advance(self, population, environment_factors):
+        advance_population(population, environment_factors)
+
+
+class NumbaBackend(Backend):
+    """
+    The rules as JIT-compiled loops from `kernels`, one fused pass over the
+    rows with real branches. Needs Numba. Compiled kernels are cached on disk
+    (in `__pycache__`, or `NUMBA_CACHE_DIR`), so only the first run on a
+    machine pays for compilation.
+    """
+
+    name = "numba"
+
+    def __init__(self):
+        # Imported here, so Numba is only needed, and loaded, when chosen
+        import kernels
+
+        self.kernels = kernels
+
+    def advance(self, population, environment_factors):
+        availability = environment_factors.get("resource_availability", 1.0)
+        column = population.column
+        alive = population.alive_mask()
+        codes, dead = self.kernels.advance(
+            alive,
+            population.age,
+            population.health,
+            population.energy,
+            np.atleast_1d(np.asarray(availability, dtype=np.float64)),
+            float(environment_factors.get("temperature", 25.0)),
+            float(environment_factors.get("pollution", 0.0)),
+            column("metabolism_rate"),
+            column("foraging_efficiency"),
+            column("health_recovery_rate"),
+            column("health_decay_rate"),
+            column("resilience"),
+            column("max_age"),
+            column("thriving_threshold_health"),
+            column("thriving_threshold_energy"),
+            column("struggling_threshold_health"),
+            column("struggling_threshold_energy"),
+        )
+        population.update_status((codes, dead))
+
+    def pair_damage(self, aggression, first, second, num_alive):
+        return self.kernels.pair_damage(aggression, first, second, num_alive)
+
+
+BACKENDS = {
+    backend.name: backend for backend in (PythonBackend, NumpyBackend, NumbaBackend)
+}
+DEFAULT_BACKEND = "numpy"
+
+# One instance per backend and process, so Numba kernels load once
+_instances = {}
+
+
+def get_backend(backend=None) -> Backend:
+    """
+    Returns the backend named `backend`, one of `BACKENDS`, or `backend` itself
+    if it already is one. None gives the default, NumPy.
+    """
+    if isinstance(backend, Backend):
+        return backend
+    name = backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    instance = _instances.get(name)
+    if instance is None:
+        instance = _instances[name] = BACKENDS[name]()
+    return instance
+
+
+def available_backends() -> list:
+    """
+    Names of the backends that can run here: Numba's only if it is installed.
+    """
+    names = list(BACKENDS)
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        names.remove("numba")
+    return names
@@ -0,0 +1,190 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from entity import Entity
+from main import Simulation
+from params import sim_env_params
+from population import Population
+from profiling import PHASES, Profiler
+from stats import reset_totals
+
+SEED = 1234
+# Population size -> epochs to run; fewer epochs for the bigger populations
+DEFAULT_SIZES = {150: 100, 1_000: 50, 10_000: 20, 100_000: 5}
+DEFAULT_THRESHOLD = 0.2
+
+
+def _simulation(size: int, epochs: int) -> Simulation:
+    reset_totals()
+    return Simulation(
+        initial_entities=size,
+        time_steps=epochs,
+        environment_params=sim_env_params,
+        headless=True,
+        names=False,
+        seed=SEED,
+    )
+
+
+def bench_run(size: int, epochs: int) -> dict:
+    """
+    Epochs/sec of `run_simulation`, then peak traced memory in a second run
+    (tracemalloc slows everything down, so it never shares a timed run).
+    """
+    simulation = _simulation(size, epochs)
+    started = time.perf_counter()
+    simulation.run_simulation()
+    elapsed = time.perf_counter() - started
+    epochs_run = simulation.current_time + 1
+
+    tracemalloc.start()
+    _simulation(size, epochs).run_simulation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "epochs": epochs_run,
+        "seconds": elapsed,
+        "epochs_per_sec": epochs_run / elapsed,
+        "peak_memory_bytes": peak,
+    }
+
+
+def bench_phases(size: int, epochs: int) -> dict:
+    """
+    Mean seconds per call of each phase of the epoch loop, as recorded by a
+    `Profiler` attached to the run.
+    """
+    simulation = _simulation(size, epochs)
+    profiler = Profiler()
+    simulation.profiler = profiler
+    simulation.run_simulation()
+    return {
+        phase: {"seconds_per_call": profiler.seconds[phase] / profiler.calls[phase]}
+        for phase in PHASES
+        if profiler.calls[phase]
+    }
+
+
+def bench_construction(size: int) -> dict:
+    """
+    Seconds per entity to construct detached entities and copy them into a
+    population.
+    """
+    started = time.perf_counter()
+    entities = [Entity() for _ in range(size)]
+    constructed = time.perf_counter()
+    Population(capacity=size).extend(entities)
+    finished = time.perf_counter()
+    return {
+        "construct": {"seconds_per_entity": (constructed - started) / size},
+        "extend": {"seconds_per_entity": (finished - constructed) / size},
+    }
+
+
+def run_benchmarks(sizes: dict = None) -> dict:
+    """
+    Runs the whole suite and returns results keyed by "<benchmark>/<size>".
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    results = {}
+    for size, epochs in sizes.items():
+        results[f"run_simulation/{size}"] = bench_run(size, epochs)
+        for phase, result in bench_phases(size, min(epochs, 10)).items():
+            results[f"phase/{phase}/{size}"] = result
+        for step, result in bench_construction(size).items():
+            results[f"entity_{step}/{size}"] = result
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list:
+    """
+    Returns a line per benchmark that got slower (or used more memory) than
+    the baseline by more than `threshold`, e.g. 0.2 for 20%.
+    """
+    regressions = []
+    for key, base in baseline["results"].items():
+        now = current["results"].get(key)
+        if now is None:
+            continue
+        for metric, base_value in base.items():
+            if metric in ("epochs", "seconds") or not base_value:
+                continue
+            now_value = now[metric]
+            # Higher is better for throughput, lower is better for the rest
+            if metric == "epochs_per_sec":
+                ratio = base_value / now_value
+            else:
+                ratio = now_value / base_value
+            if ratio > 1.0 + threshold:
+                regressions.append(
+                    f"{key} {metric}: {base_value:.4g} -> {now_value:.4g} "
+                    f"({(ratio - 1.0) * 100:.0f}% worse)"
+                )
+    return regressions
+
+
+def _parse_sizes(option: str) -> dict:
+    sizes = {}
+    for item in option.split(","):
+        size, _, epochs = item.partition(":")
+        sizes[int(size)] = int(epochs) if epochs else DEFAULT_SIZES.get(int(size), 10)
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal Lifeform benchmarks")
+    parser.add_argument(
+        "--sizes",
+        type=_parse_sizes,
+        default=None,
+        metavar="N[:EPOCHS],...",
+        help="population sizes to run, e.g. 150,1000:20 (default: 150 to 100k)",
+    )
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="flag slowdowns beyond this fraction (default 0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    report = run_benchmarks(args.sizes)
+    for key, result in report["results"].items():
+        metrics = ", ".join(f"{k}={v:.4g}" for k, v in result.items())
+        print(f"{key}: {metrics}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions beyond threshold")
@@ -0,0 +1,179 @@
+import json
+import os
+
+import numpy as np
+
+from genome import PARAM_KEYS, Genome
+from identity import advance_ids, peek_next_id
+from params import entity_params
+from schedule import DEFAULT_SCHEDULE, load_schedule
+from stats import final_totals
+from world import World
+
+CHECKPOINT_VERSION = 1
+META_FILE = "meta.json"
+LINEAGE_FILE = "lineage.npz"
+
+
+def save_checkpoint(simulation, path: str):
+    """
+    Writes the full state of `simulation` to the directory `path`.
+
+    Columns go to uncompressed .npy files, one per column, so they can be
+    memory-mapped on load. Distinct genomes are stored once, as a matrix over
+    `PARAM_KEYS`, with a per-row index into it. Counters, environment factors,
+    running and scheduled events and the simulation's RNG state go to a small
+    JSON file, along with the settings of a spatial world, whose resource cells
+    get their own arrays, as does a custom environment schedule's table. A
+    lineage store is saved next to them.
+    """
+    population = simulation.population
+    n = len(population)
+    genomes = population.genomes[:n]
+
+    # Distinct genomes, in order of first appearance
+    genome_ids = {}
+    genome_index = np.empty(n, dtype=np.int32)
+    for row, genome in enumerate(genomes):
+        genome_index[row] = genome_ids.setdefault(genome, len(genome_ids))
+    genome_matrix = np.array([g.vector for g in genome_ids], dtype=np.float64)
+    genome_matrix = genome_matrix.reshape(len(genome_ids), len(PARAM_KEYS))
+
+    os.makedirs(path, exist_ok=True)
+    columns = {
+        "uid": population.uid[:n],
+        "age": population.age,
+        "health": population.health,
+        "energy": population.energy,
+        "status": population.status,
+        "genome_index": genome_index,
+        "genome_matrix": genome_matrix,
+        "ids": population.ids[:n].astype(str),
+        "names": population.names[:n].astype(str),
+        "position": population.positions,
+    }
+    world = simulation.world
+    if world:
+        columns["world_capacity"] = world.capacity
+        columns["world_resources"] = world.resources
+    if simulation.schedule is not DEFAULT_SCHEDULE:
+        columns["schedule"] = simulation.schedule.table(simulation.total_time_steps)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+
+    meta = {
+        "version": CHECKPOINT_VERSION,
+        "param_keys": list(PARAM_KEYS),
+        "size": n,
+        "next_uid": population._next_uid,
+        "next_id": peek_next_id(),
+        "generation": population.generation,
+        "current_time": simulation.current_time,
+        "start_time": simulation.start_time,
+        "total_time_steps": simulation.total_time_steps,
+        "total_entities": simulation.total_entities,
+        "peak_population": simulation.peak_population,
+        "extinction_epoch": simulation.extinction_epoch,
+        "environment_factors": simulation.environment_factors,
+        "final_totals": final_totals,
+        "seed": simulation.seed,
+        "seed_children": simulation.seed_sequence.n_children_spawned,
+        "rng_state": simulation.rng.bit_generator.state,
+        "world": world.config if world else None,
+        "events": simulation.events.state(),
+    }
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f)
+    if simulation.lineage:
+        simulation.lineage.save(os.path.join(path, LINEAGE_FILE))
+
+
+def load_checkpoint(simulation, path: str):
+    """
+    Restores the state written by `save_checkpoint` into `simulation`,
+    replacing its population, counters, environment and RNG state.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {meta['version']}")
+    if tuple(meta["param_keys"]) != PARAM_KEYS:
+        raise ValueError("Checkpoint was written with different entity parameters")
+
+    def load(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    def exists(name):
+        return os.path.exists(os.path.join(path, f"{name}.npy"))
+
+    # One Genome per distinct row of the matrix, then fan out by index
+    genome_matrix = load("genome_matrix")
+    genome_index = load("genome_index")
+    int_keys = [k for k, v in entity_params.items() if isinstance(v, int)]
+    distinct = np.empty(len(genome_matrix), dtype=object)
+    for i, values in enumerate(genome_matrix.tolist()):
+        parameters = dict(zip(PARAM_KEYS, values, strict=True))
+        for key in int_keys:
+            parameters[key] = int(parameters[key])
+        distinct[i] = Genome(parameters)
+
+    simulation.population.load_columns(
+        uid=load("uid"),
+        ids=load("ids"),
+        names=load("names"),
+        genomes=distinct[genome_index],
+        params=genome_matrix[genome_index].T,
+        age=load("age"),
+        health=load("health"),
+        energy=load("energy"),
+        status=load("status"),
+        position=load("position") if exists("position") else None,
+        next_uid=meta["next_uid"],
+        generation=meta["generation"],
+    )
+    advance_ids(meta["next_id"])
+
+    simulation.current_time = meta["current_time"]
+    simulation.start_time = meta["start_time"]
+    simulation.total_time_steps = meta["total_time_steps"]
+    simulation.total_entities = meta["total_entities"]
+    simulation.peak_population = meta["peak_population"]
+    simulation.extinction_epoch = meta["extinction_epoch"]
+    simulation.environment_factors = meta["environment_factors"]
+    final_totals.update(meta["final_totals"])
+
+    _load_surroundings(simulation, path, meta)
+
+    lineage_path = os.path.join(path, LINEAGE_FILE)
+    if simulation.lineage and os.path.exists(lineage_path):
+        simulation.lineage.load(lineage_path)
+
+    if meta.get("events"):
+        simulation.events.restore(meta["events"])
+
+    simulation.seed = meta["seed"]
+    simulation.seed_sequence = np.random.SeedSequence(
+        meta["seed"], n_children_spawned=meta["seed_children"]
+    )
+    simulation.rng = np.random.default_rng(simulation.seed_sequence)
+    simulation.rng.bit_generator.state = meta["rng_state"]
+
+
+def _load_surroundings(simulation, path: str, meta: dict):
+    """
+    Restores the spatial world and the environment schedule, or drops them if
+    the checkpointed run had none.
+    """
+    if meta.get("world"):
+        world = World(**meta["world"])
+        world.capacity = np.load(os.path.join(path, "world_capacity.npy"))
+        world.resources = np.load(os.path.join(path, "world_resources.npy"))
+        simulation.world = world
+    else:
+        simulation.world = None
+
+    schedule_path = os.path.join(path, "schedule.npy")
+    if os.path.exists(schedule_path):
+        simulation.schedule = load_schedule(schedule_path)
+    else:
+        simulation.schedule = DEFAULT_SCHEDULE
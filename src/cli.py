@@ -0,0 +1,289 @@
+"""
+The `lifeform` command: runs a simulation from command-line flags and an
+optional TOML or JSON scenario file.
+
+Only what a run asks for is imported. Importing this module and parsing the
+flags load neither numpy nor the simulation, so `--help` and bad arguments
+return at once; the dashboard, journal, lineage, metrics, stream, world and
+profiler modules load when their flag or scenario option is set.
+"""
+
+import argparse
+
+from logging_config import setup_logger
+from params import random_parameters
+from scenario import DEFAULT_SCENARIO, FOUNDER_PRESETS, load_scenario
+
+logger = setup_logger(__name__)
+
+# Output options when neither the scenario nor a flag sets them
+DEFAULT_OUTPUT = {
+    "headless": False,
+    "report_interval": 50,
+    "names": None,
+    "checkpoint_interval": None,
+    "checkpoint_dir": "checkpoints",
+    "metrics": None,
+    "journal": None,
+    "keyframe_interval": None,
+    "stream": None,
+    "lineage": False,
+    "dashboard": False,
+    "world": None,
+    "backend": None,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Flags default to None, so an unset flag leaves the scenario's value
+    parser = argparse.ArgumentParser(description="Terminal Lifeform simulation")
+    parser.add_argument(
+        "--scenario",
+        metavar="PATH",
+        default=None,
+        help="TOML or JSON scenario: size, environment, founders, events, output",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=None,
+        help="run without pacing, progress bar or per-entity logging",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=int,
+        default=None,
+        help="epochs between summary lines in headless mode (default: 50)",
+    )
+    parser.add_argument(
+        "--no-names",
+        dest="names",
+        action="store_false",
+        default=None,
+        help="skip generating entity names",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=None,
+        help="save a checkpoint every N epochs",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="directory checkpoints are written to (default: checkpoints)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="seed for a reproducible run"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="PATH",
+        help="continue the run saved in a checkpoint directory",
+    )
+    parser.add_argument(
+        "--dashboard",
+        action="store_true",
+        default=None,
+        help="show a live dashboard instead of log lines (implies --headless)",
+    )
+    parser.add_argument(
+        "--world",
+        metavar="WIDTHxHEIGHT",
+        default=None,
+        help="run in a 2D toroidal world of this size, e.g. 200x200",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PREFIX",
+        default=None,
+        help="stream per-epoch metrics to PREFIX.csv and PREFIX.npz",
+    )
+    parser.add_argument(
+        "--schedule",
+        metavar="PATH",
+        default=None,
+        help="environment schedule table (.npy) saved by EnvironmentSchedule.save",
+    )
+    parser.add_argument(
+        "--backend",
+        default=None,
+        help="compute backend for the per-epoch rules: python, numpy or numba "
+        "(default: numpy)",
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="DIR",
+        default=None,
+        help="record the run to a binary journal that src/journal.py can replay",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=None,
+        help="epochs between full-state keyframes in the journal",
+    )
+    parser.add_argument(
+        "--stream",
+        metavar="ADDRESS",
+        default=None,
+        help="publish state to viewers on HOST:PORT or a Unix socket path",
+    )
+    parser.add_argument(
+        "--lineage",
+        action="store_true",
+        default=None,
+        help="track every birth and report how each founder's line fared",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each phase of the epoch loop and report at the end",
+    )
+    parser.add_argument(
+        "--profile-window",
+        metavar="START:STOP",
+        default=None,
+        help="also run cProfile and tracemalloc for epochs START to STOP-1",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        default=None,
+        help="file to dump the window's cProfile stats to",
+    )
+    parser.add_argument(
+        "--profile-series",
+        metavar="PATH",
+        default=None,
+        help="CSV file for the per-epoch profile records",
+    )
+    return parser
+
+
+def simulation_options(output: dict, schedule, resume: bool) -> dict:
+    """
+    Turns output options, e.g. a scenario's merged with the flags, into
+    `Simulation` arguments, importing each optional component only if used.
+    """
+    options = {
+        key: output[key]
+        for key in (
+            "headless",
+            "report_interval",
+            "names",
+            "checkpoint_interval",
+            "checkpoint_dir",
+            "backend",
+        )
+    }
+    if output["metrics"]:
+        from metrics import MetricsRecorder
+
+        options["metrics"] = MetricsRecorder(output["metrics"], append=resume)
+    if output["dashboard"]:
+        from dashboard import Dashboard
+
+        options["dashboard"] = Dashboard()
+    if output["lineage"]:
+        from lineage import Lineage
+
+        options["lineage"] = Lineage()
+    if schedule:
+        from schedule import load_schedule
+
+        options["schedule"] = load_schedule(schedule)
+    if output["journal"]:
+        from journal import KEYFRAME_INTERVAL, Journal
+
+        interval = output["keyframe_interval"] or KEYFRAME_INTERVAL
+        options["journal"] = Journal(output["journal"], interval)
+    if output["stream"]:
+        from stream import StateStream
+
+        options["stream"] = StateStream(output["stream"])
+    if output["world"]:
+        from world import World
+
+        width, _, height = output["world"].partition("x")
+        options["world"] = World(width=float(width), height=float(height or width))
+    return options
+
+
+def add_founders(simulation, founders: list):
+    """
+    Adds a scenario's founders, in order, to a new simulation.
+    """
+    for founder in founders:
+        for _ in range(founder["count"]):
+            if "parameters" in founder:
+                parameters = founder["parameters"]
+            elif founder["preset"] == "random":
+                parameters = random_parameters(simulation.rng)
+            else:
+                parameters = FOUNDER_PRESETS[founder["preset"]]
+            simulation.add_founder(parameters)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    scenario = load_scenario(args.scenario) if args.scenario else DEFAULT_SCENARIO
+
+    output = {**DEFAULT_OUTPUT, **scenario["output"]}
+    output.update(
+        (key, value)
+        for key, value in vars(args).items()
+        if key in output and value is not None
+    )
+
+    from backends import BACKENDS
+    from events import EventEngine
+    from main import Simulation
+
+    if output["backend"] not in (None, *BACKENDS):
+        parser.error(
+            f"unknown backend {output['backend']!r} (choose from {', '.join(BACKENDS)})"
+        )
+
+    profiler = None
+    if args.profile or args.profile_window or args.profile_series:
+        from profiling import Profiler
+
+        window = None
+        if args.profile_window:
+            window = tuple(int(epoch) for epoch in args.profile_window.split(":"))
+        profiler = Profiler(window=window, profile_path=args.profile_output)
+
+    options = simulation_options(
+        output, args.schedule or scenario["schedule"], bool(args.resume)
+    )
+    options["profiler"] = profiler
+    if scenario["events"]:
+        options["events"] = EventEngine()
+        options["events"].load_scenario(scenario["events"])
+
+    if args.resume:
+        simulation = Simulation.from_checkpoint(args.resume, **options)
+    else:
+        simulation = Simulation(
+            initial_entities=scenario["initial_entities"],
+            time_steps=scenario["time_steps"],
+            environment_params=scenario["environment"],
+            seed=scenario["seed"] if args.seed is None else args.seed,
+            **options,
+        )
+        add_founders(simulation, scenario["founders"])
+
+    simulation.run_simulation()
+    if profiler and args.profile_series:
+        profiler.write_series(args.profile_series)
+    if simulation.lineage:
+        from lineage import founder_report
+
+        for line in founder_report(simulation.lineage, simulation.population):
+            logger.info("%s", line)
+
+
+if __name__ == "__main__":
+    main()
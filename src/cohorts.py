@@ -0,0 +1,525 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from entity import Entity
+from events import (
+    Epidemic,
+    EventEngine,
+    Heatwave,
+    Override,
+    Predator,
+    ResourceSpike,
+)
+from identity import next_ids, next_names
+from interactions import MAX_PARTNERS
+from main import Simulation
+from mutation import (
+    INTEGER,
+    LOWER,
+    MUTABLE_INDEX,
+    MUTABLE_KEYS,
+    UPPER,
+    mutate,
+    offspring_genomes,
+)
+from params import sim_env_params
+from population import DEAD, STRUGGLING, Population
+from stats import (
+    cohort_tracker,
+    disaster_tracker,
+    final_totals,
+    interaction_tracker,
+    mutation_tracker,
+    reset_totals,
+)
+
+# Mutated parameters snap to this many steps between their bounds, so sibling
+# mutants often share a genome and can merge into one cohort
+GENOME_LEVELS = 20
+# Most offspring bundles a cohort has per epoch; each bundle shares one draw
+BUNDLES = 16
+# Width of the health and energy bins cohorts merge within
+RESOLUTION = 5.0
+
+# Totals `tolerance_report` compares, besides the peak population
+COMPARED = ("total_births", "total_deaths", "total_disasters", "total_interactions")
+
+
+class CohortPopulation(Population):
+    """
+    `Population` whose rows are cohorts: `weight` entities with the same
+    genome, age, status, health and energy. Status indexes and `status_counts`
+    count rows; `count` and `alive_count` count entities.
+
+    `split` moves part of a cohort into a row of its own when some of its
+    members are singled out, e.g. infected or eaten, and `merge` folds rows
+    back together once their states are close again.
+    """
+
+    def __init__(self, capacity: int = 64):
+        # Sized for entities; far fewer cohorts are needed
+        super().__init__(min(capacity, 1024))
+
+    def _allocate(self, capacity: int):
+        super()._allocate(capacity)
+        self.weight_col = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self, needed: int):
+        weight = self.weight_col
+        super()._grow(needed)
+        if self.weight_col is not weight:
+            self.weight_col[: self.size] = weight[: self.size]
+
+    @property
+    def weight(self) -> np.ndarray:
+        return self.weight_col[: self.size]
+
+    def _added(self, start: int, end: int):
+        # New rows are single entities until their creator says otherwise
+        self.weight_col[start:end] = 1
+        super()._added(start, end)
+
+    def count(self, status: int) -> int:
+        return int(self.weight[self.status == status].sum())
+
+    def alive_count(self) -> int:
+        return int(self.weight[self.alive_mask()].sum())
+
+    def _copy(self, rows: np.ndarray) -> int:
+        """
+        Appends copies of `rows`, with new uids. Returns the first new row.
+        """
+        start = self.size
+        end = start + rows.size
+        self._grow(end)
+        self.uid[start:end] = np.arange(self._next_uid, self._next_uid + rows.size)
+        self._next_uid += rows.size
+        for column in (
+            self.ids,
+            self.names,
+            self.genomes,
+            self.age_col,
+            self.health_col,
+            self.energy_col,
+            self.status_col,
+        ):
+            column[start:end] = column[rows]
+        self.params[:, start:end] = self.params[:, rows]
+        self.position[:, start:end] = self.position[:, rows]
+        self.size = end
+        self._added(start, end)
+        return start
+
+    def split(self, rows: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Moves `counts[i]` members of cohort `rows[i]` into a new cohort with
+        the same state, for distinct `rows`. Returns the rows now holding the
+        moved members: the cohort itself when all of it moved.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        counts = np.asarray(counts, dtype=np.int64)
+        moved = rows.copy()
+        partial = counts < self.weight[rows]
+        if partial.any():
+            source = rows[partial]
+            start = self._copy(source)
+            self.weight_col[source] -= counts[partial]
+            self.weight_col[start : self.size] = counts[partial]
+            moved[partial] = np.arange(start, self.size)
+        return moved
+
+    def compact(self) -> np.ndarray:
+        keep = self.alive_rows()
+        weight = self.weight_col[keep]
+        removed = super().compact()
+        if removed.size:
+            self.weight_col[: keep.size] = weight
+        return removed
+
+    def merge(self, resolution: float = RESOLUTION) -> int:
+        """
+        Folds living cohorts with the same genome, age and status, and health
+        and energy in the same `resolution`-wide bins, into the first of them,
+        at their weighted mean health and energy. Returns the number of rows
+        merged away.
+        """
+        n = self.size
+        if n < 2:
+            return 0
+        # Genomes are interned, so equal genomes are the same object
+        genome = np.fromiter((id(g) for g in self.genomes[:n]), np.int64, n)
+        keys = np.column_stack(
+            (
+                genome,
+                self.age,
+                self.status,
+                np.floor(self.health / resolution).astype(np.int64),
+                np.floor(self.energy / resolution).astype(np.int64),
+            )
+        )
+        _, first, inverse = np.unique(
+            keys, axis=0, return_index=True, return_inverse=True
+        )
+        if first.size == n:
+            return 0
+
+        inverse = inverse.ravel()
+        weight = self.weight
+        total = np.bincount(inverse, weights=weight)
+        health = np.bincount(inverse, weights=weight * self.health) / total
+        energy = np.bincount(inverse, weights=weight * self.energy) / total
+        self.weight[first] = np.rint(total)
+        self.health[first] = health
+        self.energy[first] = energy
+
+        merged = np.ones(n, dtype=bool)
+        merged[first] = False
+        self.kill(np.flatnonzero(merged))
+        self.compact()
+        # Mean states can cross a status threshold
+        self.update_status()
+        return n - first.size
+
+
+class CohortEpidemic(Epidemic):
+    """
+    `Epidemic` over cohorts: patients and new infections are drawn among
+    entities, weighted by cohort size, and split off into infected cohorts.
+    Each infected cohort takes one damage draw per epoch.
+    """
+
+    def start(self, simulation, rng, **params):
+        population = simulation.population
+        rows = population.alive_rows()
+        weight = population.weight[rows]
+        patients = min(params.get("patients", self.patients), int(weight.sum()))
+        infected = np.empty(0, dtype=np.intp)
+        if patients:
+            take = rng.multivariate_hypergeometric(weight, patients)
+            infected = population.split(rows[take > 0], take[take > 0])
+        return {**params, "infected": sorted(population.uid[infected].tolist())}
+
+    def _spread(self, simulation, rng, state, infected):
+        population = simulation.population
+        transmission = state.get("transmission", self.transmission)
+        alive = population.alive_rows()
+        sick = np.zeros(len(population), dtype=bool)
+        sick[infected] = True
+        weight = population.weight
+        carriers = int(weight[alive[sick[alive]]].sum())
+        healthy = alive[~sick[alive]]
+        exposed = weight[healthy]
+        count = min(int(rng.binomial(carriers, transmission)), int(exposed.sum()))
+        if not count:
+            return np.empty(0, dtype=np.intp)
+        take = rng.multivariate_hypergeometric(exposed, count)
+        return population.split(healthy[take > 0], take[take > 0])
+
+
+class CohortPredator(Predator):
+    """
+    `Predator` over cohorts: the victims are drawn among entities, weighted by
+    cohort size, struggling entities first, and split off as dead cohorts.
+    """
+
+    def start(self, simulation, rng, **params):
+        population = simulation.population
+        factors = simulation.environment_factors
+        alive_count = population.alive_count()
+        impact = params.get("impact", factors["predator_impact_percentage"])
+        num_to_remove = max(1, int(alive_count * impact))
+
+        if population.count(STRUGGLING) >= num_to_remove:
+            rows = population.rows(STRUGGLING)
+        else:
+            rows = population.alive_rows()
+            num_to_remove = min(num_to_remove, alive_count)
+        take = rng.multivariate_hypergeometric(population.weight[rows], num_to_remove)
+        rows, take = rows[take > 0], take[take > 0]
+
+        names = population.names[rows].tolist()
+        population.kill(population.split(rows, take))
+        disaster_tracker(
+            "Dynamic Event - Predator!", simulation.current_time, names, num_to_remove
+        )
+        return {**params, "killed": num_to_remove}
+
+
+def cohort_events() -> list:
+    return [ResourceSpike(), CohortEpidemic(), Heatwave(), CohortPredator(), Override()]
+
+
+class CohortSimulation(Simulation):
+    """
+    A `Simulation` over weighted cohorts ("super-individuals") rather than
+    single entities, so memory and time grow with the number of distinct
+    states instead of the population.
+
+    The per-epoch rules run on each cohort's shared state with the usual
+    backend. Events, predators, deaths and reproduction act on cohort sizes,
+    drawing per entity and splitting cohorts when only some members are hit.
+    Interactions apply each cohort's expected damage, twice the mean
+    aggression of everyone else per partner, rather than drawing partners.
+    A cohort's offspring are born in up to `bundles` cohorts, each drawing
+    its mutations and starting state once; mutated parameters snap to
+    `genome_levels` steps between their bounds, so mutants can share genomes.
+    After every sweep, cohorts in the same state bin merge.
+
+    Aggregates follow the entity engine, not exactly: without random events,
+    `tolerance_report` puts alive counts and birth totals within a few
+    percent. Events add as much spread between seeds as between engines.
+    Spatial worlds, journals, streams, lineage, metrics and checkpoints
+    track single entities and are not supported.
+    """
+
+    population_class = CohortPopulation
+
+    def __init__(
+        self,
+        initial_entities=5,
+        *args,
+        resolution: float = RESOLUTION,
+        genome_levels: int = GENOME_LEVELS,
+        bundles: int = BUNDLES,
+        **kwargs,
+    ):
+        """
+        Args:
+            initial_entities: Entities in the starting cohort of default
+                entities.
+            resolution: Width of the health and energy bins cohorts merge
+                within. Finer bins keep more cohorts and more detail.
+            genome_levels: Steps between each mutable parameter's bounds that
+                mutated values snap to.
+            bundles: Most new cohorts a cohort's offspring form per epoch.
+                More bundles keep more of the offspring's spread.
+        """
+        for option in (
+            "world",
+            "journal",
+            "stream",
+            "lineage",
+            "metrics",
+            "checkpoint_interval",
+            "checkpoint_dir",
+        ):
+            if kwargs.get(option):
+                raise ValueError(f"Cohort runs do not support {option}")
+        if kwargs.get("events") is None:
+            kwargs["events"] = EventEngine(cohort_events())
+        self.resolution = resolution
+        self.genome_step = (UPPER - LOWER) / genome_levels
+        self.bundles = bundles
+        super().__init__(initial_entities, *args, **kwargs)
+
+    def _populate(self, count: int):
+        if count:
+            self.add_entity(Entity(), count)
+
+    def add_entity(self, entity: Entity, count: int = 1):
+        """
+        Adds a cohort of `count` copies of a detached entity.
+        """
+        super().add_entity(entity)
+        population = self.population
+        population.weight[-1] = count
+        self.total_entities += count - 1
+        self.peak_population = max(self.peak_population, population.alive_count())
+
+    def _handle_interactions(self):
+        population = self.population
+        rows = population.alive_rows()
+        num_alive = population.alive_count()
+        if num_alive < 2:
+            return
+
+        partners = min(num_alive - 1, MAX_PARTNERS)
+        aggression = population.column("aggression")[rows] * (
+            self.environment_factors["interaction_strength"]
+            * self._interaction_modifier(num_alive)
+        )
+        # Each entity hits `partners` others and is hit as often on average
+        others = (population.weight[rows] @ aggression - aggression) / (num_alive - 1)
+        damage = 2 * partners * others
+
+        health, energy = population.health, population.energy
+        health[rows] = np.maximum(0.0, health[rows] - damage)
+        energy[rows] = np.maximum(0.0, energy[rows] - damage / 2)
+        interaction_tracker(num_alive * partners)
+
+    def _sweep_status(self):
+        population = self.population
+        population.update_status()
+        cohort_tracker(deaths=int(population.weight[population.rows(DEAD)].sum()))
+        population.compact()
+        population.merge(self.resolution)
+
+    def _handle_reproduction(self):
+        """
+        Each eligible cohort has a binomial number of offspring, born as up to
+        `bundles` new cohorts. Each bundle draws its mutations and starting
+        health and energy once, as a single entity of the entity engine would.
+        """
+        population = self.population
+        rng = self.rng
+        candidates = population.eligible_rows()
+        chance = np.minimum(population.column("reproduction_chance")[candidates], 1.0)
+        births = rng.binomial(population.weight[candidates], chance)
+        parents, births = candidates[births > 0], births[births > 0]
+        count = int(births.sum())
+        if not count:
+            return
+
+        # Each cohort's offspring come in up to `bundles` equal bundles
+        bundles = np.minimum(births, self.bundles)
+        source = np.repeat(parents, bundles)
+        first_bundle = np.repeat(np.cumsum(bundles) - bundles, bundles)
+        position = np.arange(source.size) - first_bundle
+        sizes = np.repeat(births // bundles, bundles)
+        sizes += position < np.repeat(births % bundles, bundles)
+
+        inherited = population.params[MUTABLE_INDEX[:, None], source].T
+        values, mask = mutate(
+            inherited,
+            rng,
+            self.environment_factors["mutation_rate"],
+            self.environment_factors["mutation_strength"],
+        )
+        # Round onto the lattice up or down in proportion to the distance, so
+        # mutations keep their mean size however coarse the steps
+        steps = (values - LOWER) / self.genome_step
+        steps = np.floor(steps) + (rng.random(steps.shape) < steps % 1)
+        snapped = np.clip(LOWER + steps * self.genome_step, LOWER, UPPER)
+        snapped = np.where(INTEGER, np.round(snapped), snapped)
+        values = np.where(mask, snapped, values)
+        genomes = offspring_genomes(population.genomes[source], values, mask)
+
+        # Parents lose some health after reproduction
+        parent_rows = population.split(parents, births)
+        population.health[parent_rows] -= 3.0
+        start = population.spawn(
+            genomes,
+            rng.uniform(80, 100, source.size),
+            rng.uniform(80, 100, source.size),
+            next_ids(source.size),
+            next_names(source.size),
+        )
+        population.weight[start:] = sizes
+        self.total_entities += count
+        cohort_tracker(births=count)
+        mutation_tracker(
+            dict(zip(MUTABLE_KEYS, (sizes @ mask).tolist(), strict=True)),
+            self.current_time,
+        )
+
+
+def _run(simulation) -> dict:
+    """
+    Runs `simulation` and returns its peak population, `COMPARED` totals,
+    final rows and run time.
+    """
+    reset_totals()
+    started = time.perf_counter()
+    simulation.run_simulation()
+    elapsed = time.perf_counter() - started
+    result = {name: final_totals[name] for name in COMPARED}
+    result["peak_population"] = simulation.peak_population
+    result["rows"] = len(simulation.population)
+    result["seconds"] = elapsed
+    return result
+
+
+def tolerance_report(
+    entities: int, epochs: int, seeds: list, events: bool = False
+) -> list:
+    """
+    Runs the entity and cohort engines on the same settings for every seed
+    and returns one row per measure with the mean of each engine over the
+    seeds and their relative difference: the peak population, the
+    `COMPARED` totals, then rows in use at the end and run time. Engines draw
+    different random numbers, so only means over several seeds compare.
+
+    Random events and predators are off unless `events` is set: their timing
+    varies more between seeds than anything the engines do differently.
+    """
+    runs = {"entities": [], "cohorts": []}
+    quiet = {} if events else {"random_events": (), "triggers": []}
+    for seed in seeds:
+        settings = {
+            "initial_entities": entities,
+            "time_steps": epochs,
+            "environment_params": sim_env_params,
+            "headless": True,
+            "seed": seed,
+        }
+        runs["entities"].append(
+            _run(Simulation(**settings, events=EventEngine(**quiet)))
+        )
+        runs["cohorts"].append(
+            _run(
+                CohortSimulation(
+                    **settings, events=EventEngine(cohort_events(), **quiet)
+                )
+            )
+        )
+
+    rows = []
+    for name in ("peak_population", *COMPARED, "rows", "seconds"):
+        entity = float(np.mean([run[name] for run in runs["entities"]]))
+        cohort = float(np.mean([run[name] for run in runs["cohorts"]]))
+        rows.append(
+            {
+                "measure": name,
+                "entities": entity,
+                "cohorts": cohort,
+                "difference": (cohort - entity) / entity if entity else 0.0,
+            }
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cohort engine tolerance report")
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument(
+        "--events",
+        action="store_true",
+        help="keep random events and predators on in the comparison",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=None,
+        help="also time a cohort-only run starting with this many entities",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    report = tolerance_report(
+        args.entities, args.epochs, list(range(args.seeds)), args.events
+    )
+    print(f"{'measure':<20}{'entities':>14}{'cohorts':>14}{'difference':>12}")
+    for row in report:
+        print(
+            f"{row['measure']:<20}{row['entities']:>14.1f}{row['cohorts']:>14.1f}"
+            f"{row['difference']:>12.1%}"
+        )
+    if args.scale:
+        result = _run(
+            CohortSimulation(
+                initial_entities=args.scale,
+                time_steps=args.epochs,
+                environment_params={**sim_env_params, "predator_threshold": args.scale},
+                headless=True,
+                seed=0,
+            )
+        )
+        print(
+            f"{args.scale} entities: peak {result['peak_population']}, "
+            f"{result['rows']} cohorts at the end, {result['seconds']:.2f}s"
+        )
@@ -0,0 +1,268 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+from population import ALIVE, STRUGGLING, THRIVING
+from stats import final_totals
+
+REFRESH_PER_SECOND = 4.0
+HISTORY_EPOCHS = 240
+EVENT_LINES = 8
+ELDER_ROWS = 5
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+GAUGE_WIDTH = 30
+# Environment gauges: label, factor, full-scale value, colour
+GAUGES = (
+    ("Resources", "resource_availability", 1.0, "green"),
+    ("Temperature", "temperature", 45.0, "red"),
+    ("Pollution", "pollution", 0.8, "yellow"),
+)
+# Population table rows: label, status code, colour
+STATUS_ROWS = (
+    ("Thriving", THRIVING, "green"),
+    ("Alive", ALIVE, "white"),
+    ("Struggling", STRUGGLING, "yellow"),
+)
+
+
+def take_snapshot(simulation) -> dict:
+    """
+    Copies what the dashboard shows out of `simulation`. The copy has a fixed
+    size, so drawing it costs the same whatever the population.
+    """
+    population = simulation.population
+    statuses = []
+    for label, code, colour in STATUS_ROWS:
+        rows = population.rows(code)
+        if rows.size:
+            means = (
+                population.age[rows].mean(),
+                population.health[rows].mean(),
+                population.energy[rows].mean(),
+            )
+        else:
+            means = (0.0, 0.0, 0.0)
+        statuses.append((label, colour, rows.size, *means))
+
+    age = population.age
+    k = min(ELDER_ROWS, age.size)
+    elders = []
+    if k:
+        oldest = np.argpartition(age, age.size - k)[age.size - k :]
+        for row in oldest[np.argsort(-age[oldest], kind="stable")].tolist():
+            elders.append(
+                (
+                    population.ids[row],
+                    population.names[row],
+                    int(age[row]),
+                    float(population.health[row]),
+                    float(population.energy[row]),
+                )
+            )
+
+    return {
+        "epoch": simulation.current_time,
+        "total_epochs": simulation.total_time_steps,
+        "seed": simulation.seed,
+        "alive": population.alive_count(),
+        "statuses": statuses,
+        "elders": elders,
+        "environment": {
+            key: simulation.environment_factors[key] for _, key, _, _ in GAUGES
+        },
+        "totals": dict(final_totals),
+    }
+
+
+def sparkline(values, width: int) -> str:
+    """
+    The last `width` values as a row of block characters, scaled between
+    their min and max.
+    """
+    values = list(values)[-width:]
+    if not values:
+        return ""
+    low = min(values)
+    span = (max(values) - low) or 1
+    steps = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[round((value - low) / span * steps)] for value in values)
+
+
+def gauge(value: float, full_scale: float, colour: str) -> Text:
+    filled = int(round(min(max(value / full_scale, 0.0), 1.0) * GAUGE_WIDTH))
+    bar = Text("█" * filled, style=colour)
+    bar.append("░" * (GAUGE_WIDTH - filled), style="grey37")
+    return bar
+
+
+class Dashboard:
+    """
+    Live terminal dashboard, drawn by its own thread at a fixed refresh rate.
+
+    The simulation only hands over data: `record` appends the epoch's counts
+    to the history and, at most once per refresh, copies a snapshot; `event`
+    adds a line to the ticker. The render thread draws the latest snapshot, so
+    the simulation never waits on the terminal and a slow terminal only drops
+    frames.
+    """
+
+    def __init__(
+        self,
+        refresh_per_second: float = REFRESH_PER_SECOND,
+        history: int = HISTORY_EPOCHS,
+        console: Console = None,
+    ):
+        self.interval = 1.0 / refresh_per_second
+        self.console = console or Console()
+        self._lock = threading.Lock()
+        # (time, epoch, alive, thriving, struggling) per epoch
+        self._history = deque(maxlen=history)
+        self._events = deque(maxlen=EVENT_LINES)
+        self._snapshot = None
+        self._captured = 0.0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._render_loop, name="dashboard", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, simulation=None):
+        """
+        Takes a final snapshot of `simulation`, if given, draws it and stops
+        the render thread.
+        """
+        if simulation is not None:
+            self._snapshot = take_snapshot(simulation)
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def record(self, simulation, alive: int, thriving: int, struggling: int):
+        """
+        Adds the epoch's counts to the history, and refreshes the snapshot if
+        the last one is older than a frame.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            self._history.append(
+                (now, simulation.current_time, alive, thriving, struggling)
+            )
+        if now - self._captured >= self.interval:
+            self._snapshot = take_snapshot(simulation)
+            self._captured = now
+
+    def event(self, epoch: int, text: str):
+        with self._lock:
+            self._events.append((epoch, text))
+
+    def _render_loop(self):
+        with Live(console=self.console, auto_refresh=False) as live:
+            while not self._stopping.wait(self.interval):
+                live.update(self.render(), refresh=True)
+            live.update(self.render(), refresh=True)
+
+    def render(self):
+        """
+        Builds the dashboard from the latest snapshot.
+        """
+        snapshot = self._snapshot
+        with self._lock:
+            history = list(self._history)
+            events = list(self._events)
+        if snapshot is None:
+            return Text("Starting...")
+
+        rate = 0.0
+        if len(history) > 1:
+            elapsed = history[-1][0] - history[0][0]
+            rate = (len(history) - 1) / elapsed if elapsed > 0 else 0.0
+        header = Text.assemble(
+            ("Terminal Lifeform", "bold magenta"),
+            f"  Epoch {snapshot['epoch']}/{snapshot['total_epochs']}",
+            f"  Alive {snapshot['alive']}",
+            f"  {rate:.1f} epochs/s",
+            (f"  seed {snapshot['seed']}", "grey50"),
+        )
+
+        body = Table.grid(padding=(0, 2))
+        body.add_column()
+        body.add_column()
+        body.add_row(
+            Group(self._status_table(snapshot), self._elder_table(snapshot)),
+            Group(
+                self._environment_panel(snapshot),
+                self._history_panel(history),
+                self._events_panel(events),
+            ),
+        )
+        return Panel(Group(header, body), border_style="magenta")
+
+    def _status_table(self, snapshot) -> Table:
+        table = Table(title="Population", expand=True)
+        for column in ("Status", "Count", "Share", "Age", "Health", "Energy"):
+            table.add_column(column, justify="right" if column != "Status" else "left")
+        alive = snapshot["alive"] or 1
+        for label, colour, count, age, health, energy in snapshot["statuses"]:
+            table.add_row(
+                Text(label, style=colour),
+                str(count),
+                f"{count / alive:.0%}",
+                f"{age:.1f}",
+                f"{health:.1f}",
+                f"{energy:.1f}",
+            )
+        totals = snapshot["totals"]
+        table.caption = (
+            f"births {totals['total_births']}  deaths {totals['total_deaths']}  "
+            f"mutations {totals['total_mutations']}"
+        )
+        return table
+
+    def _elder_table(self, snapshot) -> Table:
+        table = Table(title="Elders", expand=True)
+        for column in ("Id", "Name", "Age", "Health", "Energy"):
+            table.add_column(column)
+        for entity_id, name, age, health, energy in snapshot["elders"]:
+            table.add_row(
+                entity_id, name or "-", str(age), f"{health:.1f}", f"{energy:.1f}"
+            )
+        return table
+
+    def _environment_panel(self, snapshot) -> Panel:
+        grid = Table.grid(padding=(0, 1))
+        for label, key, full_scale, colour in GAUGES:
+            value = snapshot["environment"][key]
+            grid.add_row(label, gauge(value, full_scale, colour), f"{value:.2f}")
+        return Panel(grid, title="Environment")
+
+    def _history_panel(self, history) -> Panel:
+        width = GAUGE_WIDTH + 12
+        grid = Table.grid(padding=(0, 1))
+        for label, index, colour in (
+            ("Alive", 2, "white"),
+            ("Thriving", 3, "green"),
+            ("Struggling", 4, "yellow"),
+        ):
+            values = [entry[index] for entry in history]
+            line = Text(sparkline(values, width), style=colour)
+            grid.add_row(label, line, str(values[-1]) if values else "")
+        return Panel(grid, title="History")
+
+    def _events_panel(self, events) -> Panel:
+        ticker = Text()
+        for epoch, text in reversed(events):
+            ticker.append(f"{epoch:>5} ", style="grey50")
+            ticker.append(f"{text}\n")
+        return Panel(ticker or Text("No events yet", style="grey50"), title="Events")
@@ -1,51 +1,133 @@
 # filepath: /home/jtk/Dev/TerminalLifeform/src/entity.py
-import random
-import uuid
+from genome import Genome
+from identity import next_id, next_name
 
-from faker import Faker
+# Status names, indexed by the integer codes stored in the population columns
+STATUS_NAMES = ("dead", "alive", "thriving", "struggling")
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
 
-from params import entity_params
 
-fake = Faker(["it_IT", "en_US", "en_GB", "en_NZ"])
+class _Field:
+    """
+    An entity attribute that lives on the entity itself while it is detached,
+    and in its population's columns once the entity is a view onto a row.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.private = "_" + name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        if entity._population is None:
+            return getattr(entity, self.private)
+        return entity._population.get_field(entity._locate(), self.name)
+
+    def __set__(self, entity, value):
+        if self.name == "parameters" and not isinstance(value, Genome):
+            value = Genome(value)
+        if entity._population is None:
+            setattr(entity, self.private, value)
+        else:
+            entity._population.set_field(entity._locate(), self.name, value)
 
 
 class Entity:
     """
     Represents an individual entity in the simulation.
 
+    A freshly constructed entity is detached and holds its own state. Entities
+    handed out by a `Population` are thin views: reading or writing an attribute
+    goes straight to that entity's row in the population columns.
+
+    Parameters are an immutable, shared `Genome`; assigning a mapping to
+    `parameters` interns it as a genome.
+
     Attributes:
         id (str): Unique identifier for the entity.
         age (int): Current age of the entity (in simulation Epochs).
         health (float): Current health of the entity (0.0 to 100.0).
         energy (float): Current energy level of the entity (0.0 to 100.0).
         status (str): Current status (e.g., 'alive', 'dead', 'thriving', 'struggling').
-        parameters (dict): Customizable parameters for this specific entity type.
-                           Examples: 'max_age', 'metabolism_rate', 'resilience'.
+        parameters (Genome): Customizable parameters for this specific entity type.
+                             Examples: 'max_age', 'metabolism_rate', 'resilience'.
     """
 
-    def __init__(self, initial_parameters: dict = None):
+    __slots__ = (
+        "_population",
+        "_row",
+        "_uid",
+        "_generation",
+        "_id",
+        "_name",
+        "_age",
+        "_health",
+        "_energy",
+        "_status",
+        "_parameters",
+    )
+
+    id = _Field()
+    name = _Field()
+    age = _Field()
+    health = _Field()
+    energy = _Field()
+    status = _Field()
+    parameters = _Field()
+
+    def __init__(
+        self,
+        initial_parameters: dict = None,
+        health: float = None,
+        energy: float = None,
+    ):
         """
         Initializes a new entity with default or provided parameters.
 
         Args:
-            initial_parameters A dictionary of custom parameters for this entity. Defaults to None.
+            initial_parameters A dictionary of custom parameters (or a Genome) for this entity. Defaults to None.
+            health, energy Starting values. Default to the 'initial_health' and 'initial_energy' parameters.
         """
-        self.id = str(uuid.uuid4())[:8]
+        self._population = None
+        self.id = next_id()
+        self.name = next_name()
         self.age = 0
         self.status = "alive"
-        self.parameters = entity_params.copy()
 
-        if random.uniform(1, 3) % 2 == 0:
-            self.name = fake.first_name_nonbinary()
+        # Override default parameters with any provided initial_parameters
+        if isinstance(initial_parameters, Genome):
+            self._parameters = initial_parameters
         else:
-            self.name = fake.last_name_nonbinary()
+            self._parameters = Genome(initial_parameters)
 
-        # Override default parameters with any provided initial_parameters
-        if initial_parameters:
-            self.parameters.update(initial_parameters)
+        self.health = self._parameters["initial_health"] if health is None else health
+        self.energy = self._parameters["initial_energy"] if energy is None else energy
+
+    @classmethod
+    def view(cls, population, row: int) -> "Entity":
+        """
+        Returns an entity bound to `row` of `population`. The view follows its
+        entity through `Population.compact`, so it stays valid for as long as
+        the entity remains in the population.
+        """
+        entity = cls.__new__(cls)
+        entity._population = population
+        entity._row = row
+        entity._uid = population.uid[row]
+        entity._generation = population.generation
+        return entity
 
-        self.health = self.parameters["initial_health"]
-        self.energy = self.parameters["initial_energy"]
+    def _locate(self) -> int:
+        """
+        Returns this view's current row, re-resolving it if the population has
+        been compacted since the view was created.
+        """
+        population = self._population
+        if self._generation != population.generation:
+            self._row = population.find(self._uid)
+            self._generation = population.generation
+        return self._row
 
     def is_alive(self) -> bool:
         return self.status != "dead"
@@ -54,18 +136,19 @@ class Entity:
         """
         Updates the entity's status based on its current health and energy.
         """
-        if self.health <= 0 or self.age >= self.parameters["max_age"]:
+        parameters = self.parameters
+        if self.health <= 0 or self.age >= parameters["max_age"]:
             self.status = "dead"
             self.health = 0.0
             self.energy = 0.0
         elif (
-            self.health >= self.parameters["thriving_threshold_health"]
-            and self.energy >= self.parameters["thriving_threshold_energy"]
+            self.health >= parameters["thriving_threshold_health"]
+            and self.energy >= parameters["thriving_threshold_energy"]
         ):
             self.status = "thriving"
         elif (
-            self.health <= self.parameters["struggling_threshold_health"]
-            or self.energy <= self.parameters["struggling_threshold_energy"]
+            self.health <= parameters["struggling_threshold_health"]
+            or self.energy <= parameters["struggling_threshold_energy"]
         ):
             self.status = "struggling"
         else:
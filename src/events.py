@@ -0,0 +1,452 @@
+import heapq
+
+import numpy as np
+
+from interactions import MAX_PARTNERS
+from population import DEAD, STRUGGLING
+from stats import disaster_tracker, event_tracker
+
+
+class Event:
+    """
+    An environment event type, registered once with an `EventEngine`.
+
+    Each time the event happens, `start` draws whatever that occurrence needs
+    and returns it as a state dict of plain values (so checkpoints can store
+    it). `apply` then runs once per epoch for `duration` epochs, starting with
+    the epoch it started in, and changes the environment factors or the whole
+    population in one batched step. The environment factors are reset from
+    the simulation's schedule every epoch, so an event layers its effect on
+    top by reapplying it while it lasts.
+
+    Keyword arguments to `start` come from a schedule or scenario entry and
+    override the event's defaults for that occurrence.
+    """
+
+    name = "event"
+    label = "Event"
+    colour = "red"
+
+    def __init__(self, duration: int = 1):
+        self.duration = duration
+
+    def check(self, params: dict, simulation=None):
+        """
+        Raises ValueError if `params` can't start this event, so a bad
+        scenario entry fails when it is scheduled rather than partway through
+        the run. Checks that need the simulation only run when it is given.
+        """
+        duration = params.get("duration", self.duration)
+        if not isinstance(duration, int) or duration < 1:
+            raise ValueError(f"{self.name}: duration must be a positive integer")
+
+    def start(self, simulation, rng, **params) -> dict:
+        return params
+
+    def apply(self, simulation, rng, state: dict, elapsed: int):
+        pass
+
+    def describe(self, state: dict) -> str:
+        """
+        Text for the event log and dashboard when the event starts.
+        """
+        return self.label
+
+
+class ResourceSpike(Event):
+    name = "resource_spike"
+    label = "Resource Spike"
+    colour = "yellow"
+
+    def __init__(self, amount: float = 0.2, duration: int = 1):
+        super().__init__(duration)
+        self.amount = amount
+
+    def apply(self, simulation, rng, state, elapsed):
+        factors = simulation.environment_factors
+        amount = state.get("amount", self.amount)
+        factors["resource_availability"] = min(
+            1.0, factors["resource_availability"] + amount
+        )
+
+
+class Heatwave(Event):
+    """
+    Raises the temperature by a random amount, drawn once, for every epoch it
+    lasts.
+    """
+
+    name = "heatwave"
+    label = "Heatwave"
+
+    def __init__(self, rise=(5.0, 10.0), ceiling: float = 45.0, duration: int = 1):
+        super().__init__(duration)
+        self.rise = rise
+        self.ceiling = ceiling
+
+    def start(self, simulation, rng, **params):
+        rise = params.get("rise", self.rise)
+        if not np.isscalar(rise):
+            rise = rng.uniform(*rise)
+        return {**params, "rise": float(rise)}
+
+    def apply(self, simulation, rng, state, elapsed):
+        factors = simulation.environment_factors
+        factors["temperature"] = min(
+            state.get("ceiling", self.ceiling), factors["temperature"] + state["rise"]
+        )
+
+
+class Override(Event):
+    """
+    Layers a temporary change of one environment factor over the schedule:
+    `mode` "set" replaces it with `value`, "add" shifts it and "scale"
+    multiplies it. Only factors the simulation's schedule sets can be
+    overridden, since those are reset every epoch. Meant for scenarios, e.g.
+    {"epoch": 200, "event": "override", "factor": "pollution", "value": 0.6,
+    "duration": 25}.
+    """
+
+    name = "override"
+    label = "Environment Override"
+    colour = "blue"
+
+    def __init__(self, duration: int = 10):
+        super().__init__(duration)
+
+    def check(self, params, simulation=None):
+        super().check(params, simulation)
+        factor = params.get("factor")
+        if not isinstance(factor, str):
+            raise ValueError("override: a factor is needed")
+        if params.get("mode", "set") not in ("set", "add", "scale"):
+            raise ValueError(f"override: unknown mode {params['mode']}")
+        value = params.get("value")
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            raise ValueError(f"override: {factor} needs a numeric value")
+        if simulation and factor not in simulation.schedule.factors:
+            raise ValueError(f"override: {factor} is not set by the schedule")
+
+    def start(self, simulation, rng, **params):
+        self.check(params, simulation)
+        return {"mode": "set", **params}
+
+    def apply(self, simulation, rng, state, elapsed):
+        factors = simulation.environment_factors
+        factor, value = state["factor"], state["value"]
+        if state["mode"] == "set":
+            factors[factor] = value
+        elif state["mode"] == "add":
+            factors[factor] += value
+        else:
+            factors[factor] *= value
+
+    def describe(self, state):
+        return f"{state['factor']} {state['mode']} {state['value']}"
+
+
+class Epidemic(Event):
+    """
+    A disease that starts in a few entities and, if given a `transmission`,
+    spreads while it lasts. By default it strikes once and doesn't spread;
+    scenarios opt in with a longer `duration` and a `transmission`.
+
+    Every epoch, each infected entity passes it on with probability
+    `transmission`: to a random living entity in the well-mixed model, or to
+    one of its neighbours in a spatial world, where the outbreak also starts
+    around a single patient zero. Then every living infected entity loses a
+    random amount of health. The infected are tracked by uid, so the event
+    survives compaction and checkpoints.
+    """
+
+    name = "disease_outbreak"
+    label = "Disease Outbreak"
+
+    def __init__(
+        self,
+        patients: int = 3,
+        damage=(10.0, 30.0),
+        transmission: float = 0.0,
+        duration: int = 1,
+    ):
+        super().__init__(duration)
+        self.patients = patients
+        self.damage = damage
+        self.transmission = transmission
+
+    def start(self, simulation, rng, **params):
+        population = simulation.population
+        if simulation.world:
+            rows = simulation.world.outbreak_rows(population, rng)
+        else:
+            size = len(population)
+            patients = params.get("patients", self.patients)
+            rows = rng.choice(size, min(size, patients), replace=False)
+            rows = rows[population.status[rows] != DEAD]
+        return {**params, "infected": population.uid[rows].tolist()}
+
+    def _infected_rows(self, population, state) -> np.ndarray:
+        """
+        Rows of the infected still in the population. Drops the others.
+        """
+        uid = population.uid[: len(population)]
+        infected = np.asarray(state["infected"], dtype=uid.dtype)
+        rows = np.searchsorted(uid, infected)
+        found = rows < uid.size
+        rows = rows[found]
+        rows = rows[uid[rows] == infected[found]]
+        state["infected"] = uid[rows].tolist()
+        return rows
+
+    def _spread(self, simulation, rng, state, infected: np.ndarray) -> np.ndarray:
+        """
+        Returns the rows newly infected by the living rows in `infected`.
+        """
+        population = simulation.population
+        transmission = state.get("transmission", self.transmission)
+        alive = population.alive_rows()
+        sick = np.zeros(len(population), dtype=bool)
+        sick[infected] = True
+        if simulation.world:
+            first, second = simulation.world.neighbor_pairs(
+                population, alive, MAX_PARTNERS, rng
+            )
+            contact = sick[alive[first]] & ~sick[alive[second]]
+            exposed = alive[second[contact]]
+            return np.unique(exposed[rng.random(exposed.size) < transmission])
+
+        carriers = int(np.count_nonzero(sick[alive]))
+        healthy = alive[~sick[alive]]
+        count = min(int(rng.binomial(carriers, transmission)), healthy.size)
+        return rng.choice(healthy, count, replace=False)
+
+    def apply(self, simulation, rng, state, elapsed):
+        population = simulation.population
+        infected = self._infected_rows(population, state)
+        if elapsed:
+            new = self._spread(simulation, rng, state, infected)
+            if new.size:
+                state["infected"] = sorted(
+                    state["infected"] + population.uid[new].tolist()
+                )
+                infected = np.concatenate([infected, new])
+
+        rows = infected[population.status[infected] != DEAD]
+        health = population.health
+        low, high = state.get("damage", self.damage)
+        health[rows] = np.maximum(0, health[rows] - rng.uniform(low, high, rows.size))
+
+
+class Predator(Event):
+    """
+    Kills a share of the population at once, struggling entities first.
+    Triggered by `predator_due` when the population grows too large.
+    """
+
+    name = "predator"
+    label = "Predator"
+    colour = "magenta"
+
+    def start(self, simulation, rng, **params):
+        population = simulation.population
+        factors = simulation.environment_factors
+        alive_count = population.alive_count()
+        impact = params.get("impact", factors["predator_impact_percentage"])
+        # Ensure at least one entity is removed if threshold is met
+        num_to_remove = max(1, int(alive_count * impact))
+
+        # Prioritize struggling entities if possible, otherwise random
+        if population.count(STRUGGLING) >= num_to_remove:
+            targets = rng.choice(
+                population.rows(STRUGGLING), num_to_remove, replace=False
+            )
+        else:
+            targets = rng.choice(
+                population.alive_rows(), min(num_to_remove, alive_count), replace=False
+            )
+
+        names = population.names[targets].tolist()
+        population.kill(targets)
+        disaster_tracker("Dynamic Event - Predator!", simulation.current_time, names)
+        return {**params, "killed": len(names)}
+
+    def describe(self, state):
+        return f"Predator took {state['killed']} entities"
+
+
+def predator_due(simulation, rng) -> bool:
+    """
+    A predator strikes, with the simulation's `predator_chance`, whenever the
+    population is above `predator_threshold`.
+    """
+    factors = simulation.environment_factors
+    return (
+        simulation.population.alive_count() > factors["predator_threshold"]
+        and rng.random() > factors["predator_chance"]
+    )
+
+
+class Trigger:
+    """
+    Starts `event` whenever `condition(simulation, rng)` is true. Conditions
+    are checked once per epoch, so they should be cheap.
+    """
+
+    def __init__(self, event: str, condition, **params):
+        self.event = event
+        self.condition = condition
+        self.params = params
+
+
+def default_events() -> list:
+    return [ResourceSpike(), Epidemic(), Heatwave(), Predator(), Override()]
+
+
+class EventEngine:
+    """
+    Runs a simulation's environment events.
+
+    Events are registered `Event` objects, started in three ways:
+    - scheduled for a given epoch on a priority queue (`schedule`, or a whole
+      scenario with `load_scenario`);
+    - at random: each epoch, with the simulation's `event_chance`, one of
+      `random_events` is drawn;
+    - by a `Trigger` whose condition holds.
+
+    Only the head of the queue, one random draw and the triggers are looked at
+    each epoch, however many event types are registered. Every random choice
+    comes from the simulation's generator, so a seeded run with a scenario
+    replays identically.
+    """
+
+    def __init__(
+        self,
+        events: list = None,
+        random_events=("resource_spike", "disease_outbreak", "heatwave"),
+        triggers: list = None,
+    ):
+        """
+        Args:
+            events: `Event` objects to register. Defaults to `default_events`.
+            random_events: Names of the events `event_chance` draws from. An
+                empty tuple leaves only scheduled and triggered events, e.g.
+                for a scripted scenario.
+            triggers: `Trigger` objects. Defaults to the predator trigger.
+        """
+        self.events = {}
+        for event in default_events() if events is None else events:
+            self.register(event)
+        self.random_events = tuple(random_events)
+        if triggers is None:
+            triggers = [Trigger("predator", predator_due)]
+        self.triggers = list(triggers)
+        # (epoch, sequence, name, params), ordered by epoch then insertion
+        self._queue = []
+        self._sequence = 0
+        # Occurrences still running: {"name", "started", "ends", "state"}
+        self.active = []
+
+    def register(self, event: Event):
+        self.events[event.name] = event
+
+    def schedule(self, epoch: int, name: str, **params):
+        """
+        Queues event `name` to start at `epoch`. `params` override the
+        event's defaults, e.g. `duration`.
+        """
+        if name not in self.events:
+            raise ValueError(f"Unknown event: {name}")
+        self.events[name].check(params)
+        heapq.heappush(self._queue, (epoch, self._sequence, name, params))
+        self._sequence += 1
+
+    def load_scenario(self, entries: list):
+        """
+        Schedules every entry of a scenario: dicts with an `epoch`, an `event`
+        name and any parameter overrides.
+        """
+        for entry in entries:
+            entry = dict(entry)
+            self.schedule(entry.pop("epoch"), entry.pop("event"), **entry)
+
+    def check(self, simulation):
+        """
+        Checks every scheduled event against `simulation` before it runs, e.g.
+        that overridden factors are on its schedule.
+        """
+        for _, _, name, params in self._queue:
+            self.events[name].check(params, simulation)
+
+    @property
+    def pending(self) -> list:
+        """
+        Scheduled events not started yet, as (epoch, name, params), in order.
+        """
+        return [(epoch, name, params) for epoch, _, name, params in sorted(self._queue)]
+
+    def step(self, simulation, rng):
+        """
+        Applies the running events, then starts the scheduled, random and
+        triggered events due this epoch.
+        """
+        epoch = simulation.current_time
+        for occurrence in self.active:
+            event = self.events[occurrence["name"]]
+            elapsed = epoch - occurrence["started"]
+            event.apply(simulation, rng, occurrence["state"], elapsed)
+
+        queue = self._queue
+        while queue and queue[0][0] <= epoch:
+            _, _, name, params = heapq.heappop(queue)
+            self.start(simulation, rng, name, **params)
+
+        factors = simulation.environment_factors
+        if self.random_events and rng.random() < factors["event_chance"]:
+            name = self.random_events[rng.integers(len(self.random_events))]
+            self.start(simulation, rng, name)
+
+        for trigger in self.triggers:
+            if trigger.condition(simulation, rng):
+                self.start(simulation, rng, trigger.event, **trigger.params)
+
+        self.active = [o for o in self.active if o["ends"] > epoch + 1]
+
+    def start(self, simulation, rng, name: str, **params):
+        """
+        Starts event `name` now and applies its first epoch.
+        """
+        event = self.events[name]
+        epoch = simulation.current_time
+        duration = params.pop("duration", event.duration)
+        state = event.start(simulation, rng, **params)
+        event.apply(simulation, rng, state, 0)
+        event_tracker()
+        simulation._log_event(event.colour, event.describe(state))
+        if duration > 1:
+            self.active.append(
+                {
+                    "name": name,
+                    "started": epoch,
+                    "ends": epoch + duration,
+                    "state": state,
+                }
+            )
+
+    def state(self) -> dict:
+        """
+        The queue and running events, as JSON-compatible values.
+        """
+        return {
+            "queue": [list(entry) for entry in sorted(self._queue)],
+            "sequence": self._sequence,
+            "active": self.active,
+        }
+
+    def restore(self, state: dict):
+        """
+        Restores what `state` returned, onto an engine with the same events.
+        """
+        self._queue = [tuple(entry) for entry in state["queue"]]
+        heapq.heapify(self._queue)
+        self._sequence = state["sequence"]
+        self.active = state["active"]
@@ -0,0 +1,94 @@
+import weakref
+from collections.abc import Mapping
+
+import numpy as np
+
+from entity_utils import validate_entity_params
+from params import entity_params
+
+# Column order of the parameters in a genome's vector
+PARAM_KEYS = tuple(entity_params)
+
+
+class Genome(Mapping):
+    """
+    Immutable, interned set of entity parameters.
+
+    Equal parameter sets always give the same `Genome` object, so an offspring
+    shares its parent's genome until a mutation actually changes a value, and
+    each distinct genome is validated once, when it is first created.
+
+    Attributes:
+        vector (np.ndarray): Read-only values in `PARAM_KEYS` order, ready to be
+                             copied into the population columns.
+    """
+
+    __slots__ = ("_items", "_values", "_hash", "vector", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, parameters: Mapping = None):
+        """
+        Returns the genome for `entity_params` overridden by `parameters`.
+        """
+        merged = dict(entity_params)
+        if parameters:
+            merged.update(parameters)
+        return cls._intern(merged)
+
+    @classmethod
+    def _intern(cls, merged: dict) -> "Genome":
+        items = tuple(merged.items())
+        genome = cls._interned.get(items)
+        if genome is not None:
+            return genome
+
+        validate_entity_params(merged)
+        genome = object.__new__(cls)
+        genome._items = items
+        genome._values = merged
+        genome._hash = hash(items)
+        genome.vector = np.array([merged[key] for key in PARAM_KEYS], dtype=np.float64)
+        genome.vector.flags.writeable = False
+        cls._interned[items] = genome
+        return genome
+
+    def replace(self, changes: dict) -> "Genome":
+        """
+        Returns the genome with `changes` applied. Returns `self` when nothing
+        actually changes, so unmutated offspring keep sharing it.
+        """
+        if all(self._values[key] == value for key, value in changes.items()):
+            return self
+        merged = dict(self._values)
+        merged.update(changes)
+        return self._intern(merged)
+
+    def copy(self) -> dict:
+        """
+        Returns the parameters as a plain, mutable dict.
+        """
+        return dict(self._values)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Genome):
+            return self is other
+        return Mapping.__eq__(self, other)
+
+    def __reduce__(self):
+        return (Genome, (self._values,))
+
+    def __repr__(self) -> str:
+        return f"Genome({self._values!r})"
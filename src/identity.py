@@ -0,0 +1,92 @@
+import random
+
+# Locales the names are drawn from
+NAME_LOCALES = ["it_IT", "en_US", "en_GB", "en_NZ"]
+NAME_POOL_SIZE = 1024
+
+_next_id = 0
+_name_pool = []
+# Names are cosmetic, so they come from their own stream rather than a simulation's
+_name_rng = random.Random()
+_naming = True
+
+
+def next_id() -> str:
+    """
+    Returns a short, process-wide unique id. Ids increase monotonically, so
+    they also sort in creation order.
+    """
+    global _next_id
+    value = _next_id
+    _next_id += 1
+    return f"{value:08x}"
+
+
+def next_ids(count: int) -> list:
+    """
+    Returns the next `count` ids at once, as `next_id` would one by one.
+    """
+    global _next_id
+    start = _next_id
+    _next_id += count
+    return [f"{value:08x}" for value in range(start, _next_id)]
+
+
+def peek_next_id() -> int:
+    """
+    Returns the counter value the next id will be made from.
+    """
+    return _next_id
+
+
+def advance_ids(value: int):
+    """
+    Moves the id counter forward to at least `value`, e.g. after restoring a
+    checkpoint, so new ids never repeat restored ones.
+    """
+    global _next_id
+    _next_id = max(_next_id, value)
+
+
+def _fill_name_pool():
+    """
+    Generates the name pool. Faker is imported here rather than at module
+    import, so runs that never show a name never load it.
+    """
+    from faker import Faker
+
+    fake = Faker(NAME_LOCALES)
+    _name_pool.extend(fake.last_name_nonbinary() for _ in range(NAME_POOL_SIZE))
+
+
+def next_name() -> str:
+    """
+    Returns a name drawn from the pool, or an empty string if naming is off.
+    """
+    if not _naming:
+        return ""
+    if not _name_pool:
+        _fill_name_pool()
+    return _name_rng.choice(_name_pool)
+
+
+def next_names(count: int) -> list:
+    """
+    Returns `count` names at once, as `next_name` would one by one.
+    """
+    if not _naming:
+        return [""] * count
+    if not _name_pool:
+        _fill_name_pool()
+    return _name_rng.choices(_name_pool, k=count)
+
+
+def set_naming(enabled: bool) -> bool:
+    """
+    Turns name generation on or off and returns the previous setting. With
+    naming off, entities get an empty name and Faker is never imported.
+    """
+    global _naming
+    previous = _naming
+    _naming = enabled
+    return previous
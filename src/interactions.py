@@ -0,0 +1,108 @@
+import numpy as np
+
+# Each entity interacts with up to this many others per Epoch
+MAX_PARTNERS = 3
+
+
+def draw_partners(
+    num_alive: int, num_partners: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Draws `num_partners` distinct partners for each of `num_alive` entities in
+    one batch, never pairing an entity with itself.
+
+    Returns an array of shape (num_alive, num_partners) holding positions in
+    0..num_alive-1. Each row is a uniform sample without replacement, the same
+    distribution as `random.sample` over everyone else, without building a
+    per-entity candidate list.
+    """
+    others = num_alive - 1
+    picks = np.empty((num_alive, num_partners), dtype=np.int64)
+    for k in range(num_partners):
+        # Draw from the slots not taken yet, then step over the taken ones in
+        # ascending order so the draw lands on an unused value
+        value = rng.integers(0, others - k, size=num_alive)
+        taken = np.sort(picks[:, :k], axis=1)
+        for column in range(k):
+            value += value >= taken[:, column]
+        picks[:, k] = value
+
+    # Skip over the entity itself
+    picks += picks >= np.arange(num_alive)[:, None]
+    return picks
+
+
+def pair_damage(
+    aggression: np.ndarray, first: np.ndarray, second: np.ndarray, num_alive: int
+) -> np.ndarray:
+    """
+    Total damage each of `num_alive` entities takes from the pairs (first[i],
+    second[i]): the summed `aggression` of everyone it was paired with. Hits
+    taken as the second of a pair are summed first, then those taken as the
+    first; backends sum in the same order so they give identical floats.
+    """
+    damage = np.bincount(second, weights=aggression[first], minlength=num_alive)
+    damage += np.bincount(first, weights=aggression[second], minlength=num_alive)
+    return damage
+
+
+def apply_interactions(
+    population,
+    rows: np.ndarray,
+    partners: np.ndarray,
+    interaction_strength: float,
+    interaction_modifier: float,
+    damage=pair_damage,
+) -> int:
+    """
+    Applies the aggression damage of every drawn pair at once.
+
+    `partners` is the (entities, partners) array from `draw_partners`. See
+    `apply_pairs` for the damage rules. Returns the number of pairs.
+    """
+    num_alive, num_partners = partners.shape
+    if num_partners == 0:
+        return 0
+
+    first = np.repeat(np.arange(num_alive), num_partners)
+    return apply_pairs(
+        population,
+        rows,
+        first,
+        partners.ravel(),
+        interaction_strength,
+        interaction_modifier,
+        damage,
+    )
+
+
+def apply_pairs(
+    population,
+    rows: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    interaction_strength: float,
+    interaction_modifier: float,
+    damage=pair_damage,
+) -> int:
+    """
+    Applies the aggression damage of the pairs (first[i], second[i]), given as
+    positions into `rows`, e.g. neighbours found by a spatial `World`.
+
+    In a pair (a, b), b loses `aggression[a] * interaction_strength *
+    interaction_modifier` health, a loses the same with `aggression[b]`, and
+    each loses half as much energy. Health and energy only go down during
+    interactions, so clamping the summed damage at zero matches clamping after
+    every single hit. `damage` sums the hits, see `pair_damage`. Returns the
+    number of pairs.
+    """
+    num_alive = len(rows)
+    aggression = population.column("aggression")[rows]
+    aggression = aggression * interaction_strength * interaction_modifier
+
+    damage = damage(aggression, first, second, num_alive)
+
+    health, energy = population.health, population.energy
+    health[rows] = np.maximum(0.0, health[rows] - damage)
+    energy[rows] = np.maximum(0.0, energy[rows] - damage / 2)
+    return first.size
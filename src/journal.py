@@ -0,0 +1,458 @@
+import argparse
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+from checkpoint import save_checkpoint
+from genome import PARAM_KEYS, Genome
+from params import entity_params
+from population import DEAD
+from stats import final_totals
+
+JOURNAL_FILE = "journal.bin"
+INDEX_FILE = "index.bin"
+KEYFRAME_DIR = "keyframes"
+MAGIC = b"TLJ1"
+BUFFER_SIZE = 1 << 20
+KEYFRAME_INTERVAL = 50
+
+# Record header: kind, epoch, payload length in bytes
+HEADER = struct.Struct("<BiI")
+
+# Record kinds, written in this order every epoch. ENVIRONMENT to
+# EVENT_STATE cover the environment phase, then one record per later phase.
+ENVIRONMENT = 1  # factors the epoch was processed with
+KILL = 2  # rows killed outright, e.g. by a predator
+EVENT_STATE = 3  # rows whose health or energy an event changed
+INTERACTIONS = 4  # interaction count, then the rows interactions changed
+DEATHS = 5  # uid and age of every entity the status sweep removed
+PARENT_STATE = 6  # parents' health after reproducing
+GENOME = 7  # a genome not seen before: its number and vector
+BIRTHS = 8  # one row per offspring, then their ids and names
+MUTATIONS = 9  # offspring parameters that differ from the parent's
+END = 10  # counters at the end of the epoch
+
+ENVIRONMENT_KEYS = ("resource_availability", "temperature", "pollution")
+STATE_DTYPE = np.dtype([("row", "<i4"), ("health", "<f8"), ("energy", "<f8")])
+DEATH_DTYPE = np.dtype([("uid", "<i8"), ("age", "<i8")])
+BIRTH_DTYPE = np.dtype(
+    [
+        ("parent", "<i8"),
+        ("uid", "<i8"),
+        ("genome", "<i8"),
+        ("health", "<f8"),
+        ("energy", "<f8"),
+    ]
+)
+MUTATION_DTYPE = np.dtype(
+    [("uid", "<i8"), ("param", "<i8"), ("old", "<f8"), ("new", "<f8")]
+)
+TOTAL_KEYS = tuple(final_totals)
+
+
+class Journal:
+    """
+    Append-only binary record of a run, with periodic keyframes.
+
+    Every epoch adds a few small records: the environment factors, what the
+    random phases (events, interactions, reproduction) changed, the deaths,
+    births and mutations, and the counters. The deterministic phases
+    (ageing, feeding, healing and the status sweep) are not recorded, since
+    replay reruns them. Records are written through a large buffer.
+
+    Every `keyframe_interval` epochs, the full state is saved as a checkpoint
+    under `keyframes/`, and its start epoch and the journal offset it matches
+    are appended to `index.bin`. `replay` starts from the nearest keyframe and
+    rolls the journal forward, without drawing a single random number.
+
+    The journal hooks into `Simulation` around its phases: `before` and
+    `after` diff the columns each phase touched.
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._file = None
+        self._index = None
+        self._genomes = {}
+        self._before = None
+        self._interactions = 0
+
+    def begin_run(self, simulation):
+        """
+        Opens the journal for `simulation`'s next epoch. A new journal gets
+        a keyframe straight away; an existing one must end where the
+        simulation resumes.
+        """
+        if simulation.world:
+            raise ValueError("The journal does not support a spatial world")
+        os.makedirs(os.path.join(self.path, KEYFRAME_DIR), exist_ok=True)
+        journal_path = os.path.join(self.path, JOURNAL_FILE)
+        fresh = not os.path.exists(journal_path)
+        if not fresh:
+            last = last_epoch(self.path)
+            if last != simulation.start_time - 1:
+                raise ValueError(
+                    f"Journal {self.path} ends at epoch {last}, but the "
+                    f"simulation starts at epoch {simulation.start_time}"
+                )
+        self._file = open(journal_path, "ab", buffering=BUFFER_SIZE)
+        self._index = open(os.path.join(self.path, INDEX_FILE), "ab")
+        # Genomes are numbered from every keyframe on, so replay can start there
+        self._genomes = {}
+        if fresh:
+            self._file.write(MAGIC)
+            self.keyframe(simulation)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+    def _write(self, kind: int, epoch: int, *parts):
+        payload = b"".join(
+            part if isinstance(part, bytes) else part.tobytes() for part in parts
+        )
+        self._file.write(HEADER.pack(kind, epoch, len(payload)))
+        self._file.write(payload)
+
+    def keyframe(self, simulation):
+        """
+        Saves the state the next epoch starts from and indexes it.
+        """
+        epoch = simulation.start_time
+        save_checkpoint(
+            simulation, os.path.join(self.path, KEYFRAME_DIR, f"epoch_{epoch:06d}")
+        )
+        self._file.flush()
+        self._index.write(np.array([epoch, self._file.tell()], dtype="<i8").tobytes())
+        self._index.flush()
+        self._genomes = {}
+
+    def before(self, phase: str, simulation):
+        population = simulation.population
+        if phase in ("environment", "interactions", "reproduction"):
+            self._before = (
+                population.health.copy(),
+                population.energy.copy(),
+                population.status.copy(),
+            )
+        elif phase == "status_sweep":
+            self._before = (
+                population.uid[: len(population)].copy(),
+                population.age.copy(),
+            )
+
+    def after(self, phase: str, simulation):
+        epoch = simulation.current_time
+        if phase == "environment":
+            self._after_environment(simulation, epoch)
+        elif phase == "interactions":
+            count = final_totals["total_interactions"] - self._interactions
+            self._write(
+                INTERACTIONS,
+                epoch,
+                np.array([count], dtype="<i8"),
+                self._changed(simulation.population),
+            )
+        elif phase == "status_sweep":
+            uid, age = self._before
+            gone = ~np.isin(
+                uid, simulation.population.uid[: len(simulation.population)]
+            )
+            deaths = np.empty(int(gone.sum()), dtype=DEATH_DTYPE)
+            deaths["uid"], deaths["age"] = uid[gone], age[gone]
+            self._write(DEATHS, epoch, deaths)
+        elif phase == "reproduction":
+            self._after_reproduction(simulation, epoch)
+
+    def _changed(self, population, rows: int = None) -> np.ndarray:
+        """
+        Rows among the first `rows` whose health or energy differs from the
+        copy taken in `before`, with their new values.
+        """
+        health, energy, _ = self._before
+        n = health.size if rows is None else rows
+        changed = np.flatnonzero(
+            (population.health[:n] != health[:n])
+            | (population.energy[:n] != energy[:n])
+        )
+        state = np.empty(changed.size, dtype=STATE_DTYPE)
+        state["row"] = changed
+        state["health"] = population.health[changed]
+        state["energy"] = population.energy[changed]
+        return state
+
+    def _after_environment(self, simulation, epoch: int):
+        population = simulation.population
+        factors = simulation.environment_factors
+        self._write(
+            ENVIRONMENT,
+            epoch,
+            np.array([factors[key] for key in ENVIRONMENT_KEYS], dtype="<f8"),
+        )
+        killed = np.flatnonzero((population.status == DEAD) & (self._before[2] != DEAD))
+        self._write(KILL, epoch, killed.astype("<i8"))
+        state = self._changed(population)
+        state = state[~np.isin(state["row"], killed)]
+        self._write(EVENT_STATE, epoch, state)
+        self._interactions = final_totals["total_interactions"]
+
+    def _after_reproduction(self, simulation, epoch: int):
+        population = simulation.population
+        start = self._before[0].size
+        parents = self._changed(population, start)
+        self._write(PARENT_STATE, epoch, parents)
+
+        # Offspring are appended in the order of their parents' rows
+        rows = np.arange(start, len(population))
+        births = np.empty(rows.size, dtype=BIRTH_DTYPE)
+        births["parent"] = population.uid[parents["row"]]
+        births["uid"] = population.uid[rows]
+        births["health"] = population.health[rows]
+        births["energy"] = population.energy[rows]
+        mutations = []
+        for i, row in enumerate(rows.tolist()):
+            genome = population.genomes[row]
+            births["genome"][i] = self._genome_number(genome, epoch)
+            parent = population.genomes[parents["row"][i]]
+            if genome is not parent:
+                for param in np.flatnonzero(genome.vector != parent.vector).tolist():
+                    mutations.append(
+                        (
+                            births["uid"][i],
+                            param,
+                            parent.vector[param],
+                            genome.vector[param],
+                        )
+                    )
+        names = "\0".join(
+            f"{population.ids[row]}\0{population.names[row]}" for row in rows.tolist()
+        )
+        self._write(
+            BIRTHS,
+            epoch,
+            np.array([rows.size], dtype="<i8"),
+            births,
+            names.encode(),
+        )
+        self._write(MUTATIONS, epoch, np.array(mutations, dtype=MUTATION_DTYPE))
+
+    def _genome_number(self, genome: Genome, epoch: int) -> int:
+        number = self._genomes.get(genome)
+        if number is None:
+            number = len(self._genomes)
+            self._genomes[genome] = number
+            self._write(GENOME, epoch, np.array([number], dtype="<i8"), genome.vector)
+        return number
+
+    def end_epoch(self, simulation):
+        """
+        Writes the epoch's counters, and a keyframe every `keyframe_interval`
+        epochs.
+        """
+        totals = [final_totals[key] for key in TOTAL_KEYS]
+        totals += [simulation.total_entities, simulation.peak_population]
+        self._write(END, simulation.current_time, np.array(totals, dtype="<i8"))
+        if simulation.start_time % self.keyframe_interval == 0:
+            self.keyframe(simulation)
+
+
+def read_records(path: str, offset: int = None):
+    """
+    Yields (kind, epoch, payload) for every record of the journal in the
+    directory `path`, starting at byte `offset`.
+    """
+    with open(os.path.join(path, JOURNAL_FILE), "rb", buffering=BUFFER_SIZE) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a lifeform journal")
+        if offset is not None:
+            f.seek(offset)
+        while header := f.read(HEADER.size):
+            kind, epoch, length = HEADER.unpack(header)
+            yield kind, epoch, f.read(length)
+
+
+def read_index(path: str) -> np.ndarray:
+    """
+    The keyframe index: one (start epoch, journal offset) row per keyframe.
+    """
+    index = np.fromfile(os.path.join(path, INDEX_FILE), dtype="<i8")
+    return index.reshape(-1, 2)
+
+
+def last_epoch(path: str) -> int:
+    """
+    The last epoch the journal has a complete record of, or -1.
+    """
+    start, offset = read_index(path)[-1]
+    last = start - 1
+    for kind, epoch, _ in read_records(path, int(offset)):
+        if kind == END:
+            last = epoch
+    return last
+
+
+class Replay:
+    """
+    Applies journal records to a simulation restored from a keyframe,
+    rerunning only the deterministic phases.
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.genomes = {}
+        self.int_keys = [k for k, v in entity_params.items() if isinstance(v, int)]
+        self.handlers = {
+            ENVIRONMENT: self._environment,
+            KILL: self._kill,
+            EVENT_STATE: self._state,
+            INTERACTIONS: self._interactions,
+            DEATHS: self._deaths,
+            PARENT_STATE: self._state,
+            GENOME: self._genome,
+            BIRTHS: self._births,
+            END: self._end,
+        }
+
+    def apply(self, kind: int, epoch: int, payload: bytes):
+        handler = self.handlers.get(kind)
+        if handler is not None:
+            handler(epoch, payload)
+
+    def _environment(self, epoch: int, payload: bytes):
+        simulation = self.simulation
+        simulation.current_time = epoch
+        values = np.frombuffer(payload, dtype="<f8").tolist()
+        simulation.environment_factors.update(
+            zip(ENVIRONMENT_KEYS, values, strict=True)
+        )
+
+    def _kill(self, epoch: int, payload: bytes):
+        killed = np.frombuffer(payload, dtype="<i8")
+        if killed.size:
+            self.simulation.population.kill(killed)
+
+    def _state(self, epoch: int, payload: bytes):
+        self._set_state(np.frombuffer(payload, dtype=STATE_DTYPE))
+
+    def _interactions(self, epoch: int, payload: bytes):
+        # Ageing, feeding and healing come between the events and interactions
+        self.simulation._process_population()
+        self._set_state(np.frombuffer(payload[8:], dtype=STATE_DTYPE))
+
+    def _deaths(self, epoch: int, payload: bytes):
+        population = self.simulation.population
+        population.update_status()
+        removed = population.compact()
+        if removed.size * DEATH_DTYPE.itemsize != len(payload):
+            raise ValueError(f"Replay diverged from the journal at epoch {epoch}")
+
+    def _genome(self, epoch: int, payload: bytes):
+        number = int(np.frombuffer(payload[:8], dtype="<i8")[0])
+        values = np.frombuffer(payload[8:], dtype="<f8").tolist()
+        parameters = dict(zip(PARAM_KEYS, values, strict=True))
+        for key in self.int_keys:
+            parameters[key] = int(parameters[key])
+        self.genomes[number] = Genome(parameters)
+
+    def _set_state(self, state: np.ndarray):
+        population = self.simulation.population
+        rows = state["row"]
+        population.health[rows] = state["health"]
+        population.energy[rows] = state["energy"]
+
+    def _births(self, epoch: int, payload: bytes):
+        from entity import Entity
+
+        count = int(np.frombuffer(payload[:8], dtype="<i8")[0])
+        end = 8 + count * BIRTH_DTYPE.itemsize
+        births = np.frombuffer(payload[8:end], dtype=BIRTH_DTYPE)
+        if not count:
+            return
+        strings = payload[end:].decode().split("\0")
+        entities = []
+        for i, birth in enumerate(births.tolist()):
+            _, _, genome, health, energy = birth
+            entity = Entity(self.genomes[genome], health=health, energy=energy)
+            entity.id, entity.name = strings[2 * i], strings[2 * i + 1]
+            entities.append(entity)
+        self.simulation.population.extend(entities)
+
+    def _end(self, epoch: int, payload: bytes):
+        simulation = self.simulation
+        totals = np.frombuffer(payload, dtype="<i8").tolist()
+        final_totals.update(zip(TOTAL_KEYS, totals[: len(TOTAL_KEYS)], strict=True))
+        simulation.total_entities, simulation.peak_population = totals[-2:]
+        simulation.start_time = epoch + 1
+        if len(simulation.population) == 0:
+            simulation.extinction_epoch = epoch
+
+
+def replay(path: str, epoch: int = None):
+    """
+    Rebuilds the simulation recorded in the journal directory `path` as it
+    was at the end of `epoch` (default: the last recorded epoch), from the
+    nearest earlier keyframe.
+
+    The population, counters and environment come out exactly as in the
+    live run. The generator state is the keyframe's, since replay never
+    draws from it.
+    """
+    from main import Simulation
+
+    index = read_index(path)
+    if epoch is None:
+        epoch = last_epoch(path)
+    usable = index[index[:, 0] <= epoch + 1]
+    if not usable.size:
+        raise ValueError(f"No keyframe at or before epoch {epoch} in {path}")
+    start, offset = usable[-1]
+
+    simulation = Simulation.from_checkpoint(
+        os.path.join(path, KEYFRAME_DIR, f"epoch_{start:06d}"),
+        headless=True,
+        names=False,
+    )
+    replayer = Replay(simulation)
+    if start <= epoch:
+        for kind, record_epoch, payload in read_records(path, int(offset)):
+            replayer.apply(kind, record_epoch, payload)
+            if kind == END and record_epoch >= epoch:
+                break
+    if simulation.start_time != epoch + 1:
+        raise ValueError(f"The journal in {path} ends before epoch {epoch}")
+    simulation.current_time = epoch
+    return simulation
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded simulation")
+    parser.add_argument("path", help="journal directory written with --journal")
+    parser.add_argument(
+        "--epoch", type=int, default=None, help="epoch to rebuild (default: last)"
+    )
+    parser.add_argument(
+        "--save",
+        metavar="PATH",
+        default=None,
+        help="save the rebuilt state as a checkpoint, e.g. to resume from it",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    started = time.perf_counter()
+    rebuilt = replay(args.path, args.epoch)
+    elapsed = time.perf_counter() - started
+    population = rebuilt.population
+    print(
+        f"Epoch {rebuilt.current_time}: {len(population)} alive, "
+        f"{final_totals['total_births']} births, "
+        f"{final_totals['total_deaths']} deaths, rebuilt in {elapsed:.2f}s"
+    )
+    if args.save:
+        save_checkpoint(rebuilt, args.save)
@@ -0,0 +1,253 @@
+import numpy as np
+
+from genome import PARAM_KEYS
+from population import PARAM_INDEX
+
+# Sentinel parent of founders, and of uids the store never saw
+NO_PARENT = -1
+
+
+class Lineage:
+    """
+    Append-only record of who descends from whom, indexed by entity uid.
+
+    Every entity costs 8 bytes: its parent's uid and its birth epoch, as
+    int32. A birth only stores the parameters that differ from the parent's
+    genome, as (uid, parameter, new value) entries, so a run with millions of
+    births fits in a few tens of megabytes. Founders (entities added rather
+    than born) keep their full genome, so any entity's parameters can be
+    rebuilt from its founder and the deltas along its line.
+
+    Uids only grow, so the deltas stay sorted by uid and a parent always has
+    a smaller uid than its children.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self.size = 0
+        self.parent = np.full(capacity, NO_PARENT, dtype=np.int32)
+        self.born = np.full(capacity, -1, dtype=np.int32)
+        self.delta_uid = np.empty(capacity, dtype=np.int32)
+        self.delta_param = np.empty(capacity, dtype=np.int8)
+        self.delta_value = np.empty(capacity, dtype=np.float64)
+        self.num_deltas = 0
+        # Founder uid -> (entity id, genome vector)
+        self.founders = {}
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory in use by the records, not counting spare capacity.
+        """
+        per_delta = (
+            self.delta_uid.itemsize
+            + self.delta_param.itemsize
+            + self.delta_value.itemsize
+        )
+        founders = len(self.founders) * len(PARAM_KEYS) * 8
+        return self.size * 8 + self.num_deltas * per_delta + founders
+
+    def _reserve(self, size: int):
+        capacity = len(self.parent)
+        if size > capacity:
+            while capacity < size:
+                capacity *= 2
+            extra = capacity - len(self.parent)
+            self.parent = np.concatenate(
+                [self.parent, np.full(extra, NO_PARENT, dtype=np.int32)]
+            )
+            self.born = np.concatenate([self.born, np.full(extra, -1, dtype=np.int32)])
+        self.size = max(self.size, size)
+
+    def _reserve_deltas(self, count: int):
+        needed = self.num_deltas + count
+        capacity = len(self.delta_uid)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("delta_uid", "delta_param", "delta_value"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self.num_deltas] = old[: self.num_deltas]
+            setattr(self, name, new)
+
+    def record_founders(self, population, rows, epoch: int):
+        """
+        Records `rows` of `population` as founders added at `epoch`.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        uids = population.uid[rows]
+        self._reserve(int(uids.max()) + 1 if uids.size else 0)
+        self.born[uids] = epoch
+        for uid, row in zip(uids.tolist(), rows.tolist(), strict=True):
+            self.founders[uid] = (population.ids[row], population.params[:, row].copy())
+
+    def record_births(self, population, parents, start: int, epoch: int):
+        """
+        Records rows `start:` of `population` as the offspring of `parents`,
+        one parent row per offspring, born at `epoch`.
+        """
+        children = np.arange(start, len(population))
+        if not children.size:
+            return
+        uids = population.uid[children]
+        self._reserve(int(uids[-1]) + 1)
+        self.parent[uids] = population.uid[parents]
+        self.born[uids] = epoch
+
+        params = population.params
+        param, column = np.nonzero(params[:, children] != params[:, parents])
+        # Column-major order keeps the deltas sorted by uid
+        order = np.lexsort((param, column))
+        param, column = param[order], column[order]
+        count = param.size
+        self._reserve_deltas(count)
+        end = self.num_deltas + count
+        self.delta_uid[self.num_deltas : end] = uids[column]
+        self.delta_param[self.num_deltas : end] = param
+        self.delta_value[self.num_deltas : end] = params[param, children[column]]
+        self.num_deltas = end
+
+    def ancestors(self, uid: int) -> np.ndarray:
+        """
+        Uids of `uid`'s parent, grandparent and so on, up to its founder.
+        """
+        parent = self.parent
+        line = []
+        uid = int(parent[uid])
+        while uid != NO_PARENT:
+            line.append(uid)
+            uid = int(parent[uid])
+        return np.array(line, dtype=np.int64)
+
+    def roots(self) -> np.ndarray:
+        """
+        The founder of every uid, found by pointer jumping: each pass doubles
+        the distance every entry has climbed, so it takes log2(generations)
+        vectorized passes.
+        """
+        n = self.size
+        parent = self.parent[:n].astype(np.int64)
+        root = np.where(parent == NO_PARENT, np.arange(n), parent)
+        while True:
+            jumped = root[root]
+            if np.array_equal(jumped, root):
+                return root
+            root = jumped
+
+    def descendant_counts(self, alive_uids=None) -> dict:
+        """
+        Number of descendants of every founder, as {founder uid: count}. With
+        `alive_uids`, e.g. `population.uid[:len(population)]`, only living
+        descendants (and a living founder itself) are counted.
+        """
+        root = self.roots()
+        if alive_uids is None:
+            counts = np.bincount(root, minlength=self.size)
+            # A founder is its own root but not its own descendant
+            return {uid: int(counts[uid]) - 1 for uid in self.founders}
+        counts = np.bincount(root[np.asarray(alive_uids)], minlength=self.size)
+        return {uid: int(counts[uid]) for uid in self.founders}
+
+    def parameter_history(self, uid: int, key: str) -> tuple:
+        """
+        How parameter `key` drifted along `uid`'s line: the uids from the
+        founder down to `uid`, their birth epochs and their values of `key`.
+        """
+        line = np.concatenate([self.ancestors(uid)[::-1], [uid]])
+        founder = int(line[0])
+        if founder not in self.founders:
+            raise LookupError(f"The founder of entity {uid} was not recorded")
+        param = PARAM_INDEX[key]
+        values = np.full(line.size, self.founders[founder][1][param])
+
+        # Deltas are sorted by uid, so each entity's are one contiguous run
+        delta_uid = self.delta_uid[: self.num_deltas]
+        first = np.searchsorted(delta_uid, line, side="left")
+        last = np.searchsorted(delta_uid, line, side="right")
+        changed = np.zeros(line.size, dtype=bool)
+        for i in np.flatnonzero(last > first).tolist():
+            run = slice(first[i], last[i])
+            hit = np.flatnonzero(self.delta_param[run] == param)
+            if hit.size:
+                values[i] = self.delta_value[first[i] + hit[0]]
+                changed[i] = True
+
+        # Forward-fill: a value holds until the next mutation down the line
+        source = np.maximum.accumulate(np.where(changed, np.arange(line.size), 0))
+        return line, self.born[line], values[source]
+
+    def save(self, path: str):
+        founder_uids = np.array(sorted(self.founders), dtype=np.int64)
+        np.savez(
+            path,
+            parent=self.parent[: self.size],
+            born=self.born[: self.size],
+            delta_uid=self.delta_uid[: self.num_deltas],
+            delta_param=self.delta_param[: self.num_deltas],
+            delta_value=self.delta_value[: self.num_deltas],
+            founder_uids=founder_uids,
+            founder_ids=np.array(
+                [self.founders[uid][0] for uid in founder_uids.tolist()], dtype=str
+            ),
+            founder_vectors=np.array(
+                [self.founders[uid][1] for uid in founder_uids.tolist()],
+                dtype=np.float64,
+            ).reshape(len(founder_uids), len(PARAM_KEYS)),
+        )
+
+    def load(self, path: str):
+        """
+        Replaces the records with those `save` wrote to `path`.
+        """
+        with np.load(path) as data:
+            self.size = 0
+            self.parent = np.full(1, NO_PARENT, dtype=np.int32)
+            self.born = np.full(1, -1, dtype=np.int32)
+            self._reserve(len(data["parent"]))
+            self.parent[: self.size] = data["parent"]
+            self.born[: self.size] = data["born"]
+            self.num_deltas = 0
+            self._reserve_deltas(len(data["delta_uid"]))
+            self.num_deltas = len(data["delta_uid"])
+            self.delta_uid[: self.num_deltas] = data["delta_uid"]
+            self.delta_param[: self.num_deltas] = data["delta_param"]
+            self.delta_value[: self.num_deltas] = data["delta_value"]
+            self.founders = {
+                uid: (entity_id, vector)
+                for uid, entity_id, vector in zip(
+                    data["founder_uids"].tolist(),
+                    data["founder_ids"].tolist(),
+                    data["founder_vectors"],
+                    strict=True,
+                )
+            }
+
+
+def founder_report(lineage: Lineage, population) -> list:
+    """
+    One line per distinct founder genome, e.g. the default founders against
+    the hardy ones: how many founders had it, their descendants in total and
+    alive now, and the genome's key parameters. Most descendants first.
+    """
+    total = lineage.descendant_counts()
+    alive = lineage.descendant_counts(population.uid[: len(population)])
+    groups = {}
+    for uid, (_, vector) in lineage.founders.items():
+        group = groups.setdefault(tuple(vector.tolist()), [0, 0, 0])
+        group[0] += 1
+        group[1] += total[uid]
+        group[2] += alive[uid]
+
+    shown = ("max_age", "resilience", "foraging_efficiency", "reproduction_chance")
+    lines = []
+    for vector, (founders, descendants, living) in sorted(
+        groups.items(), key=lambda item: -item[1][1]
+    ):
+        params = ", ".join(f"{key}={vector[PARAM_INDEX[key]]:.2f}" for key in shown)
+        lines.append(
+            f"{founders} founder(s) with {params}: "
+            f"{descendants} descendants, {living} alive"
+        )
+    return lines
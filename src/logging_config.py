@@ -1,25 +1,148 @@
+import atexit
 import logging
+import os
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
 
+# Under the project's logs/ directory wherever the run starts from, unless
+# LIFEFORM_LOG_FILE names another file
+LOG_FILE = os.environ.get("LIFEFORM_LOG_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "logs",
+    "simulation.log",
+)
+
+# Per-category loggers, so noisy output can be muted without losing the rest
+CATEGORIES = ("births", "deaths", "mutations", "events", "entities")
+MUTED = logging.CRITICAL + 1
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+_queue = queue.SimpleQueue()
+_listener = None
+_console_handler = None
+
+
+class PlainFormatter(logging.Formatter):
+    """
+    Formatter for the file sink: drops the `colored` ANSI escape codes.
+    """
+
+    def format(self, record):
+        return ANSI_ESCAPE.sub("", super().format(record))
 
-def setup_logger(name=__name__):
-    logger = logging.getLogger(name)
-    logger.setLevel(
-        logging.INFO
-    )  # Set to logging.DEBUG to see detailed interaction logs
 
-    file_handler = logging.FileHandler("logs/simulation.log", mode="w")
+class DeferredQueueHandler(QueueHandler):
+    """
+    Hands records to the background listener. Only the message itself is
+    rendered here, so the args are captured as they are now; timestamps, level
+    names and the sinks' formatting all happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def _start_listener():
+    global _listener, _console_handler
+    if _listener is not None:
+        return
+
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    # Opened on the first record, so processes that never log never truncate it
+    file_handler = logging.FileHandler(LOG_FILE, mode="w", delay=True)
     console_handler = logging.StreamHandler()
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    fmt = "%(asctime)s - %(levelname)s - %(message)s"
 
     file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(PlainFormatter(fmt))
 
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(logging.Formatter(fmt))
+
+    _console_handler = console_handler
+    _listener = QueueListener(
+        _queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Flushes every queued record to the sinks and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def set_console_logging(enabled: bool):
+    """
+    Turns the terminal sink on or off, e.g. while a live dashboard owns the
+    terminal. The log file keeps every record either way.
+    """
+    _start_listener()
+    _console_handler.setLevel(logging.INFO if enabled else MUTED)
+
+
+def colours() -> tuple:
+    """
+    The `colored` Back, Fore and Style palettes. Imported on first use, so a
+    run that never logs in colour never loads them.
+    """
+    from colored import Back, Fore, Style
+
+    return Back, Fore, Style
+
+
+def setup_logger(name=__name__):
+    logger = logging.getLogger(name)
 
     # Prevent adding handlers multiple times
     if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        logger.setLevel(
+            logging.INFO
+        )  # Set to logging.DEBUG to see detailed interaction logs
+        logger.addHandler(DeferredQueueHandler(_queue))
+        logger.propagate = False
+    _start_listener()
 
     return logger
+
+
+def category_logger(category: str) -> logging.Logger:
+    """
+    Returns the logger for one of `CATEGORIES`.
+    """
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown log category: {category}")
+    return setup_logger(f"lifeform.{category}")
+
+
+def set_verbosity(**categories) -> dict:
+    """
+    Sets the level of each named category. A value may be a logging level, or
+    True/False to switch the category on (INFO) or off. Returns the previous
+    levels, which can be passed back in to restore them.
+
+    Example:
+        set_verbosity(entities=False, births=logging.WARNING)
+    """
+    previous = {}
+    for category, level in categories.items():
+        if level is True:
+            level = logging.INFO
+        elif level is False:
+            level = MUTED
+        logger = category_logger(category)
+        previous[category] = logger.level
+        logger.setLevel(level)
+    return previous
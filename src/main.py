@@ -1,28 +1,40 @@
-import random
+import logging
+import os
 import time
+from contextlib import contextmanager
 
-from colored import Back, Fore, Style
-from tqdm import tqdm
+import numpy as np
 
+from backends import get_backend
 from entity import Entity
-from entity_utils import calc_energy_change, calc_health_change, validate_entity_params
-from logging_config import setup_logger
-from params import (
-    default_environment_factors,
-    hardy_entity_params,
-    max_parameters,
-    random_parameters,
-    sim_env_params,
+from entity_utils import advance_entity
+from events import EventEngine
+from identity import next_ids, next_names, set_naming
+from interactions import MAX_PARTNERS, apply_interactions, apply_pairs, draw_partners
+from logging_config import (
+    CATEGORIES,
+    category_logger,
+    colours,
+    set_console_logging,
+    set_verbosity,
+    setup_logger,
 )
+from mutation import MUTABLE_INDEX, MUTABLE_KEYS, mutate, offspring_genomes
+from params import PREDATOR_CHANCE_RANGE, default_environment_factors
+from population import DEAD, STRUGGLING, THRIVING, Population
+from profiling import NullProfiler
+from schedule import DEFAULT_SCHEDULE
 from stats import (
     birth_tracker,
     death_tracker,
-    disaster_tracker,
+    interaction_tracker,
     mutation_tracker,
     update_totals,
 )
 
 logger = setup_logger(__name__)
+entity_logger = category_logger("entities")
+event_logger = category_logger("events")
 
 
 class Simulation:
@@ -30,347 +42,613 @@ class Simulation:
     Manages the overall simulation, including entities, time, and environment.
     """
 
-    def __init__(self, initial_entities=5, time_steps=1000, environment_params=None):
-        self.entities = []
+    # Subclasses can keep the columns somewhere else, e.g. in shared memory
+    population_class = Population
+
+    def __init__(
+        self,
+        initial_entities=5,
+        time_steps=1000,
+        environment_params=None,
+        headless=False,
+        report_interval=50,
+        names=None,
+        checkpoint_interval=None,
+        checkpoint_dir="checkpoints",
+        seed=None,
+        profiler=None,
+        metrics=None,
+        world=None,
+        dashboard=None,
+        events=None,
+        journal=None,
+        lineage=None,
+        schedule=None,
+        backend=None,
+        stream=None,
+    ):
+        """
+        Args:
+            headless: Run as fast as possible, without pacing sleeps, progress
+                bar or per-entity logging. Only a summary line is logged every
+                `report_interval` epochs.
+            report_interval: Epochs between summary lines in headless mode.
+            names: Give entities generated names. Defaults to off when
+                headless, since nothing displays them.
+            checkpoint_interval: Save a checkpoint every this many epochs, into
+                `checkpoint_dir/epoch_NNNNNN`. None disables checkpoints.
+            seed: Seed for this simulation's own random generator. Every random
+                decision draws from it, so equal seeds give identical runs.
+                None picks fresh entropy, recorded in `self.seed`.
+            profiler: A `profiling.Profiler` to time each phase of the epoch
+                loop. None leaves profiling off at no measurable cost.
+            metrics: A `metrics.MetricsRecorder` to stream one row of counts,
+                environment factors and genome statistics per epoch.
+            world: A `world.World` to run in. Entities then move around it,
+                interact with and infect only their neighbours, and forage
+                from their own cell. None keeps the well-mixed model.
+            dashboard: A `dashboard.Dashboard` to show the run live. Implies
+                headless, and takes over the terminal while the run lasts.
+            events: An `events.EventEngine` with the events to run, and any
+                scheduled scenario. None gives the default random events and
+                the predator trigger.
+            journal: A `journal.Journal` to record the run to, so `replay`
+                can rebuild any epoch of it later.
+            lineage: A `lineage.Lineage` to record every founder and birth
+                in, for ancestry queries during or after the run.
+            schedule: A `schedule.EnvironmentSchedule` giving the baseline
+                environment factors of every epoch. Defaults to the standard
+                drift, `schedule.DEFAULT_SCHEDULE`.
+            backend: Name of the `backends` compute backend that runs the
+                per-epoch rules ("python", "numpy" or "numba"), or a
+                `backends.Backend`. Defaults to NumPy.
+            stream: A `stream.StateStream` to publish every epoch's state to
+                viewers attached over a local socket.
+        """
+        if dashboard:
+            headless = True
+            names = True if names is None else names
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self.population = self.population_class(capacity=initial_entities)
         self.current_time = 0
+        self.start_time = 0  # First Epoch `run_simulation` will run
+        self.peak_population = 0
+        self.extinction_epoch = None
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_dir = checkpoint_dir
         self.total_entities = 0
         self.total_time_steps = time_steps
+        self.headless = headless
+        self.report_interval = max(1, report_interval)
         self.environment_factors = default_environment_factors.copy()
+        self.profiler = profiler or NullProfiler()
+        self.metrics = metrics
+        self.world = world
+        self.dashboard = dashboard
+        self.events = events or EventEngine()
+        self.journal = journal
+        self.stream = stream
+        self.lineage = lineage
+        self.schedule = schedule or DEFAULT_SCHEDULE
+        self.backend = get_backend(backend)
+        self.names = not headless if names is None else names
+        # Category log levels while this simulation is working
+        self.verbosity = dict.fromkeys(CATEGORIES, False) if headless else {}
+        self._output_applied = False
 
         if environment_params:
             self.environment_factors.update(environment_params)
+        if self.environment_factors["predator_chance"] is None:
+            self.environment_factors["predator_chance"] = self.rng.uniform(
+                *PREDATOR_CHANCE_RANGE
+            )
+        if world:
+            world.seed_resources(self.rng)
 
         # Populate initial entities
-        for _ in range(initial_entities):
+        with self._output_settings():
+            self._populate(initial_entities)
+
+        logger.info(
+            "Simulation initialized with %s entities (seed %s).",
+            self.population.alive_count(),
+            self.seed,
+        )
+
+    def _populate(self, count: int):
+        """
+        Adds the `count` default entities a new simulation starts with.
+        """
+        for _ in range(count):
             self.add_entity(Entity())
 
-        logger.info(f"Simulation initialized with {len(self.entities)} entities.")
+    @classmethod
+    def from_checkpoint(cls, path: str, time_steps=None, **kwargs):
+        """
+        Creates a simulation from a checkpoint written by `save_checkpoint`.
+        Running it continues exactly where the checkpointed run left off.
+
+        Args:
+            time_steps: Overrides the checkpointed run length, e.g. to extend it.
+            kwargs: Other constructor arguments, such as `headless`.
+        """
+        from checkpoint import load_checkpoint
+
+        simulation = cls(initial_entities=0, **kwargs)
+        load_checkpoint(simulation, path)
+        if time_steps is not None:
+            simulation.total_time_steps = time_steps
+        return simulation
+
+    def spawn_rngs(self, count: int) -> list:
+        """
+        Returns `count` independent generators split off this simulation's
+        seed, e.g. one per worker. The same seed always gives the same streams.
+        """
+        return [np.random.default_rng(s) for s in self.seed_sequence.spawn(count)]
+
+    def save_checkpoint(self, path: str):
+        """
+        Saves the full simulation state, including RNG states, to `path`.
+        """
+        from checkpoint import save_checkpoint
+
+        save_checkpoint(self, path)
+        logger.info("Checkpoint saved to %s", path)
+
+    @property
+    def entities(self) -> list:
+        """
+        Entity views onto every row of the population, for code that works on
+        single entities. The epoch update itself runs on the columns.
+        """
+        return self.population.views()
 
     def add_entity(self, entity: Entity):
-        validate_entity_params(entity.parameters)
-        self.entities.append(entity)
+        """
+        Copies a detached entity into the population. Its parameters were
+        validated when its genome was first created.
+        """
+        row = self.population.add(entity)
+        if self.lineage:
+            self.lineage.record_founders(self.population, [row], self.current_time)
         self.total_entities += 1
-        logger.info(f"Added new entity: {entity.id}: {entity.name}")
+        self.peak_population = max(self.peak_population, len(self.population))
+        with self._output_settings():
+            if entity_logger.isEnabledFor(logging.INFO):
+                entity_logger.info("Added new entity: %s: %s", entity.id, entity.name)
 
-    def _update_environment(self):
+    def add_founder(self, parameters: dict = None):
         """
-        Updates environmental factors over time or based on random events.
+        Adds a new entity with `parameters`, or the default ones. It is built
+        under this simulation's naming setting, so a headless run never
+        generates a name for it.
         """
+        with self._output_settings():
+            self.add_entity(Entity(parameters))
 
-        # Gradual changes over time
-        self.environment_factors["resource_availability"] = max(
-            0.1, 1.0 - (self.current_time / self.total_time_steps) * 0.5
-        )
+    @contextmanager
+    def _output_settings(self):
+        """
+        Applies this simulation's naming and log verbosity, which are
+        process-wide, and puts the previous settings back afterwards, so a
+        headless run doesn't silence the simulations that come after it.
+        """
+        if self._output_applied:
+            yield
+            return
+        verbosity = set_verbosity(**self.verbosity)
+        naming = set_naming(self.names)
+        self._output_applied = True
+        try:
+            yield
+        finally:
+            self._output_applied = False
+            set_naming(naming)
+            set_verbosity(**verbosity)
+
+    def _log_event(self, colour: str, name: str):
+        """
+        Logs an environmental event line, on a background of the `colored`
+        colour named `colour`.
+        """
+        if self.dashboard:
+            self.dashboard.event(self.current_time, name)
+        if event_logger.isEnabledFor(logging.INFO):
+            back, _, style = colours()
+            event_logger.info(
+                "Time %s: %s Environmental Event - %s! %s",
+                self.current_time,
+                getattr(back, colour),
+                name,
+                style.reset,
+            )
 
-        self.environment_factors["temperature"] = 25.0 + 10 * (
-            self.current_time / self.total_time_steps - 0.5
-        )  # Oscillates
+    def _update_environment(self):
+        """
+        Sets this epoch's environment factors from the schedule, then lets
+        events change them or the population.
+        """
 
-        self.environment_factors["pollution"] = min(
-            0.8, (self.current_time / self.total_time_steps) * 0.3
+        # Gradual changes over time, looked up in the precomputed schedule
+        table = self.schedule.table(self.total_time_steps)
+        self.environment_factors.update(
+            zip(table.dtype.names, table[self.current_time].item(), strict=True)
         )
 
-        # Random events
-        if random.random() < self.environment_factors["event_chance"]:
-            event_type = random.choice(
-                ["resource_spike", "disease_outbreak", "heatwave"]
-            )
-            if event_type == "resource_spike":
-                self.environment_factors["resource_availability"] = min(
-                    1.0, self.environment_factors["resource_availability"] + 0.2
-                )
-                logger.info(
-                    f"Time {self.current_time}: {Back.yellow}Environmental Event - \
-                     Resource Spike! {Style.reset}"
-                )
-            elif event_type == "disease_outbreak":
-                # Reduce health of a random subset of entities
-                for entity in random.sample(self.entities, min(len(self.entities), 3)):
-                    if entity.is_alive():
-                        entity.health = max(0, entity.health - random.uniform(10, 30))
-                logger.info(
-                    f"Time {self.current_time}: {Back.red} Environmental Event \
-                     - Disease Outbreak! {Style.reset}"
-                )
-            elif event_type == "heatwave":
-                self.environment_factors["temperature"] = min(
-                    45.0,
-                    self.environment_factors["temperature"] + random.uniform(5, 10),
-                )
-                logger.info(
-                    f"Time {self.current_time}: {Back.red} Environmental Event \
-                     - Heatwave! {Style.reset}"
-                )
-
-        # Dynamic Event: Predator if population is too high
-        alive_count = len([e for e in self.entities if e.is_alive()])
-        if (
-            alive_count > self.environment_factors["predator_threshold"]
-            and random.random() > self.environment_factors["predator_chance"]
-        ):
-            num_to_remove = int(
-                alive_count * self.environment_factors["predator_impact_percentage"]
-            )
-            num_to_remove = max(
-                1, num_to_remove
-            )  # Ensure at least one entity is removed if threshold is met
-
-            # Prioritize struggling entities if possible, otherwise random
-            struggling_entities = [
-                e for e in self.entities if e.status == "struggling" and e.is_alive()
-            ]
-            if len(struggling_entities) >= num_to_remove:
-                targets = random.sample(struggling_entities, num_to_remove)
-            else:
-                targets = random.sample(
-                    [e for e in self.entities if e.is_alive()],
-                    min(num_to_remove, alive_count),
-                )
+        # Entities move and the world's resource cells are grazed and regrow
+        rng = self.rng
+        if self.world:
+            self.world.step(self.population, rng)
 
-            removed_entities = []
-
-            for entity in targets:
-                entity.health = 0  # Predator instantly kills
-                entity.update_status()  # Mark as dead
-                removed_entities.append(entity.name)
-                # logger.info(
-                #     f"{Style.BOLD}{Fore.cyan} Time {self.current_time}: \
-                #      Dynamic Event - Predator! Entity {entity.id} was removed.{Style.reset}"
-                # )
-
-                disaster_tracker(
-                    "Dynamic Event - Predator!",
-                    self.current_time,
-                    entity.name,
-                )
+        # Scheduled, random and triggered events, e.g. heatwaves and predators
+        self.events.step(self, rng)
 
     def _process_entity(self, entity):
         """
         Applies all updates to a single entity for the current Epoch.
+        This is the per-entity reference for `_process_population`.
         """
 
         if not entity.is_alive():
             return  # Skip dead entities
 
-        entity.age += 1
-        energy_change = calc_energy_change(entity, self.environment_factors)
-        entity.energy = max(0.0, min(100.0, entity.energy + energy_change))
-        health_change = calc_health_change(entity, self.environment_factors)
-        entity.health = max(0.0, min(100.0, entity.health + health_change))
-        entity.update_status()
+        advance_entity(entity, self.environment_factors)
+
+    def _process_population(self):
+        """
+        Applies the `_process_entity` rules to every living entity, with the
+        simulation's compute backend.
+        """
+        population = self.population
+        environment = self.environment_factors
+        if self.world:
+            environment = {
+                **environment,
+                "resource_availability": self.world.resource_availability(
+                    population, environment["resource_availability"]
+                ),
+            }
+
+        self.backend.advance(population, environment)
+
+    def _interaction_modifier(self, num_alive: int) -> float:
+        """
+        Interaction intensity increases with population density and low resources.
+        """
+        interaction_modifier = (
+            1.0 - self.environment_factors["resource_availability"]
+        ) + (num_alive / 100.0)  # Simple scaling
+        return min(1.0, max(0.1, interaction_modifier))  # Clamp between 0.1 and 1.0
 
     def _handle_interactions(self):
         """
         Handles interactions between entities, e.g., resource competition.
         """
-        alive_entities = [e for e in self.entities if e.is_alive()]
-        num_alive = len(alive_entities)
+        population = self.population
+        alive_rows = population.alive_rows()
+        num_alive = len(alive_rows)
 
         if num_alive < 2:
             # No interactions if less than 2 entities
-            logger.info(
-                f"{Style.BOLD}{Fore.cyan}No entities to interact with.{Style.reset}"
-            )
-            return
-
-        # Interaction intensity increases with population density and low resources
-        interaction_modifier = (
-            1.0 - self.environment_factors["resource_availability"]
-        ) + (num_alive / 100.0)  # Simple scaling
-        interaction_modifier = min(
-            1.0, max(0.1, interaction_modifier)
-        )  # Clamp between 0.1 and 1.0
-
-        for _, entity1 in enumerate(alive_entities):
-            # Each entity interacts with a small random subset of others
-            # To avoid N*N complexity for large populations
-            num_interactions = min(
-                num_alive - 1, 3
-            )  # Interact with up to 3 other entities
-            potential_targets = [e for e in alive_entities if e.id != entity1.id]
-
-            if not potential_targets:
-                continue
-
-            for entity2 in random.sample(potential_targets, num_interactions):
-                # Simple competition: entities lose health/energy based on aggression and resource scarcity
-                if entity1.is_alive() and entity2.is_alive():
-                    # Entity1 impacts Entity2
-                    damage_to_entity2 = (
-                        entity1.parameters["aggression"]
-                        * self.environment_factors["interaction_strength"]
-                        * interaction_modifier
-                    )
-                    entity2.health = max(0.0, entity2.health - damage_to_entity2)
-                    entity2.energy = max(
-                        0.0, entity2.energy - damage_to_entity2 / 2
-                    )  # Energy loss is half of health loss
-
-                    # Entity2 impacts Entity1 (can be symmetrical or asymmetrical)
-                    damage_to_entity1 = (
-                        entity2.parameters["aggression"]
-                        * self.environment_factors["interaction_strength"]
-                        * interaction_modifier
-                    )
-                    entity1.health = max(0.0, entity1.health - damage_to_entity1)
-                    entity1.energy = max(0.0, entity1.energy - damage_to_entity1 / 2)
-
-                    logger.debug(
-                        f"Time {self.current_time}: Interaction between {entity1.id} and {entity2.id}. "
-                        f"E1 Health:{entity1.health:.1f}, E2 Health:{entity2.health:.1f}"
-                    )
-                    # Note: Using debug level for frequent interaction logs to avoid overwhelming INFO level output
-
-    def _apply_mutation(self, params: dict) -> dict:
-        """
-        Applies slight random mutations to entity parameters.
-        """
-        mutated_params = params.copy()
-        mutation_rate = self.environment_factors["mutation_rate"]
-        mutation_strength = self.environment_factors["mutation_strength"]
-
-        # Parameters that can mutate and their bounds/types
-        mutable_parameters = {
-            "max_age": {"min": 50, "max": 200, "type": int},
-            "metabolism_rate": {"min": 0.1, "max": 1.0, "type": float},
-            "resilience": {"min": 0.0, "max": 1.0, "type": float},
-            "reproduction_chance": {"min": 0.01, "max": 0.15, "type": float},
-            "aggression": {"min": 0.0, "max": 1.0, "type": float},
-        }
-
-        for param_name, config in mutable_parameters.items():
-            if random.random() < mutation_rate:
-                original_value = mutated_params[param_name]
-                change = original_value * random.uniform(
-                    -mutation_strength, mutation_strength
+            if not self.headless:
+                _, fore, style = colours()
+                logger.info(
+                    "%s%sNo entities to interact with.%s",
+                    style.BOLD,
+                    fore.cyan,
+                    style.reset,
                 )
+            return
 
-                if config["type"] is int:
-                    new_value = int(round(original_value + change))
-                else:  # float
-                    new_value = original_value + change
-
-                # Apply bounds
-                new_value = max(config["min"], min(config["max"], new_value))
+        interaction_modifier = self._interaction_modifier(num_alive)
+        strength = self.environment_factors["interaction_strength"]
+        if self.world:
+            first, second = self.world.neighbor_pairs(
+                population, alive_rows, MAX_PARTNERS, self.rng
+            )
+            num_interactions = apply_pairs(
+                population,
+                alive_rows,
+                first,
+                second,
+                strength,
+                interaction_modifier,
+                self.backend.pair_damage,
+            )
+        else:
+            num_partners = min(num_alive - 1, MAX_PARTNERS)
+            partners = draw_partners(num_alive, num_partners, self.rng)
+            num_interactions = apply_interactions(
+                population,
+                alive_rows,
+                partners,
+                strength,
+                interaction_modifier,
+                self.backend.pair_damage,
+            )
+        interaction_tracker(num_interactions)
+
+        # Note: Using debug level for frequent interaction logs to avoid overwhelming INFO level output
+        logger.debug(
+            "Time %s: %s interactions between %s entities (modifier %.2f)",
+            self.current_time,
+            num_interactions,
+            num_alive,
+            interaction_modifier,
+        )
 
-                mutated_params[param_name] = new_value
+    def _handle_reproduction(self):
+        """
+        Lets thriving entities have offspring, all in one batch: parents are
+        drawn in one pass, their offspring's mutations are drawn as arrays and
+        the offspring are appended to the population together.
+        """
+        population = self.population
+        candidates = population.eligible_rows()
+        rng = self.rng
+        rolls = rng.random(len(candidates))
+        parents = candidates[
+            rolls < population.column("reproduction_chance")[candidates]
+        ]
+        count = parents.size
+        if not count:
+            return
 
-                mutation_tracker(param_name, original_value, new_value)
+        # Offspring share the parent's genome unless a mutation changes it
+        values, mask = mutate(
+            population.params[MUTABLE_INDEX[:, None], parents].T,
+            rng,
+            self.environment_factors["mutation_rate"],
+            self.environment_factors["mutation_strength"],
+        )
+        genomes = offspring_genomes(population.genomes[parents], values, mask)
+        health = rng.uniform(80, 100, count)
+        energy = rng.uniform(80, 100, count)
+        ids, names = next_ids(count), next_names(count)
+
+        # Parents lose some health after reproduction
+        population.health[parents] -= 3.0
+        start = population.spawn(genomes, health, energy, ids, names)
+        self.total_entities += count
+        birth_tracker(population.ids[parents], ids, names, self.current_time)
+        mutation_tracker(
+            dict(zip(MUTABLE_KEYS, mask.sum(axis=0).tolist(), strict=True)),
+            self.current_time,
+        )
 
-        return mutated_params
+        if self.lineage:
+            self.lineage.record_births(population, parents, start, self.current_time)
+        if self.world:
+            # Offspring start next to their parent
+            self.world.place(
+                population, np.arange(start, len(population)), rng, near=parents
+            )
 
-    def _handle_reproduction(self):
+    def _sweep_status(self):
         """
-        Checks for thriving entities and potentially adds new offspring.
+        Re-updates every status after interactions, tracks the deaths and
+        removes the dead from the population.
         """
-        new_entities = []
-        for entity in self.entities:
-            if (
-                entity.status == "thriving"
-                and entity.age >= entity.parameters["min_reproduction_age"]
-                and random.random() < entity.parameters["reproduction_chance"]
-            ):
-                # Create a new entity with parameters from parent
-                offspring_params = entity.parameters.copy()
-
-                # Apply mutations to offspring parameters
-                offspring_params = self._apply_mutation(offspring_params)
+        population = self.population
+        population.update_status()
+        if entity_logger.isEnabledFor(logging.INFO):
+            for entity in self.entities:
+                if entity.is_alive():
+                    entity_logger.info("%s", entity)
+                else:
+                    death_tracker(entity)
+        else:
+            for entity in population.views(population.rows(DEAD)):
+                death_tracker(entity)
 
-                offspring_params["initial_health"] = random.uniform(80, 100)
-                offspring_params["initial_energy"] = random.uniform(80, 100)
+        # Remove dead entities
+        population.compact()
 
-                new_entity = Entity(offspring_params)
-                new_entities.append(new_entity)
-                self.total_entities += 1
-                entity.health -= 3.0  # Parent loses some health after reproduction
-                birth_tracker(entity, new_entity, self.current_time)
+    def _log_summary(self, alive_count, thriving_count, struggling_count):
+        """
+        Logs the single-line epoch summary used in headless mode.
+        """
+        logger.info(
+            "Epoch %s: Alive=%s, Thriving=%s, Struggling=%s, "
+            "Resources:%.2f, Temp:%.1fC, Pollution:%.2f",
+            self.current_time,
+            alive_count,
+            thriving_count,
+            struggling_count,
+            self.environment_factors["resource_availability"],
+            self.environment_factors["temperature"],
+            self.environment_factors["pollution"],
+        )
 
-        self.entities.extend(new_entities)
+    def _report_epoch(self, alive_count, thriving_count, struggling_count):
+        """
+        Logs the population line (or headless summary) for the current epoch
+        and records its metrics row.
+        """
+        t = self.current_time
+        if not self.headless:
+            back, _, style = colours()
+            logger.info(
+                " %s Population: Alive=%s, Thriving=%s, Struggling=%s%s",
+                back.magenta,
+                alive_count,
+                thriving_count,
+                struggling_count,
+                style.reset,
+            )
+        elif t % self.report_interval == 0 or t == self.total_time_steps - 1:
+            self._log_summary(alive_count, thriving_count, struggling_count)
+        if self.metrics:
+            self.metrics.record(self, alive_count, thriving_count, struggling_count)
+        if self.dashboard:
+            self.dashboard.record(self, alive_count, thriving_count, struggling_count)
 
     def run_simulation(self):
         """
         Runs the simulation for the specified number of Epochs.
         """
+        dashboard = self.dashboard
+        with self._output_settings():
+            if not dashboard:
+                self._run_epochs()
+                return
+
+            set_console_logging(False)
+            dashboard.start()
+            try:
+                self._run_epochs()
+            finally:
+                dashboard.stop(self)
+                set_console_logging(True)
+
+    def _run_epochs(self):
         logger.info("\n--- Starting Terminal Lifeform Sim ---")
-        self.count = 0
+        self.count = self.start_time
+        interactive = not self.headless
+        profiler = self.profiler
+        self.events.check(self)
+        self._start_recording()
+        thriving_count = self.population.count(THRIVING)
+        struggling_count = self.population.count(STRUGGLING)
 
-        for t in tqdm(range(self.total_time_steps), desc="Simm Progress"):
-            print("\n")
+        epochs = range(self.start_time, self.total_time_steps)
+        if interactive:
+            from tqdm import tqdm
+
+            epochs = tqdm(epochs, desc="Simm Progress")
+
+        for t in epochs:
             # Update current Epoch
             self.current_time = t
             self.count += 1
-            logger.info(f"\n--- Epoch {self.current_time} ---")
-            time.sleep(0.25)  # Simulate time passing
-            # Update global environment factors
-            self._update_environment()
+            profiler.begin_epoch(t, len(self.population))
+            if interactive:
+                print("\n")
+                logger.info("\n--- Epoch %s ---", self.current_time)
+                time.sleep(0.25)  # Simulate time passing
 
-            logger.info(
-                f" {Fore.blue}Environment:{Style.reset} {Fore.green} \
-                Resources:{self.environment_factors['resource_availability']:.2f},  "
-                f"Temp:{self.environment_factors['temperature']:.1f}C, \
-                 Pollution:{self.environment_factors['pollution']:.2f} {Style.reset}"
-            )
+            # Update global environment factors
+            with self._phase("environment"):
+                self._update_environment()
+
+            if interactive:
+                with profiler.phase("logging"):
+                    _, fore, style = colours()
+                    logger.info(
+                        " %sEnvironment:%s %s Resources:%.2f, Temp:%.1fC, Pollution:%.2f %s",
+                        fore.blue,
+                        style.reset,
+                        fore.green,
+                        self.environment_factors["resource_availability"],
+                        self.environment_factors["temperature"],
+                        self.environment_factors["pollution"],
+                        style.reset,
+                    )
 
-            if self.count % 10 == 0:
-                time.sleep(0.75)  # Simulate time passing
+                if self.count % 10 == 0:
+                    time.sleep(0.75)  # Simulate time passing
 
-            # Process each entity individually
-            for entity in self.entities:
-                self._process_entity(entity)
+            # Age, feed and heal the whole population in one batched pass
+            with self._phase("processing"):
+                self._process_population()
 
             # Handle interactions between entities
-            self._handle_interactions()
+            with self._phase("interactions"):
+                self._handle_interactions()
 
             # After all processing and interactions, update status and log
-            for entity in self.entities:
-                entity.update_status()  # Re-update status after interactions
-                if entity.is_alive():
-                    logger.info(f"{entity}")
-                else:
-                    death_tracker(entity)
-
-            # Remove dead entities
-            self.entities = [entity for entity in self.entities if entity.is_alive()]
+            with self._phase("status_sweep"):
+                self._sweep_status()
 
             # Handle reproduction
-            self._handle_reproduction()
+            with self._phase("reproduction"):
+                self._handle_reproduction()
 
             # Report current population
-            alive_count = len(self.entities)
-            thriving_count = sum(1 for e in self.entities if e.status == "thriving")
-            struggling_count = sum(1 for e in self.entities if e.status == "struggling")
+            population = self.population
+            alive_count = population.alive_count()
+            thriving_count = population.count(THRIVING)
+            struggling_count = population.count(STRUGGLING)
 
-            logger.info(
-                f" {Back.magenta} Population: Alive={alive_count}, Thriving={thriving_count}, Struggling={struggling_count}{Style.reset}"
-            )
+            with profiler.phase("logging"):
+                self._report_epoch(alive_count, thriving_count, struggling_count)
+            profiler.end_epoch()
 
-            if alive_count == 0:
-                logger.info(
-                    f"{Back.magenta}All entities have died. Simulation ending early.{Style.reset}"
-                )
+            if self._end_epoch(alive_count):
                 break
 
-        logger.info(f"\n--- Simulation Finished at Epoch {self.current_time} ---")
+        logger.info("\n--- Simulation Finished at Epoch %s ---", self.current_time)
 
         update_totals(
-            self.total_entities, len(self.entities), struggling_count, thriving_count
+            self.total_entities,
+            self.population.alive_count(),
+            struggling_count,
+            thriving_count,
         )
+        self._stop_recording()
+        profiler.finish()
+
+    def _start_recording(self):
+        if self.metrics:
+            self.metrics.begin_run()
+        if self.journal:
+            self.journal.begin_run(self)
+        if self.stream:
+            self.stream.begin_run(self)
+
+    def _stop_recording(self):
+        if self.metrics:
+            self.metrics.close()
+        if self.journal:
+            self.journal.close()
+        if self.stream:
+            self.stream.close()
+
+    def _end_epoch(self, alive_count: int) -> bool:
+        """
+        Bookkeeping after the current epoch: peak population, journal,
+        stream and checkpoints. Returns True if the population died out.
+        """
+        t = self.current_time
+        self.peak_population = max(self.peak_population, alive_count)
+        self.start_time = t + 1
+        if self.journal:
+            self.journal.end_epoch(self)
+        if self.stream:
+            self.stream.end_epoch(self)
+        if alive_count == 0:
+            self.extinction_epoch = t
+            back, _, style = colours()
+            logger.info(
+                "%sAll entities have died. Simulation ending early.%s",
+                back.magenta,
+                style.reset,
+            )
+            return True
+
+        if self.checkpoint_interval and self.start_time % self.checkpoint_interval == 0:
+            self.save_checkpoint(os.path.join(self.checkpoint_dir, f"epoch_{t:06d}"))
+        return False
+
+    @contextmanager
+    def _phase(self, name: str):
+        """
+        Times phase `name` of the epoch, and lets the journal record what it
+        changed.
+        """
+        journal = self.journal
+        with self.profiler.phase(name):
+            if journal:
+                journal.before(name, self)
+            yield
+            if journal:
+                journal.after(name, self)
 
 
 if __name__ == "__main__":
-    my_simulation = Simulation(
-        initial_entities=150,
-        time_steps=750,
-        environment_params=sim_env_params,
-    )
-
-    # Add a couple of 'hardy' entities to the mix
-    my_simulation.add_entity(Entity(hardy_entity_params))
-    my_simulation.add_entity(Entity(hardy_entity_params))
-    my_simulation.add_entity(Entity(random_parameters))
-    # my_simulation.add_entity(Entity(random_parameters))
-    my_simulation.add_entity(Entity(max_parameters))
-    # my_simulation.add_entity(Entity(max_parameters))
-
-    # Run the simulation
-    my_simulation.run_simulation()
+    from cli import main
+
+    main()
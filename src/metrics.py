@@ -0,0 +1,144 @@
+import csv
+import os
+import zipfile
+
+import numpy as np
+
+from genome import PARAM_KEYS
+from stats import final_totals
+
+CHUNK_SIZE = 256
+# Environment factors recorded every epoch
+ENVIRONMENT_FIELDS = ("resource_availability", "temperature", "pollution")
+# Per-epoch deltas of these `final_totals` counters
+COUNTER_FIELDS = {
+    "births": "total_births",
+    "deaths": "total_deaths",
+    "mutations": "total_mutations",
+    "events": "total_events",
+    "disasters": "total_disasters",
+    "interactions": "total_interactions",
+}
+
+METRICS_DTYPE = np.dtype(
+    [
+        ("epoch", np.int64),
+        ("alive", np.int64),
+        ("thriving", np.int64),
+        ("struggling", np.int64),
+        *((name, np.int64) for name in COUNTER_FIELDS),
+        *((name, np.float64) for name in ENVIRONMENT_FIELDS),
+        *((f"{key}_mean", np.float64) for key in PARAM_KEYS),
+        *((f"{key}_var", np.float64) for key in PARAM_KEYS),
+    ]
+)
+
+
+class MetricsRecorder:
+    """
+    Streams one row of metrics per epoch to `<prefix>.csv` and `<prefix>.npz`.
+
+    Rows collect in a fixed-size buffer that is flushed every `chunk_size`
+    epochs: appended to the CSV, and added to the npz archive as its own
+    `chunk_NNNNN` structured array. Memory use stays constant however long the
+    run is. `load_metrics` reads the archive back as one array.
+    """
+
+    def __init__(self, prefix: str, chunk_size: int = CHUNK_SIZE, append=False):
+        """
+        Args:
+            prefix: Output path without extension.
+            append: Continue existing files, e.g. for a resumed run, instead
+                of starting new ones.
+        """
+        self.csv_path = f"{prefix}.csv"
+        self.npz_path = f"{prefix}.npz"
+        self._buffer = np.zeros(chunk_size, dtype=METRICS_DTYPE)
+        self._rows = 0
+        self._chunks = 0
+        self._previous = dict.fromkeys(COUNTER_FIELDS, 0)
+
+        directory = os.path.dirname(self.csv_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if append and os.path.exists(self.npz_path):
+            with zipfile.ZipFile(self.npz_path) as archive:
+                self._chunks = len(archive.namelist())
+        else:
+            for path in (self.csv_path, self.npz_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        if not os.path.exists(self.csv_path):
+            with open(self.csv_path, "w", newline="") as f:
+                csv.writer(f).writerow(METRICS_DTYPE.names)
+
+    def begin_run(self):
+        """
+        Takes the current totals as the starting point for the per-epoch
+        counts, so a resumed run's first row only counts its own epoch.
+        """
+        for name, total in COUNTER_FIELDS.items():
+            self._previous[name] = final_totals[total]
+
+    def record(self, simulation, alive: int, thriving: int, struggling: int):
+        """
+        Buffers the metrics row for the simulation's current epoch.
+        """
+        row = self._buffer[self._rows]
+        row["epoch"] = simulation.current_time
+        row["alive"] = alive
+        row["thriving"] = thriving
+        row["struggling"] = struggling
+
+        for name, total in COUNTER_FIELDS.items():
+            value = final_totals[total]
+            row[name] = value - self._previous[name]
+            self._previous[name] = value
+
+        for name in ENVIRONMENT_FIELDS:
+            row[name] = simulation.environment_factors[name]
+
+        population = simulation.population
+        n = len(population)
+        params = population.params[:, :n]
+        means = params.mean(axis=1) if n else np.full(len(PARAM_KEYS), np.nan)
+        variances = params.var(axis=1) if n else np.full(len(PARAM_KEYS), np.nan)
+        for i, key in enumerate(PARAM_KEYS):
+            row[f"{key}_mean"] = means[i]
+            row[f"{key}_var"] = variances[i]
+
+        self._rows += 1
+        if self._rows == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows to both files and empties the buffer.
+        """
+        if not self._rows:
+            return
+        chunk = self._buffer[: self._rows]
+        with open(self.csv_path, "a", newline="") as f:
+            csv.writer(f).writerows(chunk.tolist())
+        with (
+            zipfile.ZipFile(self.npz_path, "a") as archive,
+            archive.open(f"chunk_{self._chunks:05d}.npy", "w") as f,
+        ):
+            np.lib.format.write_array(f, chunk)
+        self._chunks += 1
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+
+
+def load_metrics(path: str) -> np.ndarray:
+    """
+    Reads an npz metrics archive back as a single structured array, one
+    record per epoch.
+    """
+    with np.load(path) as archive:
+        chunks = [archive[name] for name in sorted(archive.files)]
+    if not chunks:
+        return np.zeros(0, dtype=METRICS_DTYPE)
+    return np.concatenate(chunks)
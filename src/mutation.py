@@ -0,0 +1,57 @@
+import numpy as np
+
+from genome import PARAM_KEYS
+
+# Parameters offspring can mutate, with their bounds and types
+MUTABLE_PARAMETERS = {
+    "max_age": {"min": 50, "max": 200, "type": int},
+    "metabolism_rate": {"min": 0.1, "max": 1.0, "type": float},
+    "resilience": {"min": 0.0, "max": 1.0, "type": float},
+    "reproduction_chance": {"min": 0.01, "max": 0.15, "type": float},
+    "aggression": {"min": 0.0, "max": 1.0, "type": float},
+}
+
+# The same table as arrays, built once: one entry per mutable parameter
+MUTABLE_KEYS = tuple(MUTABLE_PARAMETERS)
+MUTABLE_INDEX = np.array([PARAM_KEYS.index(key) for key in MUTABLE_KEYS])
+LOWER = np.array([config["min"] for config in MUTABLE_PARAMETERS.values()], float)
+UPPER = np.array([config["max"] for config in MUTABLE_PARAMETERS.values()], float)
+INTEGER = np.array([config["type"] is int for config in MUTABLE_PARAMETERS.values()])
+
+
+def mutate(
+    values: np.ndarray, rng: np.random.Generator, rate: float, strength: float
+) -> tuple:
+    """
+    Mutates the `MUTABLE_KEYS` values of a batch of offspring at once.
+
+    `values` has one row per offspring and one column per mutable parameter,
+    holding the parent's values. Each value mutates with probability `rate`,
+    by a random fraction of itself up to `strength` either way; integer
+    parameters are rounded, then everything is clamped to its bounds. Returns
+    the new values and the mask of the ones that mutated.
+    """
+    mask = rng.random(values.shape) < rate
+    change = values * rng.uniform(-strength, strength, values.shape)
+    mutated = values + change
+    mutated = np.where(INTEGER, np.round(mutated), mutated)
+    mutated = np.clip(mutated, LOWER, UPPER)
+    return np.where(mask, mutated, values), mask
+
+
+def offspring_genomes(genomes: np.ndarray, values: np.ndarray, mask: np.ndarray):
+    """
+    Returns each offspring's genome: its parent's, from `genomes`, with the
+    masked `values` applied. Offspring without a mutation share the parent's
+    genome object, and only the mutated ones go through interning.
+    """
+    genomes = genomes.copy()
+    for row in np.flatnonzero(mask.any(axis=1)).tolist():
+        changes = {}
+        for column in np.flatnonzero(mask[row]).tolist():
+            value = values[row, column]
+            changes[MUTABLE_KEYS[column]] = (
+                int(value) if INTEGER[column] else float(value)
+            )
+        genomes[row] = genomes[row].replace(changes)
+    return genomes
@@ -1,5 +1,6 @@
 # filepath: /home/jtk/Dev/TerminalLifeform/src/params.py
-import random
+# A simulation draws its predator_chance from this range when it isn't set
+PREDATOR_CHANCE_RANGE = (0.1, 0.3)
 
 default_environment_factors = {
     "resource_availability": 1.0,  # 0.0 (scarce) to 1.0 (abundant)
@@ -9,7 +10,7 @@ default_environment_factors = {
     "interaction_strength": 0.5,  # Base strength of entity interactions
     "mutation_rate": 0.11,  # Probability of a parameter mutating (0.0 to 1.0)
     "mutation_strength": 0.03,  # Max percentage change for a mutation (e.g., 0.05 = 5%)
-    "predator_chance": random.uniform(0.1, 0.3),  # Chance of a predator event
+    "predator_chance": None,  # Chance of a predator event, drawn per simulation
     "predator_threshold": 250,  # Population threshold to trigger predator event
     "predator_impact_percentage": 0.13,  # Percentage of population removed by predator
 }
@@ -54,14 +55,20 @@ hardy_entity_params = {
     "aggression": 0.3,
 }
 
-random_parameters = {
-    "max_age": random.randint(55, 135),
-    "metabolism_rate": random.uniform(0.1, 1.0),
-    "foraging_efficiency": random.uniform(0.35, 1.0),
-    "resilience": random.uniform(0.0, 1.0),
-    "reproduction_chance": random.uniform(0.05, 0.3),
-    "aggression": random.uniform(0.0, 1.0),
-}
+
+def random_parameters(rng) -> dict:
+    """
+    Random founder parameters, drawn from a simulation's generator.
+    """
+    return {
+        "max_age": int(rng.integers(55, 136)),
+        "metabolism_rate": rng.uniform(0.1, 1.0),
+        "foraging_efficiency": rng.uniform(0.35, 1.0),
+        "resilience": rng.uniform(0.0, 1.0),
+        "reproduction_chance": rng.uniform(0.05, 0.3),
+        "aggression": rng.uniform(0.0, 1.0),
+    }
+
 
 max_parameters = {
     "max_age": 135,
@@ -0,0 +1,452 @@
+import numpy as np
+
+from entity import STATUS_CODES, STATUS_NAMES, Entity
+from genome import PARAM_KEYS, Genome
+
+# Every entity parameter gets its own contiguous column, in genome vector order
+PARAM_INDEX = {key: index for index, key in enumerate(PARAM_KEYS)}
+
+DEAD = STATUS_CODES["dead"]
+ALIVE = STATUS_CODES["alive"]
+THRIVING = STATUS_CODES["thriving"]
+STRUGGLING = STATUS_CODES["struggling"]
+
+
+def classify(age, health, energy, column) -> tuple:
+    """
+    Batched `Entity.update_status` rules. `column(key)` returns the parameter
+    column for the same rows. Returns the new status codes and the dead mask.
+    """
+    dead = (health <= 0) | (age >= column("max_age"))
+    thriving = (health >= column("thriving_threshold_health")) & (
+        energy >= column("thriving_threshold_energy")
+    )
+    struggling = (health <= column("struggling_threshold_health")) | (
+        energy <= column("struggling_threshold_energy")
+    )
+    codes = np.select([dead, thriving, struggling], [DEAD, THRIVING, STRUGGLING], ALIVE)
+    return codes.astype(np.int8), dead
+
+
+class Population:
+    """
+    Struct-of-arrays store for every entity in a simulation.
+
+    Age, health, energy, status and each entry of `entity_params` live in their
+    own NumPy column so the per-epoch rules can run over the whole population
+    at once. The `genomes` column keeps a reference to each row's shared
+    `Genome`; the parameter columns are filled from it. Rows are appended in
+    creation order and `compact` keeps that order, so the `uid` column is
+    always sorted.
+
+    Per-status counts are kept up to date as statuses change, and the row
+    indexes by status (`rows`, `alive_rows`, `eligible_rows`) are built at
+    most once between changes, however many phases of an epoch read them.
+
+    Attributes:
+        size (int): Number of rows in use.
+        generation (int): Bumped every time `compact` moves rows around.
+        status_counts (np.ndarray): Number of rows with each status code.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.generation = 0
+        self._next_uid = 0
+        self.status_counts = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+        self._index = {}
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int):
+        self.uid = np.zeros(capacity, dtype=np.int64)
+        self.ids = np.empty(capacity, dtype=object)
+        self.names = np.empty(capacity, dtype=object)
+        self.genomes = np.empty(capacity, dtype=object)
+        self.age_col = np.zeros(capacity, dtype=np.int64)
+        self.health_col = np.zeros(capacity, dtype=np.float64)
+        self.energy_col = np.zeros(capacity, dtype=np.float64)
+        self.status_col = np.zeros(capacity, dtype=np.int8)
+        self.params = np.zeros((len(PARAM_KEYS), capacity), dtype=np.float64)
+        # x, y in a spatial world; NaN until the world places the row
+        self.position = np.full((2, capacity), np.nan)
+
+    def _grow(self, needed: int):
+        capacity = len(self.uid)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = (
+            self.uid,
+            self.ids,
+            self.names,
+            self.genomes,
+            self.age_col,
+            self.health_col,
+            self.energy_col,
+            self.status_col,
+            self.params,
+            self.position,
+        )
+        self._allocate(capacity)
+        n = self.size
+        self.uid[:n] = old[0][:n]
+        self.ids[:n] = old[1][:n]
+        self.names[:n] = old[2][:n]
+        self.genomes[:n] = old[3][:n]
+        self.age_col[:n] = old[4][:n]
+        self.health_col[:n] = old[5][:n]
+        self.energy_col[:n] = old[6][:n]
+        self.status_col[:n] = old[7][:n]
+        self.params[:, :n] = old[8][:, :n]
+        self.position[:, :n] = old[9][:, :n]
+
+    def __len__(self) -> int:
+        return self.size
+
+    # Live slices of the columns, limited to the rows in use
+    @property
+    def age(self) -> np.ndarray:
+        return self.age_col[: self.size]
+
+    @property
+    def health(self) -> np.ndarray:
+        return self.health_col[: self.size]
+
+    @property
+    def energy(self) -> np.ndarray:
+        return self.energy_col[: self.size]
+
+    @property
+    def status(self) -> np.ndarray:
+        return self.status_col[: self.size]
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.position[:, : self.size]
+
+    def column(self, key: str) -> np.ndarray:
+        """
+        Returns the live column for the entity parameter `key`.
+        """
+        return self.params[PARAM_INDEX[key], : self.size]
+
+    def add(self, entity: Entity) -> int:
+        """
+        Copies a detached entity into a new row and returns the row index.
+        """
+        return self.extend([entity])
+
+    def extend(self, entities: list) -> int:
+        """
+        Copies detached entities into new rows in one pass. Returns the index of
+        the first new row.
+        """
+        start = self.size
+        count = len(entities)
+        self._grow(start + count)
+        end = start + count
+        self.uid[start:end] = np.arange(self._next_uid, self._next_uid + count)
+        self._next_uid += count
+
+        for row, entity in enumerate(entities, start):
+            genome = entity.parameters
+            self.ids[row] = entity.id
+            self.names[row] = entity.name
+            self.genomes[row] = genome
+            self.age_col[row] = entity.age
+            self.health_col[row] = entity.health
+            self.energy_col[row] = entity.energy
+            self.status_col[row] = STATUS_CODES[entity.status]
+            self.params[:, row] = genome.vector
+
+        self.size = end
+        self._added(start, end)
+        return start
+
+    def spawn(self, genomes: np.ndarray, health, energy, ids, names) -> int:
+        """
+        Appends newborn rows in bulk, age 0 and alive, one per entry of the
+        object array `genomes`. Returns the index of the first new row.
+        """
+        start = self.size
+        count = len(genomes)
+        self._grow(start + count)
+        end = start + count
+        self.uid[start:end] = np.arange(self._next_uid, self._next_uid + count)
+        self._next_uid += count
+
+        self.ids[start:end] = ids
+        self.names[start:end] = names
+        self.genomes[start:end] = genomes
+        self.age_col[start:end] = 0
+        self.health_col[start:end] = health
+        self.energy_col[start:end] = energy
+        self.status_col[start:end] = ALIVE
+        if count:
+            self.params[:, start:end] = np.stack([g.vector for g in genomes], axis=1)
+
+        self.size = end
+        self._added(start, end)
+        return start
+
+    def load_columns(
+        self,
+        uid,
+        ids,
+        names,
+        genomes,
+        age,
+        health,
+        energy,
+        status,
+        next_uid: int,
+        generation: int = 0,
+        params=None,
+        position=None,
+    ):
+        """
+        Replaces the whole population with the given columns, e.g. when
+        restoring a checkpoint. Any array-like works, including memory-mapped
+        arrays; the values are copied into freshly allocated columns. The
+        parameter columns are built from `genomes` unless `params` is given.
+        Positions stay unplaced (NaN) unless `position` is given.
+        """
+        n = len(uid)
+        self._allocate(max(1, n))
+        self.uid[:n] = uid
+        self.ids[:n] = ids
+        self.names[:n] = names
+        self.genomes[:n] = genomes
+        self.age_col[:n] = age
+        self.health_col[:n] = health
+        self.energy_col[:n] = energy
+        self.status_col[:n] = status
+        if params is not None:
+            self.params[:, :n] = params
+        elif n:
+            self.params[:, :n] = np.stack([genome.vector for genome in genomes], axis=1)
+        if position is not None:
+            self.position[:, :n] = position
+        self.size = n
+        self._next_uid = next_uid
+        self.generation = generation
+        self.recount()
+
+    def view(self, row: int) -> Entity:
+        return Entity.view(self, row)
+
+    def views(self, rows=None) -> list:
+        """
+        Returns entity views for `rows`, or for every row when `rows` is None.
+        """
+        if rows is None:
+            rows = range(self.size)
+        return [Entity.view(self, int(row)) for row in rows]
+
+    def find(self, uid: int) -> int:
+        """
+        Returns the row currently holding `uid`.
+        """
+        row = int(np.searchsorted(self.uid[: self.size], uid))
+        if row >= self.size or self.uid[row] != uid:
+            raise LookupError(f"Entity {uid} is no longer in the population")
+        return row
+
+    def get_field(self, row: int, field: str):
+        if field == "age":
+            return int(self.age_col[row])
+        if field == "health":
+            return float(self.health_col[row])
+        if field == "energy":
+            return float(self.energy_col[row])
+        if field == "status":
+            return STATUS_NAMES[self.status_col[row]]
+        if field == "id":
+            return self.ids[row]
+        if field == "name":
+            return self.names[row]
+        if field == "parameters":
+            return self.genomes[row]
+        raise AttributeError(field)
+
+    def set_field(self, row: int, field: str, value):
+        if field == "age":
+            self.age_col[row] = value
+            self._index.pop("eligible", None)
+        elif field == "health":
+            self.health_col[row] = value
+        elif field == "energy":
+            self.energy_col[row] = value
+        elif field == "status":
+            self._set_status(row, STATUS_CODES[value])
+        elif field == "id":
+            self.ids[row] = value
+        elif field == "name":
+            self.names[row] = value
+        elif field == "parameters":
+            self.set_genome(row, value)
+        else:
+            raise AttributeError(field)
+
+    def set_genome(self, row: int, genome: Genome):
+        self.genomes[row] = genome
+        self.params[:, row] = genome.vector
+
+    def alive_mask(self) -> np.ndarray:
+        return self.status != DEAD
+
+    def count(self, status: int) -> int:
+        return int(self.status_counts[status])
+
+    def alive_count(self) -> int:
+        return self.size - int(self.status_counts[DEAD])
+
+    def rows(self, status: int) -> np.ndarray:
+        """
+        Rows with `status`, in row order.
+        """
+        rows = self._index.get(status)
+        if rows is None:
+            if self.status_counts[status] == 0:
+                rows = np.empty(0, dtype=np.intp)
+            elif self.status_counts[status] == self.size:
+                rows = np.arange(self.size)
+            else:
+                rows = np.flatnonzero(self.status == status)
+            self._index[status] = rows
+        return rows
+
+    def alive_rows(self) -> np.ndarray:
+        """
+        Rows that are not dead, in row order.
+        """
+        rows = self._index.get("alive")
+        if rows is None:
+            if self.status_counts[DEAD] == 0:
+                rows = np.arange(self.size)
+            else:
+                rows = np.flatnonzero(self.alive_mask())
+            self._index["alive"] = rows
+        return rows
+
+    def eligible_rows(self) -> np.ndarray:
+        """
+        Thriving rows old enough to reproduce.
+        """
+        rows = self._index.get("eligible")
+        if rows is None:
+            thriving = self.rows(THRIVING)
+            min_age = self.params[PARAM_INDEX["min_reproduction_age"], thriving]
+            rows = thriving[self.age_col[thriving] >= min_age]
+            self._index["eligible"] = rows
+        return rows
+
+    def _set_status(self, row: int, code: int):
+        old = self.status_col[row]
+        if old == code:
+            return
+        self.status_col[row] = code
+        self.status_counts[old] -= 1
+        self.status_counts[code] += 1
+        self._index.clear()
+
+    def _added(self, start: int, end: int):
+        """
+        Brings the counts and any built indexes up to date with the new rows
+        `start:end`, at a cost that depends only on how many were added.
+        """
+        codes = self.status_col[start:end]
+        added = np.bincount(codes, minlength=len(STATUS_NAMES))
+        self.status_counts += added
+        new_rows = np.arange(start, end)
+        for key, rows in list(self._index.items()):
+            if key == "alive":
+                extra = new_rows[codes != DEAD]
+            elif key == "eligible":
+                thriving = new_rows[codes == THRIVING]
+                min_age = self.params[PARAM_INDEX["min_reproduction_age"], thriving]
+                extra = thriving[self.age_col[thriving] >= min_age]
+            else:
+                extra = new_rows[codes == key]
+            if extra.size:
+                self._index[key] = np.concatenate([rows, extra])
+
+    def update_status(self, classified: tuple = None):
+        """
+        Batched `Entity.update_status` over every row. `classified` is the
+        (codes, dead) pair of `classify` when a backend has already worked it
+        out.
+        """
+        health, energy = self.health, self.energy
+        if classified is None:
+            classified = classify(self.age, health, energy, self.column)
+        new, dead = classified
+
+        status = self.status
+        changed = np.flatnonzero(status != new)
+        # Ages moved, so eligibility is stale even if no status changed
+        self._index.pop("eligible", None)
+        if changed.size:
+            minlength = len(STATUS_NAMES)
+            self.status_counts -= np.bincount(status[changed], minlength=minlength)
+            self.status_counts += np.bincount(new[changed], minlength=minlength)
+            status[changed] = new[changed]
+            self._index.clear()
+        health[dead] = 0.0
+        energy[dead] = 0.0
+
+    def kill(self, rows: np.ndarray):
+        """
+        Marks `rows` dead at once, as `Entity.update_status` would after their
+        health dropped to zero.
+        """
+        rows = np.unique(rows)
+        status = self.status
+        self.status_counts -= np.bincount(status[rows], minlength=len(STATUS_NAMES))
+        self.status_counts[DEAD] += rows.size
+        status[rows] = DEAD
+        self.health[rows] = 0.0
+        self.energy[rows] = 0.0
+        self._index.clear()
+
+    def recount(self):
+        """
+        Rebuilds the status counts and drops the row indexes, after the status
+        column was written behind the population's back, e.g. by shard workers.
+        """
+        self.status_counts[:] = np.bincount(self.status, minlength=len(STATUS_NAMES))
+        self._index.clear()
+
+    def compact(self) -> np.ndarray:
+        """
+        Drops dead rows, keeping the remaining rows in order. Returns the
+        removed rows' indices as they were before compaction.
+        """
+        if self.status_counts[DEAD] == 0:
+            return np.empty(0, dtype=np.intp)
+
+        removed = self.rows(DEAD)
+        keep = self.alive_rows()
+        n = keep.size
+        self.uid[:n] = self.uid[keep]
+        self.ids[:n] = self.ids[keep]
+        self.names[:n] = self.names[keep]
+        self.genomes[:n] = self.genomes[keep]
+        self.age_col[:n] = self.age_col[keep]
+        self.health_col[:n] = self.health_col[keep]
+        self.energy_col[:n] = self.energy_col[keep]
+        self.status_col[:n] = self.status_col[keep]
+        self.params[:, :n] = self.params[:, keep]
+        self.position[:, :n] = self.position[:, keep]
+        self.position[:, n : self.size] = np.nan
+        self.ids[n : self.size] = None
+        self.names[n : self.size] = None
+        self.genomes[n : self.size] = None
+
+        self.size = n
+        self.generation += 1
+        self.status_counts[DEAD] = 0
+        # Every surviving row moved, so rebuild the indexes on next use
+        self._index.clear()
+        return removed
@@ -0,0 +1,185 @@
+import csv
+import io
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Phases of one `run_simulation` epoch, in the order they run
+PHASES = (
+    "environment",
+    "processing",
+    "interactions",
+    "status_sweep",
+    "reproduction",
+    "logging",
+)
+REPORT_TOP_FUNCTIONS = 15
+
+
+class NullProfiler:
+    """
+    Stands in for a `Profiler` when profiling is off. Every hook is a no-op,
+    so the epoch loop pays a few method calls per epoch and nothing else.
+    """
+
+    _disabled = nullcontext()
+
+    def begin_epoch(self, epoch: int, entities: int):
+        pass
+
+    def phase(self, name: str):
+        return self._disabled
+
+    def end_epoch(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+class Profiler:
+    """
+    Records wall time and call counts per phase of the epoch loop, entities
+    processed and net memory blocks allocated per epoch.
+
+    Optionally attaches cProfile and tracemalloc for the epochs in `window`,
+    a (start, stop) pair like `range`, so the expensive tools only run over
+    the part of a run under investigation.
+    """
+
+    def __init__(self, window: tuple = None, profile_path: str = None):
+        """
+        Args:
+            window: Epochs [start, stop) to run cProfile and tracemalloc for.
+            profile_path: Where to dump the window's cProfile stats, for
+                `python -m pstats` or snakeviz. Not written if None.
+        """
+        self.window = window
+        self.profile_path = profile_path
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.series = []
+        self.profile_stats = None
+        self.top_allocations = None
+        self._epoch = None
+        self._blocks = 0
+        self._cprofile = None
+
+    def begin_epoch(self, epoch: int, entities: int):
+        """
+        Opens the record for `epoch`, which starts with `entities` alive.
+        """
+        if self.window and self._cprofile is None and self.profile_stats is None:
+            start, stop = self.window
+            if start <= epoch < stop:
+                self._start_window()
+        self._epoch = {"epoch": epoch, "entities": entities}
+        self._epoch.update(dict.fromkeys(PHASES, 0.0))
+        self._blocks = sys.getallocatedblocks()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Times the enclosed block as one call of phase `name`.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds[name] += elapsed
+            self.calls[name] += 1
+            if self._epoch is not None:
+                self._epoch[name] += elapsed
+
+    def end_epoch(self):
+        """
+        Closes the current epoch's record and appends it to `series`.
+        """
+        record = self._epoch
+        record["allocated_blocks"] = sys.getallocatedblocks() - self._blocks
+        if self._cprofile is not None:
+            record["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.series.append(record)
+        self._epoch = None
+        if self._cprofile is not None and record["epoch"] >= self.window[1] - 1:
+            self._stop_window()
+
+    def finish(self):
+        """
+        Closes the profiling window if the run ended inside it, then logs the
+        report.
+        """
+        if self._cprofile is not None:
+            self._stop_window()
+        self.report()
+
+    def _start_window(self):
+        # cProfile and pstats load only for runs that open a window
+        import cProfile
+
+        tracemalloc.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def _stop_window(self):
+        import pstats
+
+        self._cprofile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.top_allocations = snapshot.statistics("lineno")[:REPORT_TOP_FUNCTIONS]
+        self.profile_stats = pstats.Stats(self._cprofile)
+        if self.profile_path:
+            self.profile_stats.dump_stats(self.profile_path)
+        self._cprofile = None
+
+    def report(self):
+        """
+        Logs the end-of-run table of time per phase, plus the cProfile and
+        tracemalloc top entries if a window was profiled.
+        """
+        total = sum(self.seconds.values()) or 1.0
+        lines = ["\n--- Profile ---", f"{'phase':<14}{'seconds':>10}{'calls':>8}"]
+        lines[-1] += f"{'ms/call':>10}{'share':>8}"
+        for name in PHASES:
+            seconds, calls = self.seconds[name], self.calls[name]
+            per_call = seconds / calls * 1000 if calls else 0.0
+            lines.append(
+                f"{name:<14}{seconds:>10.3f}{calls:>8}"
+                f"{per_call:>10.3f}{seconds / total:>8.1%}"
+            )
+        epochs = len(self.series)
+        processed = sum(record["entities"] for record in self.series)
+        lines.append(f"{epochs} epochs, {processed} entity updates")
+
+        if self.profile_stats is not None:
+            out = io.StringIO()
+            self.profile_stats.stream = out
+            self.profile_stats.sort_stats("cumulative").print_stats(
+                REPORT_TOP_FUNCTIONS
+            )
+            lines.append(f"cProfile, epochs {self.window[0]}-{self.window[1] - 1}:")
+            lines.append(out.getvalue())
+            lines.append("Top allocations:")
+            lines.extend(str(stat) for stat in self.top_allocations)
+
+        logger.info("\n".join(lines))
+
+    def write_series(self, path: str):
+        """
+        Writes the per-epoch records to a CSV file.
+        """
+        fields = ["epoch", "entities", *PHASES, "allocated_blocks"]
+        if any("traced_peak_bytes" in record for record in self.series):
+            fields.append("traced_peak_bytes")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.series)
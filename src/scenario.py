@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+
+from params import (
+    default_environment_factors,
+    entity_params,
+    hardy_entity_params,
+    max_parameters,
+    sim_env_params,
+)
+
+# Bumped whenever validation changes, so stale cached scenarios are ignored
+SCENARIO_FORMAT = 1
+CACHE_DIR = "__pycache__"
+
+# Founder presets; "random" draws new parameters from the simulation's generator
+FOUNDER_PRESETS = {
+    "hardy": hardy_entity_params,
+    "max": max_parameters,
+    "random": None,
+}
+
+# Output options and their types; the CLI's flags of the same name override them
+OUTPUT_OPTIONS = {
+    "headless": bool,
+    "report_interval": int,
+    "names": bool,
+    "checkpoint_interval": int,
+    "checkpoint_dir": str,
+    "metrics": str,
+    "journal": str,
+    "keyframe_interval": int,
+    "stream": str,
+    "lineage": bool,
+    "dashboard": bool,
+    "world": str,
+    "backend": str,
+}
+
+# The run `python src/main.py` makes without a scenario file
+DEFAULT_SCENARIO = {
+    "seed": None,
+    "initial_entities": 150,
+    "time_steps": 750,
+    "environment": dict(sim_env_params),
+    "founders": [
+        {"preset": "hardy", "count": 2},
+        {"preset": "random", "count": 1},
+        {"preset": "max", "count": 1},
+    ],
+    "events": [],
+    "schedule": None,
+    "output": {},
+}
+
+# Scenarios parsed in this process, by content digest
+_parsed = {}
+
+
+def _number(value) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _check_table(table, name: str, source: str) -> dict:
+    if not isinstance(table, dict):
+        raise ValueError(f"{source}: {name} must be a table")
+    return table
+
+
+def _check_founder(founder, source: str) -> dict:
+    founder = _check_table(founder, "each founder", source)
+    unknown = set(founder) - {"preset", "parameters", "count"}
+    if unknown:
+        raise ValueError(f"{source}: unknown founder keys {sorted(unknown)}")
+    if ("preset" in founder) == ("parameters" in founder):
+        raise ValueError(f"{source}: a founder needs either a preset or parameters")
+    if "preset" in founder and founder["preset"] not in FOUNDER_PRESETS:
+        raise ValueError(f"{source}: unknown founder preset {founder['preset']}")
+    parameters = _check_table(founder.get("parameters", {}), "parameters", source)
+    for key, value in parameters.items():
+        if key not in entity_params or not _number(value):
+            raise ValueError(f"{source}: bad founder parameter {key} = {value!r}")
+    count = founder.get("count", 1)
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        raise ValueError(f"{source}: founder count must be a positive integer")
+    return {**founder, "count": count}
+
+
+def _check_events(entries, source: str):
+    # Scheduling every entry on a throwaway engine runs the events' own checks
+    from events import EventEngine
+
+    try:
+        EventEngine().load_scenario(entries)
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"{source}: bad event entry ({error})") from error
+    except ValueError as error:
+        raise ValueError(f"{source}: {error}") from error
+
+
+def _check_output(output, source: str):
+    output = _check_table(output, "output", source)
+    for key, value in output.items():
+        kind = OUTPUT_OPTIONS.get(key)
+        if kind is None:
+            raise ValueError(f"{source}: unknown output option {key}")
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise ValueError(f"{source}: output {key} must be a {kind.__name__}")
+
+
+def validate(raw: dict, source: str = "scenario") -> dict:
+    """
+    Checks a parsed scenario file and returns the full scenario: the file's
+    top-level entries over `DEFAULT_SCENARIO`, with its environment factors
+    over the default ones. Raises ValueError, naming `source`, at the first
+    problem, so a bad file fails before anything runs.
+    """
+    raw = _check_table(raw, "a scenario", source)
+    unknown = set(raw) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"{source}: unknown keys {sorted(unknown)}")
+    scenario = {**DEFAULT_SCENARIO, **raw}
+    # Tables override the default run's entries one by one
+    environment = _check_table(raw.get("environment", {}), "environment", source)
+    scenario["environment"] = {**DEFAULT_SCENARIO["environment"], **environment}
+
+    seed = scenario["seed"]
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        raise ValueError(f"{source}: seed must be a non-negative integer")
+    for key in ("initial_entities", "time_steps"):
+        if not isinstance(scenario[key], int) or scenario[key] < 0:
+            raise ValueError(f"{source}: {key} must be a non-negative integer")
+
+    for key, value in environment.items():
+        if key not in default_environment_factors or not _number(value):
+            raise ValueError(f"{source}: bad environment entry {key} = {value!r}")
+
+    if not isinstance(scenario["founders"], list):
+        raise ValueError(f"{source}: founders must be a list")
+    scenario["founders"] = [_check_founder(f, source) for f in scenario["founders"]]
+    _check_events(scenario["events"], source)
+    if scenario["schedule"] is not None and not isinstance(scenario["schedule"], str):
+        raise ValueError(f"{source}: schedule must be the path of a saved table")
+    _check_output(scenario["output"], source)
+    return scenario
+
+
+def _defaults_digest() -> bytes:
+    """
+    Digest of everything validation fills in or checks against, so cached
+    scenarios go stale when a default changes.
+    """
+    defaults = (
+        DEFAULT_SCENARIO,
+        FOUNDER_PRESETS,
+        entity_params,
+        default_environment_factors,
+        {key: kind.__name__ for key, kind in OUTPUT_OPTIONS.items()},
+    )
+    return hashlib.sha1(json.dumps(defaults, sort_keys=True).encode()).digest()
+
+
+def _with_paths(scenario: dict, path: str) -> dict:
+    # A relative schedule path is relative to the scenario file
+    schedule = scenario["schedule"]
+    if schedule is None or os.path.isabs(schedule):
+        return scenario
+    return {**scenario, "schedule": os.path.join(os.path.dirname(path), schedule)}
+
+
+def _cache_path(path: str, digest: str) -> str:
+    name = os.path.basename(path)
+    directory = os.path.join(os.path.dirname(path), CACHE_DIR)
+    return os.path.join(directory, f"{name}.{digest}.v{SCENARIO_FORMAT}.json")
+
+
+def load_scenario(path: str) -> dict:
+    """
+    Reads, validates and returns the TOML or JSON scenario at `path`.
+
+    The validated scenario is cached by the file's contents and the defaults
+    it was validated against, in this process and as JSON in a `__pycache__`
+    directory next to the file. Later loads of the unchanged file, e.g. by
+    every run of a sweep, skip parsing and validation, and never import the
+    TOML parser. A relative `schedule` is taken relative to the file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data + _defaults_digest()).hexdigest()[:16]
+    scenario = _parsed.get(digest)
+    if scenario is not None:
+        return _with_paths(scenario, path)
+
+    cache = _cache_path(path, digest)
+    try:
+        with open(cache) as f:
+            scenario = json.load(f)
+    except (OSError, ValueError):
+        if path.endswith(".toml"):
+            import tomllib
+
+            raw = tomllib.loads(data.decode())
+        else:
+            raw = json.loads(data)
+        scenario = validate(raw, path)
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            partial = f"{cache}.{os.getpid()}"
+            with open(partial, "w") as f:
+                json.dump(scenario, f)
+            os.replace(partial, cache)
+        except OSError:
+            pass  # Read-only location: parse again next time
+
+    _parsed[digest] = scenario
+    return _with_paths(scenario, path)
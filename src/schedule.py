@@ -0,0 +1,236 @@
+import numpy as np
+
+
+class Curve:
+    """
+    A value per epoch over a run of `total` epochs, computed for the whole run
+    at once by `values`.
+
+    Curves compose: `a + b`, `a * b` (with curves or numbers) and
+    `a.clip(low, high)` give new curves.
+    """
+
+    def values(self, total: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return Combined(np.add, self, other)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        return Combined(np.multiply, self, other)
+
+    __rmul__ = __mul__
+
+    def clip(self, low: float = None, high: float = None) -> "Curve":
+        return Clipped(self, low, high)
+
+
+def as_curve(value) -> Curve:
+    return value if isinstance(value, Curve) else Constant(value)
+
+
+class Constant(Curve):
+    def __init__(self, value: float):
+        self.value = value
+
+    def values(self, total):
+        return np.full(total, float(self.value))
+
+
+class Linear(Curve):
+    """
+    Goes from `start` at the first epoch towards `end` at the end of the run.
+    """
+
+    def __init__(self, start: float, end: float):
+        self.start = start
+        self.end = end
+
+    def values(self, total):
+        return self.start + (self.end - self.start) * (np.arange(total) / total)
+
+
+class Seasonal(Curve):
+    """
+    A sine wave around `mean`, repeating every `period` epochs. `phase` is
+    the fraction of a period the wave starts at.
+    """
+
+    def __init__(
+        self, amplitude: float, period: float, mean: float = 0.0, phase: float = 0.0
+    ):
+        self.amplitude = amplitude
+        self.period = period
+        self.mean = mean
+        self.phase = phase
+
+    def values(self, total):
+        cycles = np.arange(total) / self.period + self.phase
+        return self.mean + self.amplitude * np.sin(2 * np.pi * cycles)
+
+
+class Step(Curve):
+    """
+    Starts at `initial` and jumps to `changes[epoch]` at each listed epoch.
+    """
+
+    def __init__(self, initial: float, changes: dict):
+        self.initial = initial
+        self.changes = changes
+
+    def values(self, total):
+        values = np.full(total, float(self.initial))
+        for epoch in sorted(self.changes):
+            values[int(epoch) :] = self.changes[epoch]
+        return values
+
+
+class Piecewise(Curve):
+    """
+    Straight lines between (epoch, value) points, flat before the first and
+    after the last.
+    """
+
+    def __init__(self, points: list):
+        self.points = sorted(points)
+
+    def values(self, total):
+        epochs, values = zip(*self.points, strict=True)
+        return np.interp(np.arange(total), epochs, values)
+
+
+class Series(Curve):
+    """
+    Given per-epoch values, e.g. loaded from a file. The last value holds if
+    the run is longer than the series.
+    """
+
+    def __init__(self, values):
+        self.series = np.asarray(values, dtype=np.float64)
+
+    def values(self, total):
+        series = self.series
+        if series.size >= total:
+            return series[:total]
+        return np.concatenate([series, np.full(total - series.size, series[-1])])
+
+
+class FromFile(Series):
+    """
+    Per-epoch values from a file: a 1-D .npy array, or the named `column` of a
+    CSV file with a header row, such as the `--metrics` CSV of an earlier run.
+    """
+
+    def __init__(self, path: str, column: str = None):
+        if path.endswith(".npy"):
+            values = np.load(path)
+        else:
+            if column is None:
+                raise ValueError(f"A column is needed to read {path}")
+            table = np.genfromtxt(path, delimiter=",", names=True)
+            if column not in table.dtype.names:
+                raise ValueError(f"{path} has no column {column}")
+            values = table[column]
+        super().__init__(values)
+
+
+class Combined(Curve):
+    def __init__(self, operation, first, second):
+        self.operation = operation
+        self.first = as_curve(first)
+        self.second = as_curve(second)
+
+    def values(self, total):
+        return self.operation(self.first.values(total), self.second.values(total))
+
+
+class Clipped(Curve):
+    def __init__(self, curve: Curve, low: float = None, high: float = None):
+        self.curve = curve
+        self.low = low
+        self.high = high
+
+    def values(self, total):
+        values = self.curve.values(total)
+        if self.low is not None:
+            values = np.maximum(self.low, values)
+        if self.high is not None:
+            values = np.minimum(self.high, values)
+        return values
+
+
+class EnvironmentSchedule:
+    """
+    Per-epoch baseline values of some environment factors, one `Curve` (or
+    constant) per factor. The drifting factors it doesn't name follow the
+    standard drift of `drift_curves`, so events that raise or lower them
+    always wear off.
+
+    `table(total)` evaluates every curve for a run of `total` epochs once and
+    keeps the result, a read-only structured array with one field per factor.
+    The simulation only indexes into it, so environment evaluation costs
+    nothing per epoch, and every simulation given the same schedule object,
+    e.g. a whole ensemble, reads the same arrays. A saved table is
+    memory-mapped by `load_schedule`, so worker processes share its pages too.
+    """
+
+    def __init__(self, **curves):
+        curves = {**drift_curves(), **curves}
+        self.curves = {name: as_curve(curve) for name, curve in curves.items()}
+        self._tables = {}
+
+    @property
+    def factors(self) -> tuple:
+        return tuple(self.curves)
+
+    def table(self, total: int) -> np.ndarray:
+        table = self._tables.get(total)
+        if table is None:
+            dtype = np.dtype([(name, np.float64) for name in self.curves])
+            table = np.empty(total, dtype=dtype)
+            for name, curve in self.curves.items():
+                table[name] = curve.values(total)
+            table.flags.writeable = False
+            self._tables[total] = table
+        return table
+
+    def save(self, path: str, total: int):
+        """
+        Writes the table for a run of `total` epochs to the .npy file `path`.
+        """
+        np.save(path, self.table(total))
+
+
+def load_schedule(path: str) -> EnvironmentSchedule:
+    """
+    A schedule backed by the memory-mapped table `EnvironmentSchedule.save`
+    wrote. Runs of the saved length use the mapped table as it is.
+    """
+    table = np.load(path, mmap_mode="r")
+    schedule = EnvironmentSchedule(
+        **{name: Series(table[name]) for name in table.dtype.names}
+    )
+    schedule._tables[len(table)] = table
+    return schedule
+
+
+def drift_curves() -> dict:
+    """
+    The original drift over a run: resources run down, temperature rises by
+    10C around 25C and pollution builds up.
+    """
+    return {
+        "resource_availability": Linear(1.0, 0.5).clip(low=0.1),
+        "temperature": Linear(20.0, 30.0),
+        "pollution": Linear(0.0, 0.3).clip(high=0.8),
+    }
+
+
+def default_schedule() -> EnvironmentSchedule:
+    return EnvironmentSchedule()
+
+
+# Shared by every simulation that doesn't bring its own schedule
+DEFAULT_SCHEDULE = default_schedule()
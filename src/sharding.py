@@ -0,0 +1,395 @@
+import argparse
+import hashlib
+import logging
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from backends import get_backend
+from interactions import MAX_PARTNERS, apply_interactions, draw_partners
+from main import Simulation
+from params import sim_env_params
+from population import DEAD, PARAM_INDEX, Population, classify
+from stats import interaction_tracker, reset_totals
+
+# Numeric columns kept in shared memory; `order` carries each epoch's shuffle
+SHARED_COLUMNS = (
+    "age_col",
+    "health_col",
+    "energy_col",
+    "status_col",
+    "params",
+    "order",
+)
+
+
+def _release(blocks: list):
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass  # Still viewed by a live array; the OS frees it with the process
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedPopulation(Population):
+    """
+    `Population` whose numeric columns live in shared memory blocks, so worker
+    processes can read and write them in place. Object columns (ids, names,
+    genomes) stay private to the owning process.
+
+    Growing allocates new blocks; `layout` always describes the current ones.
+    Blocks are unlinked when replaced and when the population is released.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._blocks = {}
+        self._created = []
+        self._finalizer = weakref.finalize(self, _release, self._created)
+        super().__init__(capacity)
+
+    def _allocate(self, capacity: int):
+        super()._allocate(capacity)
+        self.order = np.zeros(capacity, dtype=np.int64)
+
+        for block in self._blocks.values():
+            block.unlink()
+        self._blocks = {}
+        for name in SHARED_COLUMNS:
+            array = getattr(self, name)
+            block = SharedMemory(create=True, size=max(1, array.nbytes))
+            shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+            shared[...] = array
+            setattr(self, name, shared)
+            self._blocks[name] = block
+            self._created.append(block)
+
+    def layout(self) -> dict:
+        """
+        Block name, shape and dtype of every shared column, for `attach`.
+        """
+        return {
+            name: (block.name, getattr(self, name).shape, getattr(self, name).dtype.str)
+            for name, block in self._blocks.items()
+        }
+
+    def release(self):
+        """
+        Frees the shared memory now rather than when garbage collected.
+        """
+        self._finalizer()
+
+
+# Blocks this worker process has attached, by block name
+_attached = {}
+
+
+def attach(layout: dict) -> dict:
+    """
+    Maps the shared columns described by `layout` into this process and
+    returns them as arrays. Blocks stay attached across tasks until a layout
+    stops naming them.
+    """
+    columns = {}
+    for column, (name, shape, dtype) in layout.items():
+        entry = _attached.get(name)
+        if entry is None:
+            block = SharedMemory(name=name)
+            entry = (block, np.ndarray(shape, dtype, buffer=block.buf))
+            _attached[name] = entry
+        columns[column] = entry[1]
+
+    current = {name for name, _, _ in layout.values()}
+    for name in [name for name in _attached if name not in current]:
+        block, _ = _attached.pop(name)
+        try:
+            block.close()
+        except BufferError:
+            pass
+    return columns
+
+
+class ShardRows:
+    """
+    The `Population` column interface over rows `start:stop` of a set of
+    shared columns, enough for a batched backend and `apply_interactions`.
+    """
+
+    def __init__(self, columns: dict, start: int, stop: int):
+        self.age = columns["age_col"][start:stop]
+        self.health = columns["health_col"][start:stop]
+        self.energy = columns["energy_col"][start:stop]
+        self.status = columns["status_col"][start:stop]
+        self._params = columns["params"][:, start:stop]
+
+    def column(self, key: str) -> np.ndarray:
+        return self._params[PARAM_INDEX[key]]
+
+    def alive_mask(self) -> np.ndarray:
+        return self.status != DEAD
+
+    def update_status(self, classified: tuple = None):
+        if classified is None:
+            classified = classify(self.age, self.health, self.energy, self.column)
+        codes, dead = classified
+        self.status[:] = codes
+        self.health[dead] = 0.0
+        self.energy[dead] = 0.0
+
+
+def _init_worker():
+    # Workers never log: the parent owns the log file and the terminal
+    logging.disable(logging.CRITICAL)
+
+
+def run_shard(task: dict, columns: dict = None) -> dict:
+    """
+    Advances one shard for one phase of an epoch, in place.
+
+    The "process" phase ages, feeds and heals rows `bounds` and updates their
+    status. The "interact" phase draws partners among the rows listed in
+    `order[bounds]`, using the shard's own generator state, and applies the
+    damage. Returns the generator's new state and the interaction count.
+    """
+    if columns is None:
+        columns = attach(task["layout"])
+    start, stop = task["bounds"]
+
+    backend = get_backend(task["backend"])
+    if task["phase"] == "process":
+        backend.advance(ShardRows(columns, start, stop), task["environment"])
+        return {}
+
+    rng = np.random.Generator(np.random.PCG64())
+    rng.bit_generator.state = task["rng_state"]
+    rows = columns["order"][start:stop]
+    count = 0
+    if rows.size >= 2:
+        partners = draw_partners(rows.size, min(rows.size - 1, MAX_PARTNERS), rng)
+        count = apply_interactions(
+            ShardRows(columns, 0, task["size"]),
+            rows,
+            partners,
+            task["strength"],
+            task["modifier"],
+            backend.pair_damage,
+        )
+    return {"rng_state": rng.bit_generator.state, "interactions": count}
+
+
+class ShardedSimulation(Simulation):
+    """
+    A `Simulation` whose per-entity phases run over shards in worker processes.
+
+    The population lives in shared memory. Each epoch, the workers age, feed
+    and heal contiguous row ranges, then run interactions. For those, the main
+    process shuffles every living row into a new shard, so partners are drawn
+    from a different random subset each epoch rather than a fixed block, and
+    each shard draws from its own generator. The environment, events,
+    predators, the death sweep and reproduction (including placing offspring)
+    stay in the main process.
+
+    Processing gives the same floats as the single-process engine. Only the
+    interaction pairing differs, so results match it statistically, and a
+    fixed seed and shard count give identical runs for any number of workers.
+    """
+
+    population_class = SharedPopulation
+
+    def __init__(self, *args, shards: int = 4, workers: int = None, **kwargs):
+        """
+        Args:
+            shards: Number of shards. Part of the model: runs are only
+                reproducible across equal shard counts.
+            workers: Worker processes. 0 runs the shards in this process;
+                None uses every core.
+        """
+        if kwargs.get("world"):
+            raise ValueError("Sharded runs do not support a spatial world")
+        super().__init__(*args, **kwargs)
+        if not self.backend.batched:
+            raise ValueError(
+                f"Sharded runs need a batched backend, not {self.backend.name}"
+            )
+        self.shards = shards
+        self.workers = workers
+        self.shard_rngs = self.spawn_rngs(shards)
+        self._pool = None
+
+    def _bounds(self, count: int) -> list:
+        edges = np.linspace(0, count, self.shards + 1).astype(int).tolist()
+        return list(zip(edges[:-1], edges[1:], strict=True))
+
+    def _run_shards(self, tasks: list) -> list:
+        if self._pool is None:
+            population = self.population
+            columns = {name: getattr(population, name) for name in SHARED_COLUMNS}
+            return [run_shard(task, columns) for task in tasks]
+        return list(self._pool.map(run_shard, tasks))
+
+    def _process_population(self):
+        population = self.population
+        layout = population.layout()
+        self._run_shards(
+            [
+                {
+                    "phase": "process",
+                    "backend": self.backend.name,
+                    "layout": layout,
+                    "bounds": bounds,
+                    "environment": self.environment_factors,
+                }
+                for bounds in self._bounds(len(population))
+            ]
+        )
+        population.recount()
+
+    def _handle_interactions(self):
+        population = self.population
+        alive_rows = population.alive_rows()
+        num_alive = len(alive_rows)
+        if num_alive < 2:
+            return
+
+        population.order[:num_alive] = self.rng.permutation(alive_rows)
+        layout = population.layout()
+        tasks = [
+            {
+                "phase": "interact",
+                "backend": self.backend.name,
+                "layout": layout,
+                "bounds": bounds,
+                "size": len(population),
+                "rng_state": rng.bit_generator.state,
+                "strength": self.environment_factors["interaction_strength"],
+                "modifier": self._interaction_modifier(num_alive),
+            }
+            for bounds, rng in zip(
+                self._bounds(num_alive), self.shard_rngs, strict=True
+            )
+        ]
+        total = 0
+        for rng, result in zip(self.shard_rngs, self._run_shards(tasks), strict=True):
+            rng.bit_generator.state = result["rng_state"]
+            total += result["interactions"]
+        interaction_tracker(total)
+
+    def run_simulation(self):
+        if self.workers == 0:
+            super().run_simulation()
+            return
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker
+        ) as pool:
+            self._pool = pool
+            try:
+                super().run_simulation()
+            finally:
+                self._pool = None
+
+
+def _fingerprint(simulation: Simulation) -> str:
+    population = simulation.population
+    digest = hashlib.sha1()
+    for column in (population.age, population.health, population.energy):
+        digest.update(column.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def scaling_report(
+    entities: int, epochs: int, shards: int, workers: list, seed: int = 0
+) -> list:
+    """
+    Runs the same seeded sharded simulation once per worker count and returns
+    a row per run with its time, speedup over the first run and a fingerprint
+    of the final state, which must be equal across rows. A single-process
+    `Simulation` with the same seed comes first, as the reference.
+
+    Keep `epochs` short: once founders reach reproductive age, the serial
+    reproduction phase dominates every engine alike.
+    """
+    rows = []
+
+    def timed(label, simulation):
+        started = time.perf_counter()
+        simulation.run_simulation()
+        elapsed = time.perf_counter() - started
+        rows.append(
+            {
+                "run": label,
+                "seconds": elapsed,
+                "epochs_per_sec": (simulation.current_time + 1) / elapsed,
+                "alive": len(simulation.population),
+                "fingerprint": _fingerprint(simulation),
+            }
+        )
+
+    reset_totals()
+    timed(
+        "single process",
+        Simulation(
+            initial_entities=entities,
+            time_steps=epochs,
+            environment_params=sim_env_params,
+            headless=True,
+            seed=seed,
+        ),
+    )
+    for count in workers:
+        reset_totals()
+        simulation = ShardedSimulation(
+            initial_entities=entities,
+            time_steps=epochs,
+            environment_params=sim_env_params,
+            headless=True,
+            seed=seed,
+            shards=shards,
+            workers=count,
+        )
+        timed(f"{shards} shards, {count} workers", simulation)
+        simulation.population.release()
+
+    base = rows[1]["seconds"] if len(rows) > 1 else rows[0]["seconds"]
+    for row in rows:
+        row["speedup"] = base / row["seconds"]
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded simulation scaling report")
+    parser.add_argument("--entities", type=int, default=200_000)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument(
+        "--workers",
+        default=None,
+        help="comma-separated worker counts (default: 1,2,4,... up to all cores)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.workers:
+        worker_counts = [int(count) for count in args.workers.split(",")]
+    else:
+        cores = os.cpu_count() or 1
+        worker_counts = [2**i for i in range(cores.bit_length()) if 2**i <= cores]
+
+    report = scaling_report(
+        args.entities, args.epochs, args.shards, worker_counts, args.seed
+    )
+    print(f"{'run':<26}{'seconds':>9}{'epochs/s':>10}{'speedup':>9}{'alive':>9}  state")
+    for row in report:
+        print(
+            f"{row['run']:<26}{row['seconds']:>9.2f}{row['epochs_per_sec']:>10.2f}"
+            f"{row['speedup']:>9.2f}{row['alive']:>9}  {row['fingerprint']}"
+        )
+    sharded = {row["fingerprint"] for row in report[1:]}
+    print("Sharded runs identical:", "yes" if len(sharded) <= 1 else "NO")
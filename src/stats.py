@@ -1,9 +1,13 @@
-from colored import Back, Fore, Style
+import logging
 
 from entity import Entity
-from logging_config import setup_logger
+from logging_config import category_logger, colours, setup_logger
 
 logger = setup_logger(__name__)
+birth_logger = category_logger("births")
+death_logger = category_logger("deaths")
+mutation_logger = category_logger("mutations")
+event_logger = category_logger("events")
 
 final_totals = {
     "total_entities": 0,
@@ -19,6 +23,14 @@ final_totals = {
 }
 
 
+def reset_totals():
+    """
+    Zero every counter, e.g. before the next run in the same process.
+    """
+    for key in final_totals:
+        final_totals[key] = 0
+
+
 def update_totals(total: int, alive: int, struggling: int, thriving: int):
     """
     Update the final totals based on the current state of entities.
@@ -35,58 +47,130 @@ def finalize_totals():
     """
     Finalize and log the total counts of entities at the end of the simulation.
     """
+    _, fore, style = colours()
+    green, reset = fore.green, style.reset
     logger.info(
         "\n"
-        f"{Fore.green}Total Entities:{Style.reset} {final_totals['total_entities']}, "
-        f"{Fore.green}Total Deaths:{Style.reset} {final_totals['total_deaths']}, "
-        f"{Fore.green}Total Births:{Style.reset} {final_totals['total_births']}, "
-        f"{Fore.green}Total Mutations:{Style.reset} {final_totals['total_mutations']}, "
+        "%sTotal Entities:%s %s, "
+        "%sTotal Deaths:%s %s, "
+        "%sTotal Births:%s %s, "
+        "%sTotal Mutations:%s %s, "
         "\n --- Summary ---"
-        f"{Fore.green}Alive at Conclusion:{Style.reset} {final_totals['total_alive_at_conclusion']}, "
-        f"{Fore.green}Thriving:{Style.reset} {final_totals['total_thriving']}, "
-        f"{Fore.green}Struggling:{Style.reset} {final_totals['total_struggling']}"
-        # f"{Fore.green}, Total Disasters:{Style.reset} {final_totals['total_disasters']}, "
-        # f"{Fore.green}Total Interactions:{Style.reset} {final_totals['total_interactions']}"
-    )
+        "%sAlive at Conclusion:%s %s, "
+        "%sThriving:%s %s, "
+        "%sStruggling:%s %s"
+        "%s, Total Events:%s %s, "
+        "%sTotal Disasters:%s %s, "
+        "%sTotal Interactions:%s %s",
+        green, reset, final_totals["total_entities"],
+        green, reset, final_totals["total_deaths"],
+        green, reset, final_totals["total_births"],
+        green, reset, final_totals["total_mutations"],
+        green, reset, final_totals["total_alive_at_conclusion"],
+        green, reset, final_totals["total_thriving"],
+        green, reset, final_totals["total_struggling"],
+        green, reset, final_totals["total_events"],
+        green, reset, final_totals["total_disasters"],
+        green, reset, final_totals["total_interactions"],
+    )  # fmt: skip
 
 
 def death_tracker(entity: Entity):
     """
     Track the death of an entity and log its details.
     """
-    logger.info(
-        f"{Back.yellow}{entity.id} - {entity.name} died. (Age:{entity.age}) {Style.reset}"
-    )
+    if death_logger.isEnabledFor(logging.INFO):
+        back, _, style = colours()
+        death_logger.info(
+            "%s%s - %s died. (Age:%s) %s",
+            back.yellow,
+            entity.id,
+            entity.name,
+            entity.age,
+            style.reset,
+        )
 
     final_totals["total_deaths"] += 1
 
 
-def birth_tracker(entity, new_entity, time):
+def birth_tracker(parent_ids, offspring_ids, offspring_names, time):
     """
-    Track the birth of an entity and log its details.
+    Track one epoch's births at once and log each of them.
     """
-    logger.info(
-        f"{Back.red}Time {time}: Entity {entity.id} reproduced! New entity {new_entity.id} - {new_entity.name} born.{Style.reset}"
-    )
-
-    final_totals["total_births"] += 1
+    if birth_logger.isEnabledFor(logging.INFO):
+        back, _, style = colours()
+        for parent_id, new_id, new_name in zip(
+            parent_ids, offspring_ids, offspring_names, strict=True
+        ):
+            birth_logger.info(
+                "%sTime %s: Entity %s reproduced! New entity %s - %s born.%s",
+                back.red,
+                time,
+                parent_id,
+                new_id,
+                new_name,
+                style.reset,
+            )
+
+    final_totals["total_births"] += len(offspring_ids)
+
+
+def disaster_tracker(event_type: str, time: int, names: list, count: int = None):
+    """
+    Track the deaths caused by a disaster event and log each victim. `count`
+    is the number of deaths when `names` has one entry per cohort.
+    """
+    if event_logger.isEnabledFor(logging.WARNING):
+        _, fore, style = colours()
+        for name in names:
+            event_logger.warning(
+                "%sDisaster Event: %s occurred at time %s - %s died %s ",
+                fore.blue,
+                event_type,
+                time,
+                name,
+                style.reset,
+            )
+    final_totals["total_disasters"] += len(names) if count is None else count
+
+
+def cohort_tracker(births: int = 0, deaths: int = 0):
+    """
+    Track births and deaths counted per cohort rather than one entity at a
+    time.
+    """
+    final_totals["total_births"] += births
+    final_totals["total_deaths"] += deaths
 
 
-def disaster_tracker(event_type: str, time: int, name: str = None):
+def event_tracker():
     """
-    Track a disaster event and log its details.
+    Track the start of an environment event.
     """
-    logger.warning(
-        f"{Fore.blue}Disaster Event: {event_type} occurred at time {time} - {name} died {Style.reset} "
-    )
-    final_totals["total_disasters"] += 1
+    final_totals["total_events"] += 1
 
 
-def mutation_tracker(name: str, original_value: float, new_value: float):
+def mutation_tracker(counts: dict, time: int):
     """
-    Track a mutation event and log its details.
+    Track one epoch's mutations, counted per parameter, and log them as a
+    single line.
     """
-    logger.info(
-        f"{Fore.green}Mutation Event: {name} mutated! Original Value: {original_value} - New Value: {new_value}.{Style.reset}"
-    )
-    final_totals["total_mutations"] += 1
+    total = sum(counts.values())
+    if total and mutation_logger.isEnabledFor(logging.INFO):
+        _, fore, style = colours()
+        mutation_logger.info(
+            "%sTime %s: %s mutations (%s).%s",
+            fore.green,
+            time,
+            total,
+            ", ".join(f"{name} {count}" for name, count in counts.items() if count),
+            style.reset,
+        )
+    final_totals["total_mutations"] += total
+
+
+def interaction_tracker(count: int):
+    """
+    Track the number of entity interactions in an Epoch.
+    """
+    final_totals["total_interactions"] += count
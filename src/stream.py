@@ -0,0 +1,519 @@
+import argparse
+import collections
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from genome import PARAM_KEYS
+
+MAGIC = b"TLS1"
+KEYFRAME_INTERVAL = 50
+# Frames a client may have waiting before they are coalesced into a keyframe
+QUEUE_FRAMES = 8
+# How long `close` waits for clients that are behind to take more data
+FLUSH_SECONDS = 0.2
+
+# Sent once after MAGIC: 1 if entity records carry a position, then the
+# number of values in each genome vector
+HELLO = struct.Struct("<BH")
+# Frame header: kind, epoch, epoch the delta applies to (-1 for a keyframe),
+# payload length in bytes
+HEADER = struct.Struct("<BiiI")
+# Payload counts: genomes, entities (changed ones in a delta), births, deaths
+COUNTS = struct.Struct("<IIII")
+
+KEYFRAME = 1  # the whole population
+DELTA = 2  # entities that changed since the base epoch, births and deaths
+
+ENVIRONMENT_KEYS = ("resource_availability", "temperature", "pollution")
+# `born` is the epoch minus the age, so ageing alone never changes a record
+ENTITY_FIELDS = [
+    ("uid", "<i8"),
+    ("genome", "<i4"),
+    ("status", "u1"),
+    ("born", "<i4"),
+    ("health", "<f4"),
+    ("energy", "<f4"),
+]
+ENTITY_DTYPE = np.dtype(ENTITY_FIELDS)
+SPATIAL_DTYPE = np.dtype(ENTITY_FIELDS + [("x", "<f4"), ("y", "<f4")])
+GENOME_DTYPE = np.dtype([("number", "<i4"), ("vector", "<f8", (len(PARAM_KEYS),))])
+
+
+def parse_address(address: str) -> tuple:
+    """
+    Returns the socket family and address for `address`: "HOST:PORT" or
+    ":PORT" (on 127.0.0.1) for TCP, anything else for a Unix domain socket
+    at that path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+class _Client:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.queue = collections.deque()
+        self.sending = memoryview(b"")
+        self.greeted = False  # Has been sent MAGIC and HELLO
+        self.synced = False  # Has had a keyframe, so deltas apply
+
+    def pending(self) -> bool:
+        return bool(self.sending) or bool(self.queue)
+
+
+class StateStream:
+    """
+    Publishes a running simulation's state to viewers over a local socket.
+
+    Viewers connect to `address` (see `parse_address`) at any time. Once the
+    run is going, they get MAGIC, a `HELLO` record describing the records of
+    this run, then one frame per epoch: a keyframe with the
+    whole population first and every `keyframe_interval` epochs, deltas with
+    only the entities that changed, were born or died in between.
+
+    The simulation never waits for a viewer. At the end of each epoch it only
+    copies the columns a frame needs, and only while someone is connected; a
+    background thread encodes the frames and sends them without blocking.
+    If the thread falls behind, it encodes the newest copy against the last
+    one it encoded, so a delta can span several epochs. A client with
+    `queue_frames` frames waiting has them replaced by one keyframe of the
+    current state, counted in `frames_dropped`.
+
+    The stream hooks into `Simulation` like the journal: `begin_run`,
+    `end_epoch` and `close`.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        keyframe_interval: int = KEYFRAME_INTERVAL,
+        queue_frames: int = QUEUE_FRAMES,
+    ):
+        self.address = address
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.queue_frames = max(1, queue_frames)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._family, self._bind = parse_address(address)
+        self._server = None
+        self._thread = None
+        self._spatial = False
+        self._hello = None  # Sent to each client before its first frame
+        self._lock = threading.Lock()
+        self._latest = None  # Copy of the state the thread hasn't encoded yet
+        self._closing = False
+        self._progress = 0.0  # When a client last took data
+        self._clients = {}
+        self._genomes = {}
+        self._vectors = []
+        self._base = None  # Epoch and records of the last encoded state
+        self._keyframe_epoch = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def listen(self):
+        """
+        Starts accepting viewers. `begin_run` calls this if it wasn't called
+        before, e.g. to let viewers attach before the run starts.
+        """
+        if self._server is not None:
+            return
+        if self._family == socket.AF_UNIX and os.path.exists(self._bind):
+            os.unlink(self._bind)
+        self._server = socket.socket(self._family, socket.SOCK_STREAM)
+        if self._family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self._bind)
+        self._server.listen()
+        self._server.setblocking(False)
+        if self._family == socket.AF_INET:
+            # Port 0 picks a free port; record the one in use
+            host, port = self._server.getsockname()[:2]
+            self.address = f"{host}:{port}"
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._wake_read.setblocking(False)
+        self._wake_write.setblocking(False)
+        self._closing = False
+        self._thread = threading.Thread(
+            target=self._serve, name="state-stream", daemon=True
+        )
+        self._thread.start()
+
+    def begin_run(self, simulation):
+        self._spatial = simulation.world is not None
+        self._hello = MAGIC + HELLO.pack(self._spatial, len(PARAM_KEYS))
+        self.listen()
+
+    def end_epoch(self, simulation):
+        """
+        Hands a copy of the state at the end of the epoch to the sending
+        thread, replacing any copy it hasn't got to yet.
+        """
+        if not self._clients:
+            return
+        population = simulation.population
+        snapshot = {
+            "epoch": simulation.current_time,
+            "environment": np.array(
+                [simulation.environment_factors[key] for key in ENVIRONMENT_KEYS],
+                dtype="<f8",
+            ),
+            "uid": population.uid[: len(population)].copy(),
+            "genomes": population.genomes[: len(population)].copy(),
+            "status": population.status.copy(),
+            "age": population.age.copy(),
+            "health": population.health.copy(),
+            "energy": population.energy.copy(),
+        }
+        if self._spatial:
+            snapshot["positions"] = population.positions.copy()
+        with self._lock:
+            self._latest = snapshot
+        self._wake()
+
+    def close(self):
+        """
+        Sends what is left for as long as clients keep taking it, giving up
+        after `FLUSH_SECONDS` without progress, then disconnects everyone and
+        stops listening.
+        """
+        if self._server is None:
+            return
+        self._progress = time.monotonic()
+        self._closing = True
+        self._wake()
+        self._thread.join()
+        for client in self._clients.values():
+            client.sock.close()
+        self._clients = {}
+        self._server.close()
+        self._wake_read.close()
+        self._wake_write.close()
+        if self._family == socket.AF_UNIX:
+            os.unlink(self._bind)
+        self._server = self._thread = self._base = None
+
+    def _wake(self):
+        try:
+            self._wake_write.send(b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def _serve(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._server, selectors.EVENT_READ)
+        selector.register(self._wake_read, selectors.EVENT_READ)
+        while True:
+            for key, events in selector.select(timeout=FLUSH_SECONDS / 2):
+                self._handle(selector, key.fileobj, events)
+
+            # Read before taking the snapshot, so the last epoch is never missed
+            closing = self._closing
+            with self._lock:
+                snapshot, self._latest = self._latest, None
+            if snapshot is not None:
+                self._publish(snapshot, selector)
+
+            if closing:
+                behind = any(c.pending() for c in self._clients.values())
+                stalled = time.monotonic() - self._progress > FLUSH_SECONDS
+                if not behind or stalled:
+                    break
+        selector.close()
+
+    def _handle(self, selector, sock: socket.socket, events: int):
+        if sock is self._server:
+            self._accept(selector)
+        elif sock is self._wake_read:
+            while True:
+                try:
+                    sock.recv(4096)
+                except BlockingIOError:
+                    break
+        elif sock in self._clients:
+            if events & selectors.EVENT_READ and not self._discard(sock):
+                self._drop(selector, sock)
+            elif events & selectors.EVENT_WRITE:
+                self._send(selector, self._clients[sock])
+
+    def _accept(self, selector):
+        try:
+            sock, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        # Greeted with the first frame: the run may not have begun yet
+        self._clients[sock] = _Client(sock)
+        selector.register(sock, selectors.EVENT_READ)
+
+    def _discard(self, sock: socket.socket) -> bool:
+        # Viewers have nothing to say; reading only notices them leaving
+        try:
+            return bool(sock.recv(4096))
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def _drop(self, selector, sock: socket.socket):
+        selector.unregister(sock)
+        sock.close()
+        del self._clients[sock]
+
+    def _send(self, selector, client: _Client):
+        while client.pending():
+            if not client.sending:
+                client.sending = memoryview(client.queue.popleft())
+                self.frames_sent += 1
+            try:
+                sent = client.sock.send(client.sending)
+            except BlockingIOError:
+                break
+            except OSError:
+                self._drop(selector, client.sock)
+                return
+            client.sending = client.sending[sent:]
+            self._progress = time.monotonic()
+        events = selectors.EVENT_READ
+        if client.pending():
+            events |= selectors.EVENT_WRITE
+        selector.modify(client.sock, events)
+
+    def _publish(self, snapshot: dict, selector):
+        """
+        Encodes `snapshot` and queues it for every client: a keyframe where
+        one is due, a delta against the last encoded state otherwise.
+        """
+        epoch = snapshot["epoch"]
+        periodic = (
+            self._base is None or epoch - self._keyframe_epoch >= self.keyframe_interval
+        )
+        if periodic:
+            # Numbers restart, so genomes no longer alive are forgotten
+            self._genomes, self._vectors = {}, []
+            self._keyframe_epoch = epoch
+        records = self._records(snapshot)
+        frames = {}
+
+        def frame(kind):
+            if kind not in frames:
+                if kind == KEYFRAME:
+                    frames[kind] = self._keyframe(epoch, snapshot, records)
+                else:
+                    frames[kind] = self._delta(epoch, snapshot, records)
+            return frames[kind]
+
+        for client in list(self._clients.values()):
+            if not client.greeted:
+                client.sending = memoryview(self._hello)
+                client.greeted = True
+            if len(client.queue) >= self.queue_frames:
+                # Too far behind: skip straight to the current state
+                self.frames_dropped += len(client.queue)
+                client.queue.clear()
+                client.synced = False
+            delta = client.synced and not periodic
+            client.queue.append(frame(DELTA if delta else KEYFRAME))
+            client.synced = True
+            self._send(selector, client)
+        self._base = (epoch, records)
+
+    def _records(self, snapshot: dict) -> np.ndarray:
+        genomes = snapshot["genomes"]
+        n = len(genomes)
+        records = np.empty(n, dtype=SPATIAL_DTYPE if self._spatial else ENTITY_DTYPE)
+        records["uid"] = snapshot["uid"]
+        records["status"] = snapshot["status"]
+        records["born"] = snapshot["epoch"] - snapshot["age"]
+        records["health"] = snapshot["health"]
+        records["energy"] = snapshot["energy"]
+        if self._spatial:
+            records["x"], records["y"] = snapshot["positions"]
+        # Genomes are interned: number each distinct object once
+        keys = np.fromiter(map(id, genomes), np.int64, n)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        numbers = [self._genome_number(genomes[row]) for row in first.tolist()]
+        records["genome"] = np.array(numbers, dtype=np.int32)[inverse]
+        return records
+
+    def _genome_number(self, genome) -> int:
+        number = self._genomes.get(genome)
+        if number is None:
+            number = len(self._vectors)
+            self._genomes[genome] = number
+            self._vectors.append(genome.vector)
+        return number
+
+    def _genome_table(self, numbers: np.ndarray) -> np.ndarray:
+        table = np.empty(numbers.size, dtype=GENOME_DTYPE)
+        table["number"] = numbers
+        for i, number in enumerate(numbers.tolist()):
+            table["vector"][i] = self._vectors[number]
+        return table
+
+    def _keyframe(self, epoch: int, snapshot: dict, records: np.ndarray) -> bytes:
+        genomes = self._genome_table(np.unique(records["genome"]))
+        return _frame(
+            KEYFRAME, epoch, -1, snapshot["environment"], genomes, records, [], []
+        )
+
+    def _delta(self, epoch: int, snapshot: dict, records: np.ndarray) -> bytes:
+        base_epoch, base = self._base
+        # uids only grow and compaction keeps their order, so both are sorted
+        kept = _member(records["uid"], base["uid"])
+        gone = ~_member(base["uid"], records["uid"])
+        deaths = base["uid"][gone]
+        births = records[~kept]
+        survivors = records[kept]
+        before = base[~gone]
+        changed = survivors[survivors != before]
+        # Genomes the viewer can't know from the base state, e.g. new mutants
+        used = np.concatenate([births["genome"], changed["genome"]])
+        genomes = self._genome_table(np.setdiff1d(used, base["genome"]))
+        return _frame(
+            DELTA,
+            epoch,
+            base_epoch,
+            snapshot["environment"],
+            genomes,
+            changed,
+            births,
+            deaths.astype("<i8"),
+        )
+
+
+def _member(uid: np.ndarray, sorted_uid: np.ndarray) -> np.ndarray:
+    """
+    Which of the sorted `uid` are also in `sorted_uid`.
+    """
+    rows = np.minimum(np.searchsorted(sorted_uid, uid), max(sorted_uid.size - 1, 0))
+    if not sorted_uid.size:
+        return np.zeros(uid.size, dtype=bool)
+    return sorted_uid[rows] == uid
+
+
+def _frame(kind, epoch, base, environment, genomes, entities, births, deaths):
+    parts = [
+        environment.tobytes(),
+        COUNTS.pack(len(genomes), len(entities), len(births), len(deaths)),
+        genomes.tobytes(),
+        entities.tobytes(),
+    ]
+    if len(births):
+        parts.append(births.tobytes())
+    if len(deaths):
+        parts.append(deaths.tobytes())
+    payload = b"".join(parts)
+    return HEADER.pack(kind, epoch, base, len(payload)) + payload
+
+
+class Viewer:
+    """
+    Client for a `StateStream`: connects to `address` and rebuilds the
+    population from the frames it reads.
+
+    After each `read_frame`, `entities` holds the records of every entity,
+    sorted by uid, `genomes` maps genome numbers to parameter vectors, and
+    `epoch` and `environment` describe the epoch the frame ended.
+    """
+
+    def __init__(self, address: str, timeout: float = None):
+        family, target = parse_address(address)
+        self.address = address
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(target)
+        self._file = self.sock.makefile("rb")
+        self.dtype = None  # Known from the HELLO before the first frame
+        self.entities = np.empty(0, dtype=ENTITY_DTYPE)
+        self.genomes = {}
+        self.epoch = None
+        self.environment = {}
+
+    def _greet(self) -> bool:
+        magic = self._file.read(len(MAGIC))
+        if not magic:
+            return False
+        if magic != MAGIC:
+            raise ValueError(f"{self.address} is not a lifeform state stream")
+        spatial, params = HELLO.unpack(self._file.read(HELLO.size))
+        if params != len(PARAM_KEYS):
+            raise ValueError(f"{self.address} streams genomes of {params} parameters")
+        self.dtype = SPATIAL_DTYPE if spatial else ENTITY_DTYPE
+        return True
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def read_frame(self):
+        """
+        Reads and applies the next frame. Returns its kind, or None once the
+        simulation has closed the stream.
+        """
+        if self.dtype is None and not self._greet():
+            return None
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        kind, epoch, base, length = HEADER.unpack(header)
+        payload = self._file.read(length)
+        if len(payload) < length:
+            return None
+
+        offset = 8 * len(ENVIRONMENT_KEYS)
+        values = np.frombuffer(payload[:offset], dtype="<f8").tolist()
+        counts = COUNTS.unpack_from(payload, offset)
+        offset += COUNTS.size
+        parts = []
+        for dtype, count in zip(
+            (GENOME_DTYPE, self.dtype, self.dtype, np.dtype("<i8")), counts, strict=True
+        ):
+            parts.append(np.frombuffer(payload, dtype, count, offset))
+            offset += dtype.itemsize * count
+        genomes, entities, births, deaths = parts
+
+        if kind == KEYFRAME:
+            self.genomes = {}
+            self.entities = entities.copy()
+        elif base != self.epoch:
+            raise ValueError(f"Delta from epoch {base} after epoch {self.epoch}")
+        else:
+            current = self.entities[~np.isin(self.entities["uid"], deaths)]
+            rows = np.searchsorted(current["uid"], entities["uid"])
+            current[rows] = entities
+            self.entities = np.concatenate([current, births])
+        self.genomes.update(
+            zip(genomes["number"].tolist(), genomes["vector"], strict=True)
+        )
+        self.epoch = epoch
+        self.environment = dict(zip(ENVIRONMENT_KEYS, values, strict=True))
+        return kind
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a streaming simulation")
+    parser.add_argument("address", help="HOST:PORT or socket path given to --stream")
+    args = parser.parse_args()
+
+    viewer = Viewer(args.address)
+    frames = 0
+    started = time.perf_counter()
+    while (kind := viewer.read_frame()) is not None:
+        frames += 1
+        print(
+            f"Epoch {viewer.epoch}: {'keyframe' if kind == KEYFRAME else 'delta'}, "
+            f"{len(viewer.entities)} alive, {len(viewer.genomes)} genomes"
+        )
+    viewer.close()
+    print(f"{frames} frames in {time.perf_counter() - started:.2f}s")
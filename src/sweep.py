@@ -0,0 +1,235 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from main import Simulation
+from params import sim_env_params
+from schedule import load_schedule
+from stats import final_totals, reset_totals
+
+RESULTS_FILE = "sweep_results.csv"
+SUMMARY_FIELDS = (
+    "extinction_epoch",
+    "final_epoch",
+    "peak_population",
+    "elapsed_seconds",
+)
+
+
+def expand_grid(
+    grid: dict, seeds, initial_entities: int, time_steps: int, schedule: str = None
+) -> list:
+    """
+    Returns one run spec per combination of `grid` values and seed.
+
+    Args:
+        grid: Maps an environment parameter (e.g. 'mutation_rate') to the list
+              of values to sweep over.
+    """
+    keys = sorted(grid)
+    # Runs are identified by the schedule's contents, so editing the file in
+    # place reruns them
+    schedule_digest = schedule and file_digest(schedule)
+    specs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        for seed in seeds:
+            spec = {
+                "seed": seed,
+                "initial_entities": initial_entities,
+                "time_steps": time_steps,
+                "environment": dict(zip(keys, values, strict=True)),
+            }
+            if schedule:
+                spec["schedule"] = schedule_digest
+            spec["run_id"] = run_id(spec)
+            specs.append(spec)
+    return specs
+
+
+def run_id(spec: dict) -> str:
+    """
+    Stable id for a run spec, so a resumed sweep recognises finished runs even
+    if the grid was listed in a different order.
+    """
+    key = {k: v for k, v in spec.items() if k != "run_id"}
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha1").hexdigest()
+
+
+# Environment schedule of this worker's runs, mapped once per process
+_schedule = None
+
+
+def _init_worker(schedule_path: str = None):
+    global _schedule
+    # Workers never log: the parent owns the log file and the terminal
+    logging.disable(logging.CRITICAL)
+    if schedule_path:
+        _schedule = load_schedule(schedule_path)
+
+
+def run_one(spec: dict) -> dict:
+    """
+    Runs a single headless simulation and returns its summary row.
+    """
+    reset_totals()
+
+    environment = {**sim_env_params, **spec["environment"]}
+    simulation = Simulation(
+        initial_entities=spec["initial_entities"],
+        time_steps=spec["time_steps"],
+        environment_params=environment,
+        headless=True,
+        seed=spec["seed"],
+        schedule=_schedule,
+    )
+    started = time.perf_counter()
+    simulation.run_simulation()
+
+    return {
+        "run_id": spec["run_id"],
+        "seed": spec["seed"],
+        **spec["environment"],
+        "extinction_epoch": simulation.extinction_epoch,
+        "final_epoch": simulation.current_time,
+        "peak_population": simulation.peak_population,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        **final_totals,
+    }
+
+
+def completed_runs(results_path: str) -> set:
+    """
+    Returns the run ids already in the results table.
+    """
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline="") as f:
+        return {row["run_id"] for row in csv.DictReader(f)}
+
+
+def results_header(results_path: str, fieldnames: list) -> list:
+    """
+    Returns the header to write rows under: the existing file's, if it names
+    the same columns as `fieldnames` (in any order), else `fieldnames` for a
+    new file. Raises ValueError if the file was written for a different grid.
+    """
+    if not os.path.exists(results_path):
+        return fieldnames
+    with open(results_path, newline="") as f:
+        header = next(csv.reader(f), None)
+    if header is None:
+        return fieldnames
+    if sorted(header) != sorted(fieldnames):
+        raise ValueError(
+            f"{results_path} has columns {header}, but this sweep writes "
+            f"{fieldnames}; use a new results file for a different grid"
+        )
+    return header
+
+
+def run_sweep(
+    grid: dict,
+    seeds,
+    results_path: str = RESULTS_FILE,
+    initial_entities: int = 150,
+    time_steps: int = 750,
+    workers: int = None,
+    schedule: str = None,
+) -> int:
+    """
+    Runs every grid/seed combination over a process pool, appending each run's
+    summary to the CSV at `results_path` as soon as it finishes. Runs already
+    in that file are skipped, so an interrupted sweep picks up where it
+    stopped. Rows are appended under the file's existing header, and a file
+    written for a different grid raises ValueError. Returns the number of runs
+    executed.
+
+    `schedule` is the path of a saved `EnvironmentSchedule` table. Each
+    worker memory-maps it once, so every run shares the same pages.
+    """
+    specs = expand_grid(grid, seeds, initial_entities, time_steps, schedule)
+    done = completed_runs(results_path)
+    pending = [spec for spec in specs if spec["run_id"] not in done]
+    if not pending:
+        return 0
+
+    fieldnames = ["run_id", "seed", *sorted(grid), *SUMMARY_FIELDS, *final_totals]
+    header = results_header(results_path, fieldnames)
+    new_file = not os.path.exists(results_path) or not os.path.getsize(results_path)
+
+    with (
+        open(results_path, "a", newline="") as f,
+        ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(schedule,)
+        ) as pool,
+    ):
+        writer = csv.DictWriter(f, fieldnames=header)
+        if new_file:
+            writer.writeheader()
+
+        futures = [pool.submit(run_one, spec) for spec in pending]
+        for finished, future in enumerate(as_completed(futures), 1):
+            writer.writerow(future.result())
+            f.flush()
+            print(f"{len(done) + finished}/{len(specs)} runs complete", flush=True)
+
+    return len(pending)
+
+
+def _parse_grid_option(option: str) -> tuple:
+    name, _, values = option.partition("=")
+    return name, [json.loads(value) for value in values.split(",")]
+
+
+def _parse_seeds(option: str) -> list:
+    if "-" in option:
+        first, last = option.split("-")
+        return list(range(int(first), int(last) + 1))
+    return [int(seed) for seed in option.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal Lifeform parameter sweep")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        metavar="PARAM=V1,V2,...",
+        help="environment parameter values to sweep, e.g. mutation_rate=0.05,0.1",
+    )
+    parser.add_argument(
+        "--seeds", default="0-9", help="seed range (0-9) or list (1,5,7)"
+    )
+    parser.add_argument("--results", default=RESULTS_FILE, help="results CSV path")
+    parser.add_argument("--initial-entities", type=int, default=150)
+    parser.add_argument("--time-steps", type=int, default=750)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument(
+        "--schedule",
+        metavar="PATH",
+        default=None,
+        help="environment schedule table (.npy) saved by EnvironmentSchedule.save",
+    )
+    args = parser.parse_args()
+
+    ran = run_sweep(
+        dict(_parse_grid_option(option) for option in args.grid),
+        _parse_seeds(args.seeds),
+        results_path=args.results,
+        initial_entities=args.initial_entities,
+        time_steps=args.time_steps,
+        workers=args.workers,
+        schedule=args.schedule,
+    )
+    print(f"Ran {ran} new runs; results in {args.results}")
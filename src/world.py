@@ -0,0 +1,224 @@
+import numpy as np
+
+# Number of random waves summed into the resource capacity map
+RESOURCE_WAVES = 3
+
+
+class World:
+    """
+    Optional 2D toroidal world for a `Simulation`.
+
+    Entities get a position that random-walks every epoch. The world is cut
+    into a uniform grid of cells at least `interaction_radius` wide, so every
+    neighbour of an entity lies in its own cell or one of the 8 around it.
+    Neighbour queries bucket entities by cell with one sort, keeping them close
+    to O(N) at a fixed density.
+
+    Each cell also holds a resource level. Occupants eat it down, it regrows
+    towards the cell's capacity, and an entity forages with the global
+    resource availability scaled by its cell's level.
+    """
+
+    def __init__(
+        self,
+        width: float = 200.0,
+        height: float = 200.0,
+        interaction_radius: float = 2.0,
+        move_speed: float = 1.0,
+        resource_variation: float = 0.4,
+        consumption: float = 0.01,
+        regrowth: float = 0.1,
+        disease_radius: float = 6.0,
+    ):
+        """
+        Args:
+            interaction_radius: Entities closer than this can interact.
+            move_speed: Standard deviation of each epoch's step per axis.
+            resource_variation: Cell capacities range over 1 +/- this.
+            consumption: Resource level each occupant eats per epoch.
+            regrowth: Fraction of the gap to capacity a cell regrows per epoch.
+            disease_radius: Outbreaks hit entities this close to patient zero.
+        """
+        if min(width, height) < 3 * interaction_radius:
+            raise ValueError("The world must be at least 3 interaction radii wide")
+        self.width = width
+        self.height = height
+        self.interaction_radius = interaction_radius
+        self.move_speed = move_speed
+        self.resource_variation = resource_variation
+        self.consumption = consumption
+        self.regrowth = regrowth
+        self.disease_radius = disease_radius
+
+        self.grid_x = int(width // interaction_radius)
+        self.grid_y = int(height // interaction_radius)
+        self.cell_width = width / self.grid_x
+        self.cell_height = height / self.grid_y
+        self.capacity = np.ones((self.grid_x, self.grid_y))
+        self.resources = self.capacity.copy()
+
+    @property
+    def config(self) -> dict:
+        """
+        Constructor arguments, e.g. for a checkpoint.
+        """
+        return {
+            "width": self.width,
+            "height": self.height,
+            "interaction_radius": self.interaction_radius,
+            "move_speed": self.move_speed,
+            "resource_variation": self.resource_variation,
+            "consumption": self.consumption,
+            "regrowth": self.regrowth,
+            "disease_radius": self.disease_radius,
+        }
+
+    def seed_resources(self, rng: np.random.Generator):
+        """
+        Draws a smooth, periodic capacity map from a few random waves and fills
+        every cell to capacity.
+        """
+        gx, gy = np.meshgrid(
+            np.arange(self.grid_x) / self.grid_x,
+            np.arange(self.grid_y) / self.grid_y,
+            indexing="ij",
+        )
+        field = np.zeros_like(gx)
+        for _ in range(RESOURCE_WAVES):
+            kx, ky = rng.integers(1, 4, size=2)
+            field += np.sin(2 * np.pi * (kx * gx + ky * gy) + rng.uniform(0, 2 * np.pi))
+        self.capacity = 1.0 + self.resource_variation * field / RESOURCE_WAVES
+        self.resources = self.capacity.copy()
+
+    def cells(self, population) -> np.ndarray:
+        """
+        Flat cell index of every row.
+        """
+        x, y = population.positions
+        cx = (x // self.cell_width).astype(np.int64) % self.grid_x
+        cy = (y // self.cell_height).astype(np.int64) % self.grid_y
+        return cx * self.grid_y + cy
+
+    def place(self, population, rows, rng: np.random.Generator, near=None):
+        """
+        Gives `rows` positions: uniformly at random, or one step away from the
+        matching rows in `near`, e.g. offspring next to their parents.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        positions = population.positions
+        if near is None:
+            positions[0, rows] = rng.uniform(0, self.width, rows.size)
+            positions[1, rows] = rng.uniform(0, self.height, rows.size)
+        else:
+            offset = rng.normal(0.0, self.move_speed, (2, rows.size))
+            positions[:, rows] = positions[:, near] + offset
+            self._wrap(positions)
+
+    def step(self, population, rng: np.random.Generator):
+        """
+        Places newcomers, moves every entity one random step, then lets the
+        occupants eat their cells and the cells regrow.
+        """
+        positions = population.positions
+        unplaced = np.flatnonzero(np.isnan(positions[0]))
+        if unplaced.size:
+            self.place(population, unplaced, rng)
+
+        positions += rng.normal(0.0, self.move_speed, positions.shape)
+        self._wrap(positions)
+
+        occupancy = np.bincount(
+            self.cells(population)[population.alive_rows()],
+            minlength=self.resources.size,
+        ).reshape(self.resources.shape)
+        resources = self.resources
+        resources -= self.consumption * occupancy
+        np.maximum(resources, 0.0, out=resources)
+        resources += self.regrowth * (self.capacity - resources)
+
+    def resource_availability(self, population, base: float) -> np.ndarray:
+        """
+        Per-row resource availability: `base` scaled by each row's cell level.
+        """
+        return base * self.resources.ravel()[self.cells(population)]
+
+    def _wrap(self, positions: np.ndarray):
+        np.mod(positions[0], self.width, out=positions[0])
+        np.mod(positions[1], self.height, out=positions[1])
+
+    def _distance2(self, population, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Squared toroidal distance between rows `a` and `b`.
+        """
+        x, y = population.positions
+        dx = np.abs(x[a] - x[b])
+        dy = np.abs(y[a] - y[b])
+        dx = np.minimum(dx, self.width - dx)
+        dy = np.minimum(dy, self.height - dy)
+        return dx * dx + dy * dy
+
+    def neighbor_pairs(
+        self, population, rows: np.ndarray, max_partners: int, rng
+    ) -> tuple:
+        """
+        Draws up to `max_partners` random neighbours within the interaction
+        radius for each of `rows`.
+
+        Returns two arrays of positions into `rows`: an entity and one of its
+        partners per pair, the same meaning as a row of `draw_partners`.
+        """
+        n = rows.size
+        cell = self.cells(population)[rows]
+        order = np.argsort(cell, kind="stable")
+        counts = np.bincount(cell, minlength=self.resources.size)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        cx, cy = np.divmod(cell, self.grid_y)
+        radius2 = self.interaction_radius**2
+
+        firsts, seconds = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                other = ((cx + dx) % self.grid_x) * self.grid_y + (
+                    cy + dy
+                ) % self.grid_y
+                size = counts[other]
+                total = int(size.sum())
+                if not total:
+                    continue
+                first = np.repeat(np.arange(n), size)
+                # Position of each candidate within its cell's run of `order`
+                within = np.arange(total) - np.repeat(np.cumsum(size) - size, size)
+                second = order[np.repeat(starts[other], size) + within]
+                close = first != second
+                close &= (
+                    self._distance2(population, rows[first], rows[second]) <= radius2
+                )
+                firsts.append(first[close])
+                seconds.append(second[close])
+
+        if not firsts:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+
+        # Keep a random `max_partners` of each entity's neighbours
+        shuffled = np.lexsort((rng.random(first.size), first))
+        first, second = first[shuffled], second[shuffled]
+        group_start = np.searchsorted(first, first, side="left")
+        keep = np.arange(first.size) - group_start < max_partners
+        return first[keep], second[keep]
+
+    def outbreak_rows(self, population, rng: np.random.Generator) -> np.ndarray:
+        """
+        Picks a random living patient zero and returns every living row within
+        `disease_radius` of it, patient zero included.
+        """
+        alive = population.alive_rows()
+        if alive.size == 0:
+            return alive
+        patient_zero = np.full(alive.size, alive[rng.integers(alive.size)])
+        close = (
+            self._distance2(population, alive, patient_zero) <= self.disease_radius**2
+        )
+        return alive[close]
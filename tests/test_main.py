@@ -1,2 +1,835 @@
+import numpy as np
+
+from entity import Entity
+from genome import Genome
+from interactions import draw_partners
+from main import Simulation
+
+
 def test_example():
     assert 1 + 1 == 2
+
+
+def test_batched_update_matches_per_entity_rules():
+    rng = np.random.default_rng(7)
+    sim = Simulation(initial_entities=200, time_steps=100)
+    population = sim.population
+    population.age[:] = rng.integers(0, 120, len(population))
+    population.health[:] = rng.uniform(0, 100, len(population))
+    population.energy[:] = rng.uniform(0, 100, len(population))
+    sim.environment_factors.update(
+        {"resource_availability": 0.6, "temperature": 40.0, "pollution": 0.3}
+    )
+
+    reference = []
+    for view in population.views():
+        entity = Entity(view.parameters)
+        entity.age, entity.health, entity.energy = view.age, view.health, view.energy
+        sim._process_entity(entity)
+        reference.append(entity)
+
+    sim._process_population()
+
+    for entity, view in zip(reference, population.views(), strict=True):
+        assert (entity.age, entity.health, entity.energy, entity.status) == (
+            view.age,
+            view.health,
+            view.energy,
+            view.status,
+        )
+
+
+def test_equal_seeds_give_identical_runs():
+    runs = []
+    for _ in range(2):
+        simulation = Simulation(
+            initial_entities=60, time_steps=40, headless=True, seed=11
+        )
+        simulation.run_simulation()
+        runs.append(simulation.population)
+
+    a, b = runs
+    assert len(a) == len(b)
+    assert np.array_equal(a.health, b.health)
+    assert np.array_equal(a.genomes[: len(a)], b.genomes[: len(b)])
+
+
+def test_headless_runs_leave_logging_and_naming_as_they_were():
+    import logging
+
+    from logging_config import category_logger
+
+    births = category_logger("births")
+    Simulation(initial_entities=5, time_steps=5, headless=True).run_simulation()
+    assert births.isEnabledFor(logging.INFO)
+
+    sim = Simulation(initial_entities=5, time_steps=5)
+    assert all(entity.name for entity in sim.entities)
+
+
+def test_headless_runs_skip_pacing_and_log_only_summaries(caplog, monkeypatch):
+    import sys
+    import time
+
+    import main
+    from logging_config import CATEGORIES, category_logger
+
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    loggers = [main.logger, *map(category_logger, CATEGORIES)]
+    for logger in loggers:
+        logger.addHandler(caplog.handler)
+    try:
+        with monkeypatch.context() as patch:
+            # Importing the progress bar would fail
+            patch.setitem(sys.modules, "tqdm", None)
+            sim = Simulation(
+                seed=2,
+                initial_entities=40,
+                time_steps=23,
+                headless=True,
+                report_interval=10,
+            )
+            sim.run_simulation()
+        assert sleeps == []
+        headless = caplog.records[:]
+        caplog.clear()
+        Simulation(seed=2, initial_entities=5, time_steps=2).run_simulation()
+        interactive = caplog.records[:]
+    finally:
+        for logger in loggers:
+            logger.removeHandler(caplog.handler)
+
+    assert sim.current_time == 22
+    summaries = [
+        record.getMessage().split(":")[0]
+        for record in headless
+        if record.getMessage().startswith("Epoch ")
+    ]
+    assert summaries == ["Epoch 0", "Epoch 10", "Epoch 20", "Epoch 22"]
+    assert not any(record.name.startswith("lifeform.") for record in headless)
+
+    # The same checks see the pacing and entity lines of an interactive run
+    assert sleeps
+    assert any(record.name == "lifeform.entities" for record in interactive)
+
+
+def test_ids_count_up_and_names_come_from_a_refilled_pool(monkeypatch):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    import identity
+
+    sim = Simulation(seed=4, initial_entities=50, time_steps=30, headless=True)
+    sim.run_simulation()
+    ids = sim.population.ids[: len(sim.population)].tolist()
+    assert all(len(value) == 8 and int(value, 16) >= 0 for value in ids)
+    # Rows keep creation order through compaction, so ids stay sorted
+    assert ids == sorted(set(ids))
+    first = int(identity.next_id(), 16)
+    assert first > int(ids[-1], 16)
+    assert [int(value, 16) for value in identity.next_ids(3)] == [
+        first + 1,
+        first + 2,
+        first + 3,
+    ]
+
+    pool = []
+    monkeypatch.setattr(identity, "_name_pool", pool)
+    monkeypatch.setattr(identity, "NAME_POOL_SIZE", 8)
+    assert identity.next_name() in pool
+    assert len(pool) == 8
+    pool.clear()
+    assert set(identity.next_names(5)) <= set(pool)
+    assert len(pool) == 8
+
+    probe = (
+        "import sys, identity; identity.set_naming(False); "
+        "print(identity.next_name() == '', identity.next_names(3) == [''] * 3, "
+        "'faker' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(identity.__file__).parent,
+    )
+    assert result.stdout.split() == ["True", "True", "False"]
+
+
+def test_views_follow_rows_through_compaction():
+    sim = Simulation(initial_entities=3, time_steps=10)
+    first, second, third = sim.entities
+    second.health = 0.0
+    sim.population.update_status()
+    sim.population.compact()
+
+    assert len(sim.population) == 2
+    assert third.id == sim.population.ids[1]
+    third.energy = 12.5
+    assert sim.population.energy[1] == 12.5
+
+
+def test_partners_are_distinct_and_never_self():
+    rng = np.random.default_rng(3)
+    for num_alive in (2, 3, 4, 50):
+        num_partners = min(num_alive - 1, 3)
+        partners = draw_partners(num_alive, num_partners, rng)
+        assert partners.shape == (num_alive, num_partners)
+        for position, row in enumerate(partners.tolist()):
+            assert len(set(row)) == num_partners
+            assert position not in row
+            assert all(0 <= p < num_alive for p in row)
+
+
+def test_genomes_are_interned_and_copy_on_write():
+    genome = Genome({"aggression": 0.7})
+    assert Genome({"aggression": 0.7}) is genome
+    assert genome.replace({"aggression": 0.7}) is genome
+
+    mutated = genome.replace({"aggression": 0.2})
+    assert mutated is not genome
+    assert mutated["aggression"] == 0.2
+    assert genome["aggression"] == 0.7
+    assert Entity(genome).parameters is genome
+
+
+def test_resuming_a_checkpoint_reproduces_the_run(tmp_path):
+    full = Simulation(
+        seed=5,
+        initial_entities=60,
+        time_steps=40,
+        headless=True,
+        checkpoint_interval=20,
+        checkpoint_dir=str(tmp_path),
+    )
+    full.run_simulation()
+
+    resumed = Simulation.from_checkpoint(str(tmp_path / "epoch_000019"), headless=True)
+    resumed.run_simulation()
+
+    a, b = full.population, resumed.population
+    assert len(a) == len(b)
+    assert np.array_equal(a.age, b.age)
+    assert np.array_equal(a.health, b.health)
+    assert np.array_equal(a.energy, b.energy)
+    assert np.array_equal(a.genomes[: len(a)], b.genomes[: len(b)])
+
+
+def test_benchmark_compare_flags_slowdowns():
+    from benchmark import compare, run_benchmarks
+
+    baseline = run_benchmarks({150: 3})
+    assert compare(baseline, baseline) == []
+
+    slower = {
+        "results": {
+            key: {metric: value * 2 for metric, value in result.items()}
+            for key, result in baseline["results"].items()
+        }
+    }
+    flagged = compare(slower, baseline, threshold=0.2)
+    # Doubled times and memory are regressions; doubled throughput is not
+    assert any("phase/environment/150" in line for line in flagged)
+    assert not any("epochs_per_sec" in line for line in flagged)
+
+
+def test_profiler_records_every_phase_per_epoch():
+    from profiling import PHASES, Profiler
+
+    profiler = Profiler(window=(2, 4))
+    sim = Simulation(
+        seed=3, initial_entities=50, time_steps=6, headless=True, profiler=profiler
+    )
+    sim.run_simulation()
+
+    assert [record["epoch"] for record in profiler.series] == list(range(6))
+    assert all(profiler.calls[phase] == 6 for phase in PHASES)
+    assert profiler.profile_stats is not None
+    assert "traced_peak_bytes" in profiler.series[2]
+    assert "traced_peak_bytes" not in profiler.series[4]
+
+
+def test_metrics_stream_in_chunks_and_match_totals(tmp_path):
+    from metrics import MetricsRecorder, load_metrics
+    from stats import final_totals, reset_totals
+
+    reset_totals()
+    recorder = MetricsRecorder(str(tmp_path / "run"), chunk_size=16)
+    sim = Simulation(
+        seed=8, initial_entities=80, time_steps=40, headless=True, metrics=recorder
+    )
+    sim.run_simulation()
+
+    rows = load_metrics(str(tmp_path / "run.npz"))
+    assert list(rows["epoch"]) == list(range(sim.current_time + 1))
+    assert rows["births"].sum() == final_totals["total_births"]
+    assert rows["deaths"].sum() == final_totals["total_deaths"]
+    assert rows["alive"][-1] == len(sim.population)
+    assert np.isclose(
+        rows["aggression_mean"][-1], sim.population.column("aggression").mean()
+    )
+    with open(tmp_path / "run.csv") as f:
+        assert len(f.readlines()) == len(rows) + 1
+
+
+def test_status_indexes_stay_in_step_with_the_columns():
+    from population import DEAD, STRUGGLING, THRIVING
+
+    sim = Simulation(seed=2, initial_entities=400, time_steps=60, headless=True)
+    population = sim.population
+
+    def check():
+        status = population.status
+        assert list(population.status_counts) == list(np.bincount(status, minlength=4))
+        for code in (DEAD, THRIVING, STRUGGLING):
+            assert np.array_equal(population.rows(code), np.flatnonzero(status == code))
+        assert np.array_equal(population.alive_rows(), np.flatnonzero(status != DEAD))
+        eligible = (status == THRIVING) & (
+            population.age >= population.column("min_reproduction_age")
+        )
+        assert np.array_equal(population.eligible_rows(), np.flatnonzero(eligible))
+
+    for t in range(30):
+        sim.current_time = t
+        for phase in (
+            sim._update_environment,
+            sim._process_population,
+            sim._handle_interactions,
+        ):
+            phase()
+            check()
+        population.update_status()
+        check()
+        population.view(0).health = 0
+        population.view(0).update_status()
+        check()
+        sim._sweep_status()
+        check()
+        sim._handle_reproduction()
+        check()
+
+
+def test_spatial_neighbors_match_brute_force():
+    from world import World
+
+    world = World(width=40.0, height=30.0, interaction_radius=2.0)
+    sim = Simulation(seed=4, initial_entities=300, headless=True, world=world)
+    world.step(sim.population, sim.rng)
+    rows = sim.population.alive_rows()
+    first, second = world.neighbor_pairs(sim.population, rows, 3, sim.rng)
+
+    x, y = sim.population.positions
+    dx = np.abs(x[:, None] - x[None, :])
+    dy = np.abs(y[:, None] - y[None, :])
+    dx, dy = np.minimum(dx, 40.0 - dx), np.minimum(dy, 30.0 - dy)
+    near = dx**2 + dy**2 <= 4.0
+    np.fill_diagonal(near, False)
+
+    assert near[first, second].all()
+    assert np.array_equal(
+        np.bincount(first, minlength=len(rows)), np.minimum(near.sum(axis=1), 3)
+    )
+
+
+def test_spatial_checkpoint_resume_reproduces_the_run(tmp_path):
+    from world import World
+
+    def run(**kwargs):
+        sim = Simulation(
+            seed=6,
+            initial_entities=80,
+            time_steps=30,
+            headless=True,
+            world=World(width=60.0, height=60.0),
+            **kwargs,
+        )
+        sim.run_simulation()
+        return sim
+
+    full = run(checkpoint_interval=15, checkpoint_dir=str(tmp_path))
+    resumed = Simulation.from_checkpoint(str(tmp_path / "epoch_000014"), headless=True)
+    resumed.run_simulation()
+
+    assert np.array_equal(full.population.positions, resumed.population.positions)
+    assert np.array_equal(full.population.health, resumed.population.health)
+    assert np.array_equal(full.world.resources, resumed.world.resources)
+
+
+def test_sharded_runs_match_for_any_worker_count():
+    from sharding import ShardedSimulation
+
+    def run(workers):
+        sim = ShardedSimulation(
+            seed=9,
+            initial_entities=400,
+            time_steps=25,
+            headless=True,
+            shards=3,
+            workers=workers,
+        )
+        sim.run_simulation()
+        population = sim.population
+        state = (
+            population.age.copy(),
+            population.health.copy(),
+            population.uid[: len(population)].copy(),
+        )
+        population.release()
+        return state
+
+    inline, pooled = run(0), run(2)
+    for a, b in zip(inline, pooled, strict=True):
+        assert np.array_equal(a, b)
+
+
+def test_resumed_sweeps_skip_finished_runs_and_keep_the_header(tmp_path):
+    import csv
+
+    import pytest
+
+    from sweep import run_sweep
+
+    results = str(tmp_path / "results.csv")
+    grid = {"mutation_rate": [0.1], "pollution": [0.1]}
+    options = dict(initial_entities=10, time_steps=5, workers=1)
+    assert run_sweep(grid, [0], results, **options) == 1
+
+    # A file written by an older sweep, with its columns in another order
+    with open(results, newline="") as f:
+        rows = list(csv.reader(f))
+    header = rows[0][::-1]
+    with open(results, "w", newline="") as f:
+        csv.writer(f).writerows(row[::-1] for row in rows)
+
+    assert run_sweep(grid, [0, 1], results, **options) == 1
+    assert run_sweep(grid, [0, 1], results, **options) == 0
+    with open(results, newline="") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == header
+        resumed = list(reader)
+    assert [row["seed"] for row in resumed] == ["0", "1"]
+    assert len({row["run_id"] for row in resumed}) == 2
+    assert all(row["mutation_rate"] == "0.1" for row in resumed)
+
+    with pytest.raises(ValueError):
+        run_sweep({"mutation_rate": [0.2]}, [0], results, **options)
+
+
+def test_dashboard_draws_the_final_snapshot():
+    import io
+
+    from rich.console import Console
+
+    from dashboard import Dashboard
+
+    out = io.StringIO()
+    dashboard = Dashboard(console=Console(file=out, width=140))
+    sim = Simulation(seed=3, initial_entities=60, time_steps=30, dashboard=dashboard)
+    sim.run_simulation()
+
+    frame = out.getvalue()
+    assert sim.headless
+    assert "Epoch 29/30" in frame
+    assert "Predator took" in frame
+    assert "births" in frame
+
+
+def test_scheduled_scenarios_replay_and_count_events():
+    from events import EventEngine
+    from stats import final_totals, reset_totals
+
+    scenario = [
+        {"epoch": 5, "event": "heatwave", "duration": 4, "rise": 8.0},
+        {"epoch": 2, "event": "disease_outbreak", "patients": 10},
+        {"epoch": 3, "event": "disease_outbreak", "duration": 3, "transmission": 0.3},
+        {"epoch": 12, "event": "resource_spike"},
+        # Events last a single epoch unless the scenario says otherwise
+        {"epoch": 15, "event": "heatwave", "rise": 8.0},
+    ]
+
+    def run():
+        reset_totals()
+        engine = EventEngine(random_events=(), triggers=[])
+        engine.load_scenario(scenario)
+        sim = Simulation(
+            seed=5, initial_entities=80, time_steps=20, headless=True, events=engine
+        )
+        temperatures = {}
+        step = engine.step
+
+        def recording_step(simulation, rng):
+            step(simulation, rng)
+            temperatures[simulation.current_time] = simulation.environment_factors[
+                "temperature"
+            ]
+
+        engine.step = recording_step
+        sim.run_simulation()
+        return sim, temperatures, final_totals["total_events"]
+
+    first, temperatures, events = run()
+    second, _, _ = run()
+    assert events == 5
+    assert np.array_equal(first.population.health, second.population.health)
+    baseline = 25.0 + 10 * (np.arange(20) / 20 - 0.5)
+    raised = [t for t in range(20) if temperatures[t] > baseline[t] + 1e-9]
+    assert raised == [5, 6, 7, 8, 15]
+
+
+def test_journal_replay_rebuilds_any_epoch(tmp_path):
+    from journal import Journal, replay
+    from stats import final_totals, reset_totals
+
+    columns = ("uid", "age", "health", "energy", "status")
+    counters = ("total_births", "total_deaths", "total_interactions")
+    states = {}
+
+    class Recorded(Simulation):
+        def _end_epoch(self, alive_count):
+            population = self.population
+            states[self.current_time] = (
+                [getattr(population, c)[: len(population)].copy() for c in columns],
+                [final_totals[key] for key in counters],
+            )
+            return super()._end_epoch(alive_count)
+
+    reset_totals()
+    path = str(tmp_path / "journal")
+    sim = Recorded(
+        seed=6,
+        initial_entities=120,
+        time_steps=60,
+        headless=True,
+        journal=Journal(path, keyframe_interval=20),
+    )
+    sim.run_simulation()
+
+    for epoch in (0, 19, 20, 45, 59):
+        population = replay(path, epoch).population
+        live_columns, live_counters = states[epoch]
+        for column, live in zip(columns, live_columns, strict=True):
+            assert np.array_equal(getattr(population, column)[: len(population)], live)
+        assert [final_totals[key] for key in counters] == live_counters
+
+
+def test_lineage_rebuilds_parameters_along_each_line():
+    from lineage import Lineage
+
+    lineage = Lineage(capacity=16)
+    sim = Simulation(
+        seed=9, initial_entities=40, time_steps=60, headless=True, lineage=lineage
+    )
+    sim.environment_factors["mutation_rate"] = 0.5
+    sim.run_simulation()
+
+    population = sim.population
+    assert lineage.size == population.uid[len(population) - 1] + 1
+    assert sum(lineage.descendant_counts().values()) == lineage.size - 40
+    alive = lineage.descendant_counts(population.uid[: len(population)])
+    assert sum(alive.values()) == len(population)
+
+    for row in range(0, len(population), 7):
+        uid = int(population.uid[row])
+        ancestors = lineage.ancestors(uid)
+        assert ancestors[-1] < 40 and np.all(np.diff(ancestors) < 0)
+        for key in ("max_age", "resilience", "aggression"):
+            line, born, values = lineage.parameter_history(uid, key)
+            assert line[-1] == uid and np.all(np.diff(born) > 0)
+            assert values[-1] == population.column(key)[row]
+
+
+def test_schedules_precompute_factors_and_take_overrides(tmp_path):
+    import pytest
+
+    from events import EventEngine
+    from schedule import (
+        DEFAULT_SCHEDULE,
+        EnvironmentSchedule,
+        Linear,
+        Seasonal,
+        Step,
+        load_schedule,
+    )
+
+    t = np.arange(200) / 200
+    default = DEFAULT_SCHEDULE.table(200)
+    assert np.allclose(default["resource_availability"], np.maximum(0.1, 1 - t * 0.5))
+    assert np.allclose(default["temperature"], 25.0 + 10 * (t - 0.5))
+    assert DEFAULT_SCHEDULE.table(200) is default and not default.flags.writeable
+
+    schedule = EnvironmentSchedule(
+        temperature=Seasonal(5, period=50, mean=20) + Step(0, {100: 3}),
+        resource_availability=(Linear(1.0, 0.0) * 2).clip(high=1.5),
+        pollution=0.1,
+    )
+    table = schedule.table(200)
+    assert np.allclose(table["temperature"][[25, 150]], [20, 23])
+    assert table["resource_availability"].max() == 1.5
+    path = str(tmp_path / "schedule.npy")
+    schedule.save(path, 200)
+    loaded = load_schedule(path)
+    assert isinstance(loaded.table(200), np.memmap)
+    assert np.array_equal(loaded.table(200), table)
+
+    # Factors a schedule leaves out keep drifting, so events on them wear off
+    partial = EnvironmentSchedule(pollution=Linear(0.0, 0.3))
+    drift = DEFAULT_SCHEDULE.table(20)["temperature"]
+    assert np.array_equal(partial.table(20)["temperature"], drift)
+
+    engine = EventEngine(random_events=(), triggers=[])
+    with pytest.raises(ValueError):
+        engine.schedule(3, "override", factor="pollution")
+    engine.schedule(10, "override", factor="pollution", value=0.9, duration=5)
+    engine.schedule(4, "heatwave", rise=5.0, duration=2)
+    sim = Simulation(
+        seed=2,
+        initial_entities=30,
+        time_steps=20,
+        headless=True,
+        events=engine,
+        schedule=partial,
+        checkpoint_interval=10,
+        checkpoint_dir=str(tmp_path),
+    )
+    factors = {}
+    step = engine.step
+
+    def recording_step(simulation, rng):
+        step(simulation, rng)
+        factors[simulation.current_time] = dict(simulation.environment_factors)
+
+    engine.step = recording_step
+    sim.run_simulation()
+    pollution = [t for t, values in factors.items() if values["pollution"] == 0.9]
+    assert pollution == [10, 11, 12, 13, 14]
+    baseline = partial.table(20)["temperature"]
+    raised = [t for t, values in factors.items() if values["temperature"] > baseline[t]]
+    assert raised == [4, 5]
+
+    # A resumed run continues on the same schedule
+    resumed = Simulation.from_checkpoint(str(tmp_path / "epoch_000009"), headless=True)
+    assert np.array_equal(resumed.schedule.table(20), partial.table(20))
+
+
+def test_backends_give_matching_trajectories():
+    from backends import available_backends
+    from world import World
+
+    def run(backend, spatial):
+        sim = Simulation(
+            seed=8,
+            initial_entities=80,
+            time_steps=30,
+            headless=True,
+            backend=backend,
+            world=World(width=20.0, height=20.0) if spatial else None,
+        )
+        sim.run_simulation()
+        return sim.population
+
+    for spatial in (False, True):
+        reference = run("python", spatial)
+        for backend in available_backends():
+            population = run(backend, spatial)
+            n = len(reference)
+            assert len(population) == n
+            assert np.array_equal(population.uid[:n], reference.uid[:n])
+            assert np.array_equal(population.age, reference.age)
+            assert np.array_equal(population.health, reference.health)
+            assert np.array_equal(population.energy, reference.energy)
+            assert np.array_equal(population.status, reference.status)
+
+
+def test_batched_mutation_respects_bounds_and_shares_genomes():
+    from mutation import LOWER, MUTABLE_INDEX, UPPER, mutate, offspring_genomes
+
+    rng = np.random.default_rng(3)
+    parent = Genome({"max_age": 199, "aggression": 0.99})
+    genomes = np.empty(500, dtype=object)
+    genomes[:] = [parent] * 500
+    values = np.tile(parent.vector[MUTABLE_INDEX], (500, 1))
+    mutated, mask = mutate(values, rng, rate=0.5, strength=0.5)
+    within = (mutated >= LOWER) & (mutated <= UPPER)
+    assert np.all(within[mask])
+    assert np.array_equal(mutated[:, 0], np.round(mutated[:, 0]))
+    assert np.array_equal(mutated[~mask], values[~mask])
+
+    offspring = offspring_genomes(genomes, mutated, mask)
+    unchanged = ~mask.any(axis=1)
+    assert all(genome is parent for genome in offspring[unchanged])
+    for genome, row in zip(offspring[~unchanged], mutated[~unchanged], strict=True):
+        assert np.array_equal(genome.vector[MUTABLE_INDEX], row)
+        assert isinstance(genome["max_age"], int)
+
+
+def test_scenarios_validate_once_and_load_lazily(tmp_path, monkeypatch):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    import pytest
+
+    import scenario
+
+    path = tmp_path / "run.toml"
+    path.write_text(
+        "seed = 5\ntime_steps = 10\n"
+        '[[founders]]\npreset = "hardy"\ncount = 2\n'
+        '[[events]]\nepoch = 3\nevent = "heatwave"\n'
+        "[output]\nheadless = true\n"
+    )
+    loaded = scenario.load_scenario(str(path))
+    assert loaded["seed"] == 5 and loaded["founders"][0]["count"] == 2
+    assert loaded["environment"] == scenario.DEFAULT_SCENARIO["environment"]
+    # The validated result is cached by content, next to the file
+    (cached,) = (tmp_path / "__pycache__").iterdir()
+    scenario._parsed.clear()
+    assert scenario.load_scenario(str(path)) == loaded
+    cached.unlink()
+    # A changed default makes earlier validations stale
+    monkeypatch.setitem(scenario.DEFAULT_SCENARIO, "initial_entities", 3)
+    assert scenario.load_scenario(str(path))["initial_entities"] == 3
+    monkeypatch.undo()
+
+    # Tables override defaults entry by entry; paths follow the file
+    (tmp_path / "runs").mkdir()
+    partial = tmp_path / "runs" / "partial.json"
+    partial.write_text('{"environment": {"temperature": 20.0}, "schedule": "d.npy"}')
+    loaded = scenario.load_scenario(str(partial))
+    default = scenario.DEFAULT_SCENARIO["environment"]
+    assert loaded["environment"] == {**default, "temperature": 20.0}
+    assert loaded["schedule"] == str(tmp_path / "runs" / "d.npy")
+
+    for bad in (
+        {"founders": [{"preset": "giant"}]},
+        {"events": [{"epoch": 1, "event": "override", "factor": "pollution"}]},
+        {"output": {"report_interval": "often"}},
+        {"environment": {"gravity": 9.8}},
+    ):
+        with pytest.raises(ValueError):
+            scenario.validate(bad)
+
+    # The CLI loads nothing heavy until it runs, and a headless run with
+    # founders never loads the progress bar, dashboard or name generator
+    optional = "{'tqdm', 'colored', 'rich', 'journal', 'stream', 'tomllib', 'faker'}"
+    for probe in (
+        f"import sys, cli; print(sorted(({optional} | {{'numpy'}}) & set(sys.modules)))",
+        f"import sys, cli; cli.main(['--scenario', {str(path)!r}]); "
+        "print(sorted({'tqdm', 'rich', 'faker'} & set(sys.modules)))",
+    ):
+        result = subprocess.run(
+            [sys.executable, "-c", probe],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(scenario.__file__).parent,
+        )
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_cohort_runs_track_the_entity_engine():
+    import pytest
+
+    from cohorts import CohortSimulation, cohort_events
+    from events import EventEngine
+    from stats import final_totals, reset_totals
+
+    def run(cls, events, seed):
+        reset_totals()
+        sim = cls(
+            initial_entities=300,
+            time_steps=30,
+            headless=True,
+            seed=seed,
+            events=EventEngine(events, random_events=(), triggers=[]),
+        )
+        sim.run_simulation()
+        return sim, final_totals["total_births"]
+
+    for seed in (0, 1):
+        entities, entity_births = run(Simulation, None, seed)
+        cohorts, cohort_births = run(CohortSimulation, cohort_events(), seed)
+        population = cohorts.population
+        assert len(population) < len(entities.population) // 5
+        assert population.weight.sum() == population.alive_count()
+        alive = entities.population.alive_count()
+        assert abs(population.alive_count() - alive) <= 0.05 * alive
+        assert abs(cohort_births - entity_births) <= 0.08 * entity_births
+
+    # Splitting and merging move entities between rows, never lose them
+    total = population.alive_count()
+    rows = population.alive_rows()[:3]
+    moved = population.split(rows, population.weight[rows] // 2 + 1)
+    population.kill(population.split(moved[:1], [1]))
+    population.compact()
+    population.merge(5.0)
+    assert population.alive_count() == total - 1
+
+    # Options that track single entities are refused up front
+    for option in ("checkpoint_interval", "checkpoint_dir", "journal"):
+        with pytest.raises(ValueError):
+            CohortSimulation(initial_entities=10, **{option: 5})
+
+
+def test_stream_viewers_rebuild_the_population(tmp_path):
+    import threading
+    import time
+
+    from stream import KEYFRAME, SPATIAL_DTYPE, StateStream, Viewer
+    from world import World
+
+    def watch(viewer, seen):
+        while (kind := viewer.read_frame()) is not None:
+            seen.append(kind)
+
+    for world in (None, World(width=60.0, height=60.0)):
+        # Viewers attach before the run, when the record layout isn't known
+        stream = StateStream(str(tmp_path / "state.sock"), keyframe_interval=10)
+        stream.listen()
+        viewers = [Viewer(stream.address, timeout=10) for _ in range(2)]
+        stalled = Viewer(stream.address)  # Never reads
+        while stream.client_count < 3:
+            time.sleep(0.01)
+        kinds = [[], []]
+        threads = [
+            threading.Thread(target=watch, args=pair)
+            for pair in zip(viewers, kinds, strict=True)
+        ]
+        for thread in threads:
+            thread.start()
+        sim = Simulation(
+            seed=3,
+            initial_entities=2000,
+            time_steps=40,
+            headless=True,
+            stream=stream,
+            world=world,
+        )
+        sim.run_simulation()
+        for thread in threads:
+            thread.join()
+        stalled.close()
+
+        population = sim.population
+        n = len(population)
+        for viewer, seen in zip(viewers, kinds, strict=True):
+            entities = viewer.entities
+            assert (viewer.dtype == SPATIAL_DTYPE) == (world is not None)
+            assert viewer.epoch == sim.current_time
+            assert seen[0] == KEYFRAME and seen.count(KEYFRAME) < len(seen)
+            assert np.array_equal(entities["uid"], population.uid[:n])
+            assert np.array_equal(entities["born"], sim.current_time - population.age)
+            assert np.array_equal(entities["health"], population.health.astype("f4"))
+            assert np.array_equal(entities["energy"], population.energy.astype("f4"))
+            if world:
+                x, y = population.positions.astype("f4")
+                assert np.array_equal(entities["x"], x)
+                assert np.array_equal(entities["y"], y)
+            for row in range(0, n, 17):
+                genome = viewer.genomes[int(entities["genome"][row])]
+                assert np.array_equal(genome, population.genomes[row].vector)
+        # The stalled viewer's backlog was coalesced rather than held up the run
+        assert stream.frames_dropped > 0 and stream.client_count == 0